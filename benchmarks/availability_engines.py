@@ -0,0 +1,93 @@
+# ruff: noqa: E402
+
+"""
+Сравнение движков доступности на поиске отелей с любым свободным номером.
+
+    python -m benchmarks.availability_engines --queries 200
+
+Работает с базой из .env, поэтому запускать на копии с реальным объёмом bookings.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import select
+
+from src.core.availability.base import InMemoryAvailabilityEngine
+from src.core.availability.interval_index import IntervalIndexEngine
+from src.core.availability.occupancy_matrix import OccupancyMatrixEngine
+from src.database import async_session_maker_null_pool
+from src.repositories.utils import get_available_rooms_ids
+from src.rooms.models import Room
+
+
+def random_windows(num_of_queries: int, days: int) -> list[tuple[date, date]]:
+    today = date.today()
+    windows = []
+    for _ in range(num_of_queries):
+        date_from = today + timedelta(days=random.randint(0, days - 15))
+        windows.append((date_from, date_from + timedelta(days=random.randint(1, 14))))
+    return windows
+
+
+async def bench_sql(windows: list[tuple[date, date]]) -> list[float]:
+    timings = []
+    async with async_session_maker_null_pool() as session:
+        for date_from, date_to in windows:
+            query = (
+                select(Room.hotel_id)
+                .distinct()
+                .filter(Room.id.in_(get_available_rooms_ids(date_from, date_to)))
+            )
+            started = time.perf_counter()
+            await session.execute(query)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def bench_engine(
+    engine: InMemoryAvailabilityEngine, windows: list[tuple[date, date]]
+) -> tuple[float, list[float]]:
+    started = time.perf_counter()
+    await engine.load(async_session_maker_null_pool)
+    load_time = time.perf_counter() - started
+
+    timings = []
+    for date_from, date_to in windows:
+        started = time.perf_counter()
+        hotels_ids = engine.get_available_hotels_ids(date_from, date_to)
+        timings.append(time.perf_counter() - started)
+        assert hotels_ids is not None
+    return load_time, timings
+
+
+def report(name: str, timings: list[float], load_time: float | None = None) -> None:
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2] * 1000
+    p99 = timings[int(len(timings) * 0.99) - 1] * 1000
+    load = f", load {load_time:.2f}s" if load_time is not None else ""
+    print(f"{name:<18} p50 {p50:8.3f} ms  p99 {p99:8.3f} ms{load}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    windows = random_windows(args.queries, args.days)
+    report("sql", await bench_sql(windows))
+    for engine in (IntervalIndexEngine(), OccupancyMatrixEngine(days=args.days)):
+        load_time, timings = await bench_engine(engine, windows)
+        report(engine.name, timings, load_time)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+# ruff: noqa: E402
+
+"""
+Размер записи и время encode/decode для кодеков кеша на списке номеров с удобствами.
+
+    python -m benchmarks.cache_codecs --rooms 500
+
+Кодеки с неустановленными пакетами (orjson, msgpack, zstandard, lz4) пропускаются.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from pydantic import TypeAdapter
+
+from src.core.cache_codec import CacheCodec
+from src.facilities.schemas import FacilityInDB
+from src.rooms.schemas import RoomWithFacilities
+
+
+def make_rooms(num_of_rooms: int) -> list[RoomWithFacilities]:
+    facilities = [FacilityInDB(id=i, title=f"Facility {i}") for i in range(10)]
+    return [
+        RoomWithFacilities(
+            id=i,
+            hotel_id=i // 10,
+            title=f"Room {i}",
+            description="Просторный номер с видом на реку и большой кроватью",
+            price=1000 + i,
+            quantity=i % 5 + 1,
+            facilities=facilities[: i % 10],
+        )
+        for i in range(num_of_rooms)
+    ]
+
+
+def timeit(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1_000_000
+
+
+def report(name: str, size: int, encode_us: float, decode_us: float) -> None:
+    print(f"{name:<18} {size:>9} B  encode {encode_us:9.1f} us  decode {decode_us:9.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rooms = make_rooms(args.rooms)
+    adapter = TypeAdapter(list[RoomWithFacilities])
+
+    # прежний формат redis_cache: json.dumps(model_dump()) и dict на чтении
+    dumped = json.dumps([room.model_dump(mode="json") for room in rooms])
+    report(
+        "json.dumps (old)",
+        len(dumped.encode()),
+        timeit(lambda: json.dumps([room.model_dump(mode="json") for room in rooms]), args.repeat),
+        timeit(lambda: json.loads(dumped), args.repeat),
+    )
+
+    for serializer in ("json", "orjson", "msgpack"):
+        for compression in ("none", "zstd", "lz4"):
+            try:
+                codec = CacheCodec(serializer, compression, compress_min_size=0)  # type: ignore
+            except ImportError:
+                continue
+            encoded = codec.encode(rooms, adapter)
+            assert codec.decode(encoded, adapter) == rooms
+            report(
+                f"{serializer}+{compression}",
+                len(encoded),
+                timeit(lambda: codec.encode(rooms, adapter), args.repeat),
+                timeit(lambda: codec.decode(encoded, adapter), args.repeat),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# ruff: noqa: E402
+
+"""
+Сборка BookingInDB из 10k строк: model_validate из ORM-объектов (как было),
+model_validate / model_construct из строк и быстрый путь DataMapper
+(то же, что model_construct, но без обхода значений по умолчанию и алиасов).
+
+    python -m benchmarks.data_mapper --rows 10000
+
+С флагом --db дополнительно сравнивается get_all по базе из .env:
+select(Booking) + model_validate против select(*columns) + быстрый путь.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import select
+
+from src.bookings.models import Booking
+from src.bookings.schemas import BookingInDB
+from src.database import async_session_maker_null_pool
+from src.repositories.mappers.base import get_schema_fields
+from src.repositories.mappers.mappers import BookingDataMapper
+
+
+def make_rows(num_of_rows: int) -> list[tuple]:
+    fields = get_schema_fields(BookingInDB)
+    rows = []
+    for i in range(num_of_rows):
+        values = {
+            "id": i,
+            "room_id": i % 100,
+            "user_id": i % 10,
+            "date_from": date(2030, 1, 1) + timedelta(days=i % 365),
+            "date_to": date(2030, 1, 8) + timedelta(days=i % 365),
+            "price": 7000,
+        }
+        rows.append(tuple(values[field] for field in fields))
+    return rows
+
+
+def timeit(func) -> float:
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def report(name: str, ms: float) -> None:
+    print(f"{name:<32} {ms:9.2f} ms")
+
+
+def bench_mapping(num_of_rows: int) -> None:
+    fields = get_schema_fields(BookingInDB)
+    rows = make_rows(num_of_rows)
+    mappings = [dict(zip(fields, row)) for row in rows]
+    orm_objects = [Booking(**mapping) for mapping in mappings]
+
+    report(
+        "model_validate(orm object)",
+        timeit(lambda: [BookingDataMapper.map_to_domain_entity(obj) for obj in orm_objects]),
+    )
+    report(
+        "model_validate(dict)",
+        timeit(lambda: [BookingInDB.model_validate(mapping) for mapping in mappings]),
+    )
+    report(
+        "model_construct(**dict)",
+        timeit(lambda: [BookingInDB.model_construct(**mapping) for mapping in mappings]),
+    )
+    build = BookingDataMapper.row_builder()
+    report("row_builder()(row)", timeit(lambda: [build(row) for row in rows]))
+
+
+async def bench_db() -> None:
+    async with async_session_maker_null_pool() as session:
+        started = time.perf_counter()
+        result = await session.execute(select(Booking))
+        [BookingDataMapper.map_to_domain_entity(obj) for obj in result.scalars().all()]
+        report("db: select(Booking)", (time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        result = await session.execute(select(*BookingDataMapper.columns()))
+        build = BookingDataMapper.row_builder()
+        [build(row) for row in result.all()]
+        report("db: select(*columns), fast path", (time.perf_counter() - started) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--db", action="store_true")
+    args = parser.parse_args()
+
+    bench_mapping(args.rows)
+    if args.db:
+        asyncio.run(bench_db())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# ruff: noqa: E402
+
+"""
+Накладные расходы DBDep на запрос: вход и выход из DBManager без обращений к базе
+и с одним репозиторием, до и после ленивых репозиториев.
+
+    python -m benchmarks.db_manager_overhead --iterations 100000
+
+Соединение с базой не открывается: сессия без запросов к ней не подключается.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.availability.base import pop_pending_changes
+from src.database import async_session_maker
+from src.repositories.auth import AuthRepository
+from src.repositories.bookings import BookingRepository
+from src.repositories.facilities import FacilityRepository, RoomFacilityRepository
+from src.repositories.hotels import HotelRepository
+from src.repositories.room_occupancy import RoomOccupancyRepository
+from src.repositories.rooms import RoomRepository
+from src.utils.db_manager import DBManager
+
+
+class EagerDBManager:
+    """DBManager до изменения: все репозитории сразу и rollback на выходе"""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    async def __aenter__(self):
+        self.session = self.session_factory()
+
+        self.hotels = HotelRepository(session=self.session)
+        self.rooms = RoomRepository(session=self.session)
+        self.auth = AuthRepository(session=self.session)
+        self.bookings = BookingRepository(session=self.session)
+        self.facilities = FacilityRepository(session=self.session)
+        self.rooms_facilities = RoomFacilityRepository(session=self.session)
+        self.room_occupancy = RoomOccupancyRepository(session=self.session)
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pop_pending_changes(self.session)
+        await self.session.rollback()
+        await self.session.close()
+
+
+async def bench(manager_class, iterations: int, touch_repository: bool) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        async with manager_class(session_factory=async_session_maker) as db:
+            if touch_repository:
+                _ = db.hotels
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for touch_repository in (False, True):
+        title = "one repository" if touch_repository else "no repositories"
+        for manager_class in (EagerDBManager, DBManager):
+            per_request = await bench(manager_class, args.iterations, touch_repository)
+            print(f"{manager_class.__name__:<15} {title:<16} {per_request:7.2f} us/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
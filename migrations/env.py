@@ -8,7 +8,12 @@ from alembic import context
 from src.users.models import User  # noqa: F401
 from src.hotels.models import Hotel  # noqa: F401
 from src.rooms.models import Room  # noqa: F401
-from src.bookings.models import Booking  # noqa: F401
+from src.bookings.models import (  # noqa: F401
+    Booking,
+    BookingArchive,
+    RoomOccupancy,
+    RoomUnitBooking,
+)
 from src.facilities.models import Facility, RoomFacility  # noqa: F401
 from src.database import Base
 from src.config import settings
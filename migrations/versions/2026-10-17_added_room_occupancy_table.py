@@ -0,0 +1,49 @@
+"""added room_occupancy table
+
+Revision ID: 5f1c2e9a7b3d
+Revises: ccd75d6ac5aa
+Create Date: 2026-10-17 12:04:31.518240
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5f1c2e9a7b3d"
+down_revision: Union[str, None] = "ccd75d6ac5aa"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "room_occupancy",
+        sa.Column("room_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("booked_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["room_id"], ["rooms.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("room_id", "day"),
+    )
+    op.create_index(op.f("ix_room_occupancy_day"), "room_occupancy", ["day"], unique=False)
+    # backfill по уже существующим бронированиям
+    op.execute(
+        """
+        insert into room_occupancy (room_id, day, booked_count)
+        select room_id, day, count(*)
+        from (
+            select room_id,
+                   generate_series(date_from, date_to - 1, interval '1 day')::date as day
+            from bookings
+        ) booked_nights
+        group by room_id, day
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_room_occupancy_day"), table_name="room_occupancy")
+    op.drop_table("room_occupancy")
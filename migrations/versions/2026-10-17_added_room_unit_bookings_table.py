@@ -0,0 +1,91 @@
+"""added room_unit_bookings table
+
+Revision ID: c4f8d2a61b93
+Revises: b7e3a1c94f20
+Create Date: 2026-10-17 22:41:09.604518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4f8d2a61b93"
+down_revision: Union[str, None] = "b7e3a1c94f20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def assign_units(bookings) -> list[dict]:
+    """
+    Жадно раскладывает брони одного номера по units: каждой -- наименьший unit,
+    освободившийся к её заезду. Уже перебронированная история получает units сверх
+    quantity, чтобы ограничение создалось, а новые брони туда не попадут.
+    """
+    units_free_from = []  # unit - 1 -> дата выезда последней брони на нём
+    unit_bookings = []
+    for booking_id, room_id, date_from, date_to in bookings:
+        for index, free_from in enumerate(units_free_from):
+            if free_from <= date_from:
+                break
+        else:
+            index = len(units_free_from)
+            units_free_from.append(date_to)
+        units_free_from[index] = date_to
+        unit_bookings.append(
+            {
+                "booking_id": booking_id,
+                "booking_date_from": date_from,
+                "room_id": room_id,
+                "unit": index + 1,
+                "stay": postgresql.Range(date_from, date_to),
+            }
+        )
+    return unit_bookings
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    room_unit_bookings = op.create_table(
+        "room_unit_bookings",
+        sa.Column("booking_id", sa.Integer(), nullable=False),
+        sa.Column("booking_date_from", sa.Date(), nullable=False),
+        sa.Column("room_id", sa.Integer(), nullable=False),
+        sa.Column("unit", sa.Integer(), nullable=False),
+        sa.Column("stay", postgresql.DATERANGE(), nullable=False),
+        postgresql.ExcludeConstraint(
+            (sa.column("room_id"), "="),
+            (sa.column("unit"), "="),
+            (sa.column("stay"), "&&"),
+            name="room_unit_bookings_no_overlap",
+            using="gist",
+        ),
+        sa.ForeignKeyConstraint(
+            ["booking_id", "booking_date_from"],
+            ["bookings.id", "bookings.date_from"],
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(["room_id"], ["rooms.id"]),
+        sa.PrimaryKeyConstraint("booking_id", "booking_date_from"),
+    )
+    # backfill по уже существующим бронированиям, по номерам в порядке заезда
+    bookings = op.get_bind().execute(
+        sa.text(
+            "select id, room_id, date_from, date_to from bookings "
+            "order by room_id, date_from, id"
+        )
+    )
+    room_bookings: dict[int, list] = {}
+    for booking in bookings:
+        room_bookings.setdefault(booking.room_id, []).append(booking)
+    for rows in room_bookings.values():
+        op.bulk_insert(room_unit_bookings, assign_units(rows))
+
+
+def downgrade() -> None:
+    op.drop_table("room_unit_bookings")
@@ -0,0 +1,77 @@
+"""added search and foreign key indexes
+
+Revision ID: 3176edcfd039
+Revises: 5f1c2e9a7b3d
+Create Date: 2026-10-17 15:21:07.904113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3176edcfd039"
+down_revision: Union[str, None] = "5f1c2e9a7b3d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRGM_INDEXES = {
+    "ix_hotels_title_trgm": "title",
+    "ix_hotels_location_trgm": "location",
+}
+
+BTREE_INDEXES = {
+    "ix_bookings_room_id_date_from_date_to": ("bookings", ["room_id", "date_from", "date_to"]),
+    "ix_bookings_user_id": ("bookings", ["user_id"]),
+    "ix_bookings_date_from": ("bookings", ["date_from"]),
+    "ix_rooms_hotel_id": ("rooms", ["hotel_id"]),
+    "ix_rooms_facilities_room_id": ("rooms_facilities", ["room_id"]),
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции,
+    # зато он не блокирует запись в таблицы на время построения
+    with op.get_context().autocommit_block():
+        for index_name, column in TRGM_INDEXES.items():
+            op.create_index(
+                index_name,
+                "hotels",
+                [sa.text(f"lower({column}) gin_trgm_ops")],
+                unique=False,
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for index_name, (table_name, columns) in BTREE_INDEXES.items():
+            op.create_index(
+                index_name,
+                table_name,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, (table_name, _) in BTREE_INDEXES.items():
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+        for index_name in TRGM_INDEXES:
+            op.drop_index(
+                index_name,
+                table_name="hotels",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
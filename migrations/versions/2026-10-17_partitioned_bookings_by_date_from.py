@@ -0,0 +1,126 @@
+"""partitioned bookings by date_from
+
+Revision ID: b7e3a1c94f20
+Revises: 8d41b6f0c2e7
+Create Date: 2026-10-17 20:05:48.371162
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e3a1c94f20"
+down_revision: Union[str, None] = "8d41b6f0c2e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# дальше партиции создаёт задача maintain_booking_partitions
+MONTHS_AHEAD = 6
+# settings.BOOKING_MAX_NIGHTS: на нём держится проверка last_check_out при отсоединении
+# партиций и окно загрузки движков доступности
+BOOKING_MAX_NIGHTS = 365
+
+BOOKINGS_INDEXES = {
+    "ix_bookings_room_id_date_from_date_to": ["room_id", "date_from", "date_to"],
+    "ix_bookings_user_id": ["user_id"],
+    "ix_bookings_date_from": ["date_from"],
+}
+COLUMNS = "id, room_id, user_id, date_from, date_to, price"
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_bookings_table(name: str, primary_key: str, partitioned: bool) -> None:
+    op.execute(
+        f"""
+        create table {name} (
+            id integer not null default nextval('bookings_id_seq'),
+            room_id integer not null,
+            user_id integer not null,
+            date_from date not null,
+            date_to date not null,
+            price integer not null,
+            constraint bookings_pkey primary key ({primary_key}),
+            constraint bookings_room_id_fkey foreign key (room_id) references rooms (id),
+            constraint bookings_user_id_fkey foreign key (user_id) references users (id)
+        ) {"partition by range (date_from)" if partitioned else ""}
+        """
+    )
+    op.execute(f"alter sequence bookings_id_seq owned by {name}.id")
+
+
+def rename_old_bookings_table() -> None:
+    op.execute("alter table bookings rename to bookings_old")
+    op.execute("alter table bookings_old rename constraint bookings_pkey to bookings_old_pkey")
+    op.execute(
+        "alter table bookings_old rename constraint bookings_room_id_fkey to bookings_old_room_id_fkey"
+    )
+    op.execute(
+        "alter table bookings_old rename constraint bookings_user_id_fkey to bookings_old_user_id_fkey"
+    )
+    for index_name in BOOKINGS_INDEXES:
+        op.drop_index(index_name, table_name="bookings_old", if_exists=True)
+
+
+def create_bookings_indexes() -> None:
+    for index_name, columns in BOOKINGS_INDEXES.items():
+        op.create_index(index_name, "bookings", columns, unique=False)
+
+
+def check_no_long_stays() -> None:
+    """Бронь длиннее BOOKING_MAX_NIGHTS пережила бы отсоединение своей партиции"""
+    long_stays = (
+        op.get_bind()
+        .execute(
+            sa.text("select count(*) from bookings where date_to - date_from > :max_nights"),
+            {"max_nights": BOOKING_MAX_NIGHTS},
+        )
+        .scalar()
+    )
+    if long_stays:
+        raise RuntimeError(
+            f"{long_stays} броней длиннее {BOOKING_MAX_NIGHTS} ночей: сократите или удалите их "
+            "до партиционирования, иначе их ночи снимутся с room_occupancy раньше выезда"
+        )
+
+
+def upgrade() -> None:
+    check_no_long_stays()
+    # Таблица пересоздаётся с копированием строк и блокирует bookings на время миграции.
+    # Первичный ключ (id, date_from): уникальный индекс партиционированной таблицы
+    # обязан включать ключ партиционирования.
+    rename_old_bookings_table()
+    create_bookings_table("bookings", "id, date_from", partitioned=True)
+    create_bookings_indexes()
+    op.execute("create table bookings_default partition of bookings default")
+
+    first_day = op.get_bind().execute(sa.text("select min(date_from) from bookings_old")).scalar()
+    current_month = date.today().replace(day=1)
+    month = min(first_day or current_month, current_month).replace(day=1)
+    while month <= add_months(current_month, MONTHS_AHEAD):
+        op.execute(
+            f"create table bookings_y{month.year}m{month.month:02d} partition of bookings "
+            f"for values from ('{month}') to ('{add_months(month, 1)}')"
+        )
+        month = add_months(month, 1)
+
+    op.execute(f"insert into bookings ({COLUMNS}) select {COLUMNS} from bookings_old")
+    op.execute("drop table bookings_old")
+
+
+def downgrade() -> None:
+    # брони из отсоединённых партиций и bookings_archive сюда не возвращаются
+    rename_old_bookings_table()
+    create_bookings_table("bookings", "id", partitioned=False)
+    create_bookings_indexes()
+    op.execute(f"insert into bookings ({COLUMNS}) select {COLUMNS} from bookings_old")
+    op.execute("drop table bookings_old")
@@ -1,19 +1,33 @@
-from datetime import date
+from datetime import date, datetime
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import DDL, ForeignKey, ForeignKeyConstraint, Index, event, func
+from sqlalchemy.dialects.postgresql import DATERANGE, ExcludeConstraint, Range
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column
 from src.database import Base
 
 
+BOOKINGS_DEFAULT_PARTITION = "bookings_default"
+
+
 class Booking(Base):
+    """
+    Партиционирована по месяцу заезда (date_from): bookings_y2024m10 -- заезды за октябрь 2024,
+    брони вне созданных партиций попадают в bookings_default (см. BookingPartitionRepository).
+    Поэтому первичный ключ -- (id, date_from): уникальность проверяется внутри партиции.
+    """
+
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_room_id_date_from_date_to", "room_id", "date_from", "date_to"),
+        {"postgresql_partition_by": "RANGE (date_from)"},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     room_id: Mapped[int] = mapped_column(ForeignKey("rooms.id"))
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
 
-    date_from: Mapped[date]
+    date_from: Mapped[date] = mapped_column(primary_key=True, index=True)
     date_to: Mapped[date]
 
     price: Mapped[int]
@@ -21,3 +35,77 @@ class Booking(Base):
     @hybrid_property
     def total_price(self) -> int:
         return self.price * (self.date_to - self.date_from).days
+
+
+# для create_all: без партиций вставка в bookings невозможна; в базе это делает миграция
+event.listen(
+    Booking.__table__,
+    "after_create",
+    DDL(f"CREATE TABLE IF NOT EXISTS {BOOKINGS_DEFAULT_PARTITION} PARTITION OF bookings DEFAULT"),
+)
+
+
+class BookingArchive(Base):
+    """
+    Брони, перенесённые из bookings (BookingRepository.delete_batch(archive=True)).
+    Без внешних ключей: архив переживает удаление номеров и пользователей.
+    """
+
+    __tablename__ = "bookings_archive"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    room_id: Mapped[int]
+    user_id: Mapped[int] = mapped_column(index=True)
+    date_from: Mapped[date]
+    date_to: Mapped[date]
+    price: Mapped[int]
+    archived_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+
+class RoomOccupancy(Base):
+    """
+    Сколько номеров типа {room_id} занято в ночь {day}.
+
+    Бронирование [date_from, date_to) занимает ночи с date_from по date_to - 1 включительно.
+    """
+
+    __tablename__ = "room_occupancy"
+
+    room_id: Mapped[int] = mapped_column(
+        ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(primary_key=True, index=True)
+    booked_count: Mapped[int] = mapped_column(default=0)
+
+
+class RoomUnitBooking(Base):
+    """
+    Какой из quantity одинаковых номеров {room_id} (unit от 1 до rooms.quantity) занимает бронь.
+
+    Исключающее ограничение не даёт двум броням занять один unit в пересекающиеся даты
+    (stay -- [date_from, date_to)), поэтому перебронирование невозможно даже при
+    параллельных транзакциях, без блокировок таблиц. Нужно расширение btree_gist.
+    """
+
+    __tablename__ = "room_unit_bookings"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["booking_id", "booking_date_from"],
+            ["bookings.id", "bookings.date_from"],
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+        ),
+        ExcludeConstraint(
+            ("room_id", "="),
+            ("unit", "="),
+            ("stay", "&&"),
+            name="room_unit_bookings_no_overlap",
+            using="gist",
+        ),
+    )
+
+    booking_id: Mapped[int] = mapped_column(primary_key=True)
+    booking_date_from: Mapped[date] = mapped_column(primary_key=True)
+    room_id: Mapped[int] = mapped_column(ForeignKey("rooms.id"))
+    unit: Mapped[int]
+    stay: Mapped[Range[date]] = mapped_column(DATERANGE)
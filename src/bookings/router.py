@@ -1,20 +1,68 @@
-from fastapi import APIRouter, HTTPException
+from celery.result import AsyncResult
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
 from src.auth.dependencies import GetUserIdDep
-from src.bookings.schemas import BookingCreate, BookingIn
-from src.dependencies import DBDep, PaginatorDep
-
-from src.core.tasks.tasks import send_email_notification_on_booking_creation
-from src.exceptions import ObjectNotFoundException, NoRoomsAvailableException
+from src.config import settings
+from src.bookings.schemas import BookingIn
+from src.dependencies import DBDep, ExportDBDep, PaginatorDep
+
+from src.core.cache_tags import invalidate_hotel_availability
+from src.core.tasks.celery_app import celery_instance
+from src.core.tasks.tasks import purge_bookings, send_email_notification_on_booking_creation
+from src.exceptions import (
+    DateRangeException,
+    InvalidCursorException,
+    NoRoomsAvailableException,
+    RoomNotFoundException,
+)
+from src.httpexceptions import (
+    DateRangeHTTPException,
+    InvalidCursorHTTPException,
+    RoomNotFoundHTTPException,
+)
+from src.repositories.mappers.mappers import BookingDataMapper
+from src.services.bookings import BookingService, get_ended_before
+from src.utils.export import MEDIA_TYPES, ExportFormat, encode_rows
+from src.utils.pagination import make_cursor_page
 
 router = APIRouter(prefix="/bookings", tags=["Бронирования"])
 
 
 @router.get("/")
 async def get_all_bookings(db: DBDep, paginator: PaginatorDep):
-    offset = (paginator.page - 1) * paginator.per_page
-    limit = paginator.per_page
-    return await db.bookings.get_all(limit=limit, offset=offset)
+    if paginator.is_cursor_mode:
+        try:
+            bookings = await db.bookings.get_all(
+                limit=paginator.per_page + 1, after_id=paginator.after_id
+            )
+        except InvalidCursorException:
+            raise InvalidCursorHTTPException
+        return make_cursor_page(bookings, paginator.per_page)
+    return await db.bookings.get_all(limit=paginator.per_page, offset=paginator.offset)
+
+
+@router.get("/export", summary="Выгрузить все бронирования")
+async def export_bookings(
+    db: ExportDBDep,
+    file_format: ExportFormat = Query(default="ndjson", alias="format"),
+):
+    """
+    Все бронирования потоком в NDJSON или CSV, по возрастанию id.
+    Строки читаются серверным курсором пачками, память не растёт с размером выгрузки.
+    """
+    columns = [column.name for column in BookingDataMapper.columns()]
+
+    async def generate():
+        async with db:
+            async for chunk in encode_rows(db.bookings.stream_rows(), columns, file_format):
+                yield chunk
+
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="bookings.{file_format}"'},
+    )
 
 
 @router.get("/me")
@@ -25,31 +73,54 @@ async def get_my_bookings(db: DBDep, user_id: GetUserIdDep):
 @router.post("/")
 async def create_booking(db: DBDep, booking_in: BookingIn, user_id: GetUserIdDep):
     try:
-        room = await db.rooms.get_one(id=booking_in.room_id)
-    except ObjectNotFoundException:
-        return HTTPException(status_code=404, detail="This room doesn't exist")
-
-    _booking_data = BookingCreate(
-        **booking_in.model_dump(),
-        user_id=user_id,
-        price=room.price * (booking_in.date_to - booking_in.date_from).days,
-    )
-    try:
-        ret_booking = await db.bookings.add_booking(booking_data=_booking_data)
+        ret_booking, user_email, hotel_id = await db.bookings.create_booking(
+            booking_in, user_id=user_id
+        )
+    except RoomNotFoundException:
+        raise RoomNotFoundHTTPException
     except NoRoomsAvailableException:
         raise HTTPException(status_code=409, detail="No rooms available")
+    except DateRangeException:
+        raise DateRangeHTTPException
 
     await db.commit()
-    user = await db.auth.get_one_or_none(id=user_id)
+    await invalidate_hotel_availability(hotel_id)
 
-    send_email_notification_on_booking_creation.delay(user.email)  # type: ignore
+    send_email_notification_on_booking_creation.delay(user_email)  # type: ignore
 
     return {"message": "Booking created", "data": ret_booking}
 
 
 @router.delete("/delete_all")
-async def delete_all_bookings(db: DBDep):
-    await db.bookings.delete_all_rows()
-    await db.commit()
-
-    return {"message": "All bookings deleted"}
+async def delete_all_bookings(
+    db: DBDep,
+    older_than_days: int | None = Query(default=None, ge=0),
+    archive: bool = False,
+    background: bool = False,
+):
+    """
+    Удаление пачками с commit после каждой, а не одним delete на всю таблицу.
+    older_than_days -- только закончившиеся раньше, archive -- перенести в bookings_archive.
+    background -- удалить в Celery-задаче purge_bookings, прогресс: GET /bookings/purge/{task_id}.
+    """
+    if background:
+        task = purge_bookings.delay(older_than_days=older_than_days, archive=archive)  # type: ignore
+        return {"message": "Bookings deletion started", "task_id": task.id}
+
+    deleted = await BookingService(db).purge_bookings(
+        ended_before=get_ended_before(older_than_days),
+        archive=archive,
+        batch_size=settings.BOOKINGS_DELETE_BATCH_SIZE,
+    )
+    message = "All bookings deleted" if older_than_days is None else "Bookings deleted"
+    return {"message": message, "deleted": deleted}
+
+
+@router.get("/purge/{task_id}")
+def get_purge_status(task_id: str):
+    result = AsyncResult(task_id, app=celery_instance)
+    if result.failed():
+        return {"state": result.state, "error": str(result.result)}
+    if result.successful():
+        return {"state": result.state, "deleted": result.result}
+    return {"state": result.state, "deleted": (result.info or {}).get("deleted", 0)}
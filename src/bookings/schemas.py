@@ -18,3 +18,11 @@ class BookingInDB(BookingCreate):
     id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class RoomOccupancyInDB(BaseModel):
+    room_id: int
+    day: date
+    booked_count: int
+
+    model_config = ConfigDict(from_attributes=True)
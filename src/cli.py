@@ -0,0 +1,95 @@
+# ruff: noqa: E402
+
+"""
+Служебные команды.
+
+    python -m src.cli rebuild_room_occupancy
+    python -m src.cli maintain_booking_partitions
+    python -m src.cli import_catalog catalog.ndjson [--format csv] [--chunk-size 1000]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.cache_tags import wait_delayed_invalidations
+from src.core.setup import redis_manager
+from src.database import async_session_maker_null_pool
+from src.hotels.schemas import CatalogImportReport
+from src.services.bookings import maintain_booking_partitions as run_partition_maintenance
+from src.services.catalog_import import (
+    IMPORT_CHUNK_SIZE,
+    CatalogFormat,
+    CatalogImportService,
+    guess_catalog_format,
+    read_catalog,
+)
+from src.utils.db_manager import DBManager
+
+
+async def rebuild_room_occupancy():
+    async with DBManager(session_factory=async_session_maker_null_pool) as db:
+        await db.room_occupancy.rebuild()
+        await db.commit()
+    print("room_occupancy rebuilt")
+
+
+async def maintain_booking_partitions():
+    result = await run_partition_maintenance()
+    print("created partitions:", ", ".join(result["created"]) or "-")
+    print("detached partitions:", ", ".join(result["detached"]) or "-")
+
+
+def print_import_progress(report: CatalogImportReport):
+    print(
+        f"{report.hotels} hotels, {report.rooms} rooms, {report.room_facilities} facilities "
+        f"in {report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s)",
+        flush=True,
+    )
+
+
+async def import_catalog(path: Path, file_format: CatalogFormat | None, chunk_size: int):
+    # для инвалидации кеша отелей и свободных номеров
+    await redis_manager.connect()
+    try:
+        with open(path, encoding="utf-8", newline="") as file:
+            async with DBManager(session_factory=async_session_maker_null_pool) as db:
+                report = await CatalogImportService(db).import_catalog(
+                    read_catalog(file, file_format or guess_catalog_format(path.name)),
+                    chunk_size=chunk_size,
+                    on_progress=print_import_progress,
+                )
+    finally:
+        await wait_delayed_invalidations()
+        await redis_manager.close()
+    print("catalog imported:", end=" ")
+    print_import_progress(report)
+
+
+COMMANDS = {
+    "rebuild_room_occupancy": rebuild_room_occupancy,
+    "import_catalog": import_catalog,
+    "maintain_booking_partitions": maintain_booking_partitions,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Booking service commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild_room_occupancy")
+    subparsers.add_parser("maintain_booking_partitions")
+    import_parser = subparsers.add_parser("import_catalog", help="NDJSON/CSV с отелями и номерами")
+    import_parser.add_argument("path", type=Path)
+    import_parser.add_argument("--format", dest="file_format", choices=["ndjson", "csv"])
+    import_parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = vars(parser.parse_args())
+
+    command = args.pop("command")
+    asyncio.run(COMMANDS[command](**args))
+
+
+if __name__ == "__main__":
+    main()
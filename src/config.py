@@ -11,14 +11,61 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASS: str
     DB_PORT: int
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30  # seconds
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP: int = 5  # соединений, открываемых при старте
+    DB_STATEMENT_CACHE_SIZE: int = 100  # кеш prepared statements asyncpg на соединение
+    # реплики для читающих ручек: '["replica-1", "replica-2:5433"]', пусто -- читаем с primary
+    DB_REPLICA_HOSTS: list[str] = []
+    DB_REPLICA_SELECTION: Literal["round_robin", "least_connections"] = "round_robin"
+    # через сколько после commit теги кеша инвалидируются повторно (см. cache_tags)
+    DB_REPLICA_MAX_LAG: float = 2  # seconds, 0 -- не повторять
+    # statement_timeout для read-only ручек: обычные чтения и тяжёлый поиск по датам
+    DB_READ_STATEMENT_TIMEOUT: int = 2000  # ms
+    DB_SEARCH_STATEMENT_TIMEOUT: int = 5000  # ms
 
     REDIS_HOST: str
     REDIS_PORT: int
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5  # seconds
+    REDIS_SOCKET_TIMEOUT: float = 2  # seconds
+    REDIS_CONNECT_TIMEOUT: float = 2  # seconds
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # seconds
+    REDIS_RETRIES: int = 3
+    LOCAL_CACHE_TTL: int = 30  # seconds, 0 -- без L1 перед Redis
+    LOCAL_CACHE_MAX_SIZE: int = 10_000
+    # orjson/msgpack и zstd/lz4 требуют одноимённых пакетов (zstandard, lz4)
+    CACHE_SERIALIZER: Literal["json", "orjson", "msgpack"] = "json"
+    CACHE_COMPRESSION: Literal["none", "zstd", "lz4"] = "none"
+    CACHE_COMPRESS_MIN_SIZE: int = 1024  # bytes
+
+    AVAILABILITY_ENGINE: Literal["sql", "interval_index", "occupancy_matrix"] = "sql"
+    AVAILABILITY_INDEX_MAX_AGE: int = 60  # seconds
+    AVAILABILITY_MATRIX_DAYS: int = 730
+
+    # ночная задача переносит в bookings_archive брони, закончившиеся больше N дней назад,
+    # 0 -- не переносить
+    BOOKINGS_ARCHIVE_AFTER_DAYS: int = 0
+    BOOKINGS_DELETE_BATCH_SIZE: int = 5000
+    # помесячные партиции bookings: сколько месяцев создавать заранее и сколько хранить,
+    # 0 -- не отсоединять; старые партиции переносятся в bookings_archive или остаются таблицами
+    BOOKINGS_PARTITION_MONTHS_AHEAD: int = 6
+    BOOKINGS_PARTITION_RETENTION_MONTHS: int = 0
+    BOOKINGS_PARTITION_ARCHIVE: bool = True
+    # длиннее бронировать нельзя; позволяет ограничить date_from снизу и отсечь старые партиции
+    BOOKING_MAX_NIGHTS: int = 365
 
     @property
     def DB_URL(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    def get_replica_db_url(self, replica_host: str) -> str:
+        host, _, port = replica_host.partition(":")
+        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{host}:{port or self.DB_PORT}/{self.DB_NAME}"
+
     @property
     def REDIS_URL(self):
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}"
@@ -0,0 +1,57 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class LocalCache:
+    """LRU с TTL в памяти процесса (L1 перед Redis)"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        # растёт при каждой инвалидации: значение, прочитанное из Redis до неё, класть нельзя
+        self.generation = 0
+
+    def get_with_ttl(self, key: str) -> tuple[float, Any] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        ttl = expires_at - time.monotonic()
+        if ttl <= 0:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return ttl, value
+
+    def get(self, key: str) -> Any | None:
+        entry = self.get_with_ttl(key)
+        return entry[1] if entry is not None else None
+
+    def set(
+        self, key: str, value: Any, ttl: float | None = None, generation: int | None = None
+    ) -> None:
+        """
+        ttl не больше собственного ttl кеша: L1 не должен переживать запись в Redis.
+        generation -- self.generation на момент чтения value из Redis.
+        """
+        if generation is not None and generation != self.generation:
+            return
+        ttl = min(ttl, self.ttl) if ttl else self.ttl
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        self.generation += 1
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,32 +1,227 @@
+import asyncio
+from typing import Mapping
+
 import redis.asyncio as redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
 
 import logging
 
+from src.connectors.local_cache import LocalCache
+
+# удаляет ключ, только если в нём всё ещё наше значение (чужую блокировку не трогаем)
+DELETE_IF_EQUALS_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# сюда публикуются изменённые ключи, чтобы все воркеры выкинули их из L1
+INVALIDATION_CHANNEL = "cache-invalidation"
+RESUBSCRIBE_DELAY = 1  # seconds
+INVALIDATION_POLL_TIMEOUT = 1  # seconds
+
 
 class RedisConnector:
+    """
+    Если передан local_cache, get/mget сначала смотрят в L1 в памяти процесса.
+    set/incr/delete публикуют ключ в INVALIDATION_CHANNEL, и каждый воркер удаляет его из L1.
+    """
+
     _redis: redis.Redis
 
-    def __init__(self, host: str, port: int):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        local_cache: LocalCache | None = None,
+        max_connections: int = 50,
+        pool_timeout: float = 5,
+        socket_timeout: float = 2,
+        socket_connect_timeout: float = 2,
+        health_check_interval: int = 30,
+        retries: int = 3,
+        backoff_base: float = 0.01,
+        backoff_cap: float = 0.5,
+    ):
+        """
+        max_connections -- размер пула; при исчерпании запрос ждёт свободное соединение
+        не дольше pool_timeout, а не открывает новое.
+        retries -- повторы при ConnectionError/TimeoutError с экспоненциальной задержкой.
+        """
         self.host = host
         self.port = port
+        self.local_cache = local_cache
+        self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
+        self.socket_timeout = socket_timeout
+        self.socket_connect_timeout = socket_connect_timeout
+        self.health_check_interval = health_check_interval
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._listener: asyncio.Task | None = None
 
     async def connect(self):
         logging.info(f"Connecting to Redis at {self.host}:{self.port}")
-        self._redis = await redis.Redis(host=self.host, port=self.port)
+        pool = redis.BlockingConnectionPool(
+            host=self.host,
+            port=self.port,
+            max_connections=self.max_connections,
+            timeout=self.pool_timeout,  # type: ignore
+            socket_timeout=self.socket_timeout,
+            socket_connect_timeout=self.socket_connect_timeout,
+            health_check_interval=self.health_check_interval,
+            retry=Retry(
+                ExponentialBackoff(cap=self.backoff_cap, base=self.backoff_base), self.retries
+            ),
+            retry_on_error=[ConnectionError, TimeoutError],
+        )
+        self._redis = redis.Redis(connection_pool=pool)
+        await self._redis.ping()
         logging.info(f"Successfully connected to Redis at {self.host}:{self.port}")
+        if self.local_cache is not None:
+            self._listener = asyncio.create_task(self._listen_invalidations())
+
+    async def _listen_invalidations(self):
+        local_cache = self.local_cache
+        assert local_cache is not None
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # пока не были подписаны, сообщения могли потеряться
+                local_cache.clear()
+                while True:
+                    # с таймаутом, а не listen(): блокирующее чтение упёрлось бы в socket_timeout
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=INVALIDATION_POLL_TIMEOUT
+                    )
+                    if message is not None:
+                        local_cache.delete(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.warning("Lost Redis invalidation channel, resubscribing", exc_info=True)
+                local_cache.clear()
+                await asyncio.sleep(RESUBSCRIBE_DELAY)
+            finally:
+                await pubsub.aclose()
+
+    def _publish_invalidation(self, pipe, *keys: str):
+        if self.local_cache is not None:
+            for key in keys:
+                pipe.publish(INVALIDATION_CHANNEL, key)
+
+    def _invalidate_local(self, *keys: str):
+        # после записи в Redis: значение, прочитанное до неё, уже не попадёт в L1
+        if self.local_cache is not None:
+            self.local_cache.delete(*keys)
+
+    def pipeline(self, transaction: bool = False):
+        """
+        Пачка команд за один round trip:
+
+            async with redis_manager.pipeline() as pipe:
+                pipe.get("a").incr("b")
+                a, b = await pipe.execute()
 
-    async def set(self, key: str, value: str, exp: int | None = None):
-        if exp:
-            await self._redis.set(key, value, exp)
-        else:
-            await self._redis.set(key, value)
+        Запись через pipeline идёт мимо L1, для кешируемых ключей используйте set/mset/delete.
+        """
+        return self._redis.pipeline(transaction=transaction)
+
+    async def set(self, key: str, value: str | bytes, exp: int | None = None):
+        async with self.pipeline() as pipe:
+            if exp:
+                pipe.set(key, value, exp)
+            else:
+                pipe.set(key, value)
+            self._publish_invalidation(pipe, key)
+            await pipe.execute()
+        self._invalidate_local(key)
 
     async def get(self, key: str):
-        return await self._redis.get(key)
+        if self.local_cache is None:
+            return await self._redis.get(key)
+        _, value = await self.get_with_ttl(key)
+        return value
+
+    async def get_with_ttl(self, key: str) -> tuple[int, bytes | None]:
+        """Для fastapi-cache: оставшийся TTL в секундах и значение"""
+        generation = None
+        if self.local_cache is not None:
+            entry = self.local_cache.get_with_ttl(key)
+            if entry is not None:
+                ttl, value = entry
+                return int(ttl), value
+            generation = self.local_cache.generation
+        async with self.pipeline() as pipe:
+            value, ttl_ms = await pipe.get(key).pttl(key).execute()
+        if value is not None and self.local_cache is not None:
+            ttl = ttl_ms / 1000 if ttl_ms > 0 else None
+            self.local_cache.set(key, value, ttl=ttl, generation=generation)
+        return max(ttl_ms // 1000, 0), value
+
+    async def mget(self, keys: list[str]):
+        if self.local_cache is None:
+            return await self._redis.mget(keys)
+
+        values = [self.local_cache.get(key) for key in keys]
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if missing:
+            generation = self.local_cache.generation
+            fetched = dict(zip(missing, await self._redis.mget(missing)))
+            for key, value in fetched.items():
+                if value is not None:
+                    self.local_cache.set(key, value, generation=generation)
+            values = [fetched[key] if value is None else value for key, value in zip(keys, values)]
+        return values
+
+    async def mset(
+        self, mapping: Mapping[str, str | bytes], exp: int | Mapping[str, int] | None = None
+    ):
+        """exp -- общий TTL или TTL для каждого ключа"""
+        async with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                key_exp = exp.get(key) if isinstance(exp, Mapping) else exp
+                if key_exp:
+                    pipe.set(key, value, key_exp)
+                else:
+                    pipe.set(key, value)
+            self._publish_invalidation(pipe, *mapping)
+            await pipe.execute()
+        self._invalidate_local(*mapping)
+
+    async def incr(self, *keys: str):
+        async with self.pipeline() as pipe:
+            for key in keys:
+                pipe.incr(key)
+            self._publish_invalidation(pipe, *keys)
+            results = await pipe.execute()
+        self._invalidate_local(*keys)
+        return results[: len(keys)]
 
     async def delete(self, key):
-        await self._redis.delete(key)
+        async with self.pipeline() as pipe:
+            pipe.delete(key)
+            self._publish_invalidation(pipe, key)
+            await pipe.execute()
+        self._invalidate_local(key)
+
+    async def set_nx(self, key: str, value: str, exp_ms: int) -> bool:
+        return bool(await self._redis.set(key, value, px=exp_ms, nx=True))
+
+    async def delete_if_equals(self, key: str, value: str) -> bool:
+        return bool(await self._redis.eval(DELETE_IF_EQUALS_SCRIPT, 1, key, value))  # type: ignore
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self._redis.exists(key))
 
     async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
         if self._redis:
-            await self._redis.aclose()
+            await self._redis.aclose(close_connection_pool=True)
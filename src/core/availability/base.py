@@ -0,0 +1,176 @@
+import abc
+import asyncio
+import contextlib
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+AVAILABILITY_CHANGES_KEY = "availability_changes"
+# пауза после неудачной перезагрузки движка: удваивается до RELOAD_RETRY_MAX_DELAY
+RELOAD_RETRY_DELAY = 1  # seconds
+RELOAD_RETRY_MAX_DELAY = 60  # seconds
+
+
+@dataclass(frozen=True)
+class OccupancyChange:
+    room_id: int
+    date_from: date
+    date_to: date
+    delta: int  # +1 - бронь добавлена, -1 - бронь удалена
+
+
+@dataclass
+class AvailabilityChanges:
+    """
+    Изменения занятости, накопленные в рамках одной транзакции.
+
+    Применяются к движку доступности только после успешного commit.
+    """
+
+    occupancy: list[OccupancyChange] = field(default_factory=list)
+    bookings_cleared: bool = False
+    invalidated: bool = False
+
+    def booking_added(self, room_id: int, date_from: date, date_to: date) -> None:
+        self.occupancy.append(OccupancyChange(room_id, date_from, date_to, 1))
+
+    def booking_removed(self, room_id: int, date_from: date, date_to: date) -> None:
+        self.occupancy.append(OccupancyChange(room_id, date_from, date_to, -1))
+
+    def all_bookings_removed(self) -> None:
+        self.occupancy.clear()
+        self.bookings_cleared = True
+
+    def invalidate(self) -> None:
+        self.invalidated = True
+
+
+def get_pending_changes(session: AsyncSession) -> AvailabilityChanges:
+    return session.info.setdefault(AVAILABILITY_CHANGES_KEY, AvailabilityChanges())
+
+
+def pop_pending_changes(session: AsyncSession) -> AvailabilityChanges | None:
+    return session.info.pop(AVAILABILITY_CHANGES_KEY, None)
+
+
+class AvailabilityEngine:
+    """
+    Движок доступности по умолчанию: ничего не хранит и всегда возвращает None,
+    то есть вызывающий код считает доступность SQL-запросом по room_occupancy.
+    """
+
+    name = "sql"
+
+    async def start(self, session_factory: async_sessionmaker) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def apply(self, changes: AvailabilityChanges) -> None:
+        pass
+
+    def get_available_rooms_ids(
+        self, date_from: date, date_to: date, hotel_id: int | None = None
+    ) -> list[int] | None:
+        return None
+
+    def get_available_hotels_ids(self, date_from: date, date_to: date) -> list[int] | None:
+        return None
+
+
+class InMemoryAvailabilityEngine(AvailabilityEngine, abc.ABC):
+    """
+    Общая часть движков, которые держат занятость в памяти воркера.
+
+    Загружаются из БД при старте, обновляются изменениями, закоммиченными этим воркером,
+    и периодически перезагружаются, чтобы подхватить записи других воркеров.
+    Пока движок не загружен, инвалидирован или старше max_age секунд,
+    методы возвращают None и запросы идут в SQL.
+    """
+
+    def __init__(self, max_age: int = 60):
+        self.max_age = max_age
+        self._loaded_at: float | None = None
+        self._invalidated = asyncio.Event()
+        self._reloading = False
+        self._changed_during_reload = False
+        self._refresh_task: asyncio.Task | None = None
+
+    async def start(self, session_factory: async_sessionmaker) -> None:
+        await self.load(session_factory)
+        self._refresh_task = asyncio.create_task(self._refresh_loop(session_factory))
+
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresh_task
+            self._refresh_task = None
+
+    async def load(self, session_factory: async_sessionmaker) -> None:
+        started = time.monotonic()
+        self._reloading = True
+        self._changed_during_reload = False
+        try:
+            async with session_factory() as session:
+                summary = await self._load(session)
+        finally:
+            self._reloading = False
+
+        self._loaded_at = time.monotonic()
+        if self._changed_during_reload:
+            # снапшот мог не увидеть наши же коммиты, сделанные во время загрузки
+            self._invalidated.set()
+        else:
+            self._invalidated.clear()
+        logging.info(f"{self.name} loaded: {summary} in {time.monotonic() - started:.2f}s")
+
+    async def _refresh_loop(self, session_factory: async_sessionmaker) -> None:
+        retry_delay = RELOAD_RETRY_DELAY
+        while True:
+            try:
+                await asyncio.wait_for(self._invalidated.wait(), timeout=self.max_age / 2)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.load(session_factory)
+                retry_delay = RELOAD_RETRY_DELAY
+            except Exception as exc:
+                logging.error(f"Error while reloading {self.name}: {exc}")
+                # при инвалидированном движке wait_for вернулся бы сразу и нагружал БД
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, RELOAD_RETRY_MAX_DELAY)
+
+    def is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and not self._invalidated.is_set()
+            and time.monotonic() - self._loaded_at < self.max_age
+        )
+
+    def apply(self, changes: AvailabilityChanges) -> None:
+        if self._reloading:
+            self._changed_during_reload = True
+        if changes.invalidated:
+            self._invalidated.set()
+            return
+        if changes.bookings_cleared:
+            self._clear_bookings()
+        for change in changes.occupancy:
+            if not self._apply_change(change):
+                self._invalidated.set()
+
+    @abc.abstractmethod
+    async def _load(self, session: AsyncSession) -> str:
+        """Строит структуру заново и подменяет текущую, возвращает краткую сводку для лога"""
+
+    @abc.abstractmethod
+    def _clear_bookings(self) -> None: ...
+
+    @abc.abstractmethod
+    def _apply_change(self, change: OccupancyChange) -> bool:
+        """Возвращает False, если изменение не удалось применить и движок устарел"""
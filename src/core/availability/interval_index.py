@@ -0,0 +1,158 @@
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.bookings.models import Booking
+from src.config import settings
+from src.core.availability.base import InMemoryAvailabilityEngine, OccupancyChange
+from src.rooms.models import Room
+
+
+@dataclass
+class RoomIntervals:
+    """
+    Бронирования одного номера как два отсортированных массива границ (в ordinal-днях).
+
+    Занятость в ночь d = (число заездов <= d) - (число выездов <= d).
+    """
+
+    hotel_id: int
+    quantity: int
+    starts: list[int] = field(default_factory=list)
+    ends: list[int] = field(default_factory=list)
+
+    def occupancy(self, day: int) -> int:
+        return bisect_right(self.starts, day) - bisect_right(self.ends, day)
+
+    def max_occupancy(self, day_from: int, day_to: int) -> int:
+        """Максимальная занятость по ночам [day_from, day_to)"""
+        best = self.occupancy(day_from)
+        # занятость растёт только в дни заездов, поэтому достаточно проверить их
+        first = bisect_right(self.starts, day_from)
+        last = bisect_left(self.starts, day_to)
+        for i in range(first, last):
+            best = max(best, self.occupancy(self.starts[i]))
+        return best
+
+    def add(self, day_from: int, day_to: int) -> None:
+        insort(self.starts, day_from)
+        insort(self.ends, day_to)
+
+    def remove(self, day_from: int, day_to: int) -> bool:
+        i = bisect_left(self.starts, day_from)
+        j = bisect_left(self.ends, day_to)
+        if (
+            i == len(self.starts)
+            or self.starts[i] != day_from
+            or j == len(self.ends)
+            or self.ends[j] != day_to
+        ):
+            return False
+        del self.starts[i]
+        del self.ends[j]
+        return True
+
+
+class IntervalIndexEngine(InMemoryAvailabilityEngine):
+    """
+    In-memory индекс занятости: по два отсортированных массива границ на номер.
+
+    Загружаются только брони, не закончившиеся к моменту загрузки,
+    поэтому окна, начинающиеся раньше, считаются в SQL.
+    """
+
+    name = "interval_index"
+
+    def __init__(self, max_age: int = 60):
+        super().__init__(max_age=max_age)
+        self._rooms: dict[int, RoomIntervals] = {}
+        self._hotels: dict[int, list[int]] = {}
+        self._horizon: int = 0
+
+    async def _load(self, session: AsyncSession) -> str:
+        horizon = date.today().toordinal()
+        rooms: dict[int, RoomIntervals] = {}
+        hotels: dict[int, list[int]] = {}
+
+        result = await session.execute(select(Room.id, Room.hotel_id, Room.quantity))
+        for room_id, hotel_id, quantity in result.all():
+            rooms[room_id] = RoomIntervals(hotel_id=hotel_id, quantity=quantity)
+            hotels.setdefault(hotel_id, []).append(room_id)
+
+        query = (
+            select(Booking.room_id, Booking.date_from, Booking.date_to)
+            .filter(
+                Booking.date_to > date.fromordinal(horizon),
+                # лишнее условие для отсечения старых партиций bookings
+                Booking.date_from > date.fromordinal(horizon - settings.BOOKING_MAX_NIGHTS),
+            )
+            .execution_options(yield_per=10_000)
+        )
+        bookings = await session.stream(query)
+        num_of_bookings = 0
+        async for partition in bookings.partitions():
+            for room_id, date_from, date_to in partition:
+                room = rooms.get(room_id)
+                if room is None:
+                    continue
+                room.starts.append(date_from.toordinal())
+                room.ends.append(date_to.toordinal())
+                num_of_bookings += 1
+
+        for room in rooms.values():
+            room.starts.sort()
+            room.ends.sort()
+
+        self._rooms, self._hotels, self._horizon = rooms, hotels, horizon
+        return f"{len(rooms)} rooms, {num_of_bookings} bookings"
+
+    def _clear_bookings(self) -> None:
+        for room in self._rooms.values():
+            room.starts.clear()
+            room.ends.clear()
+
+    def _apply_change(self, change: OccupancyChange) -> bool:
+        if change.date_to.toordinal() <= self._horizon:
+            return True
+        room = self._rooms.get(change.room_id)
+        if room is None:
+            return False
+        day_from, day_to = change.date_from.toordinal(), change.date_to.toordinal()
+        if change.delta > 0:
+            room.add(day_from, day_to)
+            return True
+        return room.remove(day_from, day_to)
+
+    def _covers(self, date_from: date) -> bool:
+        return self.is_fresh() and date_from.toordinal() >= self._horizon
+
+    def _is_available(self, room: RoomIntervals, day_from: int, day_to: int) -> bool:
+        return room.quantity - room.max_occupancy(day_from, day_to) > 0
+
+    def get_available_rooms_ids(
+        self, date_from: date, date_to: date, hotel_id: int | None = None
+    ) -> list[int] | None:
+        if not self._covers(date_from):
+            return None
+        day_from, day_to = date_from.toordinal(), date_to.toordinal()
+        rooms_ids = self._hotels.get(hotel_id, []) if hotel_id is not None else self._rooms
+        return [
+            room_id
+            for room_id in rooms_ids
+            if self._is_available(self._rooms[room_id], day_from, day_to)
+        ]
+
+    def get_available_hotels_ids(self, date_from: date, date_to: date) -> list[int] | None:
+        if not self._covers(date_from):
+            return None
+        day_from, day_to = date_from.toordinal(), date_to.toordinal()
+        return [
+            hotel_id
+            for hotel_id, rooms_ids in self._hotels.items()
+            if any(
+                self._is_available(self._rooms[room_id], day_from, day_to) for room_id in rooms_ids
+            )
+        ]
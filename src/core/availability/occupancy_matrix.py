@@ -0,0 +1,140 @@
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.bookings.models import Booking
+from src.config import settings
+from src.core.availability.base import InMemoryAvailabilityEngine, OccupancyChange
+from src.rooms.models import Room
+
+
+class OccupancyMatrixEngine(InMemoryAvailabilityEngine):
+    """
+    Векторизованный движок: матрица занятости номера × ночи (int16) на days ночей вперёд.
+
+    Строки отсортированы по (hotel_id, room_id), поэтому доступность по всем отелям
+    считается одним проходом: quantity - max(занятость за окно) по строкам
+    и np.maximum.reduceat по границам отелей.
+    """
+
+    name = "occupancy_matrix"
+
+    def __init__(self, max_age: int = 60, days: int = 730):
+        super().__init__(max_age=max_age)
+        self.days = days
+        self._first_day: int = 0
+        self._rooms_ids = np.empty(0, dtype=np.int64)
+        self._rows: dict[int, int] = {}
+        self._quantity = np.empty(0, dtype=np.int16)
+        self._occupancy = np.zeros((0, days), dtype=np.int16)
+        self._hotels_ids = np.empty(0, dtype=np.int64)
+        self._hotels_starts = np.empty(0, dtype=np.intp)
+
+    async def _load(self, session: AsyncSession) -> str:
+        first_day = date.today().toordinal()
+        last_day = first_day + self.days
+
+        result = await session.execute(
+            select(Room.id, Room.hotel_id, Room.quantity).order_by(Room.hotel_id, Room.id)
+        )
+        rooms = np.array(result.all(), dtype=np.int64).reshape(-1, 3)
+        rooms_ids, rooms_hotels_ids, quantity = rooms[:, 0], rooms[:, 1], rooms[:, 2]
+        rows = {int(room_id): row for row, room_id in enumerate(rooms_ids)}
+
+        query = (
+            select(Booking.room_id, Booking.date_from, Booking.date_to)
+            .filter(
+                Booking.date_to > date.fromordinal(first_day),
+                Booking.date_from < date.fromordinal(last_day),
+                # лишнее условие для отсечения старых партиций bookings
+                Booking.date_from > date.fromordinal(first_day - settings.BOOKING_MAX_NIGHTS),
+            )
+            .execution_options(yield_per=10_000)
+        )
+        # разностный массив: +1 в ночь заезда, -1 в день выезда, затем cumsum по дням
+        diff = np.zeros((len(rooms_ids), self.days + 1), dtype=np.int32)
+        num_of_bookings = 0
+        bookings = await session.stream(query)
+        async for partition in bookings.partitions():
+            chunk = [
+                (rows[room_id], date_from.toordinal(), date_to.toordinal())
+                for room_id, date_from, date_to in partition
+                if room_id in rows
+            ]
+            if not chunk:
+                continue
+            booked = np.array(chunk, dtype=np.int64)
+            starts = np.clip(booked[:, 1] - first_day, 0, self.days)
+            ends = np.clip(booked[:, 2] - first_day, 0, self.days)
+            np.add.at(diff, (booked[:, 0], starts), 1)
+            np.add.at(diff, (booked[:, 0], ends), -1)
+            num_of_bookings += len(chunk)
+
+        if len(rooms_hotels_ids):
+            hotels_starts = np.flatnonzero(np.diff(rooms_hotels_ids, prepend=-1))
+        else:
+            hotels_starts = np.empty(0, dtype=np.intp)
+
+        self._first_day = first_day
+        self._rooms_ids = rooms_ids
+        self._rows = rows
+        self._quantity = quantity.astype(np.int16)
+        self._occupancy = np.cumsum(diff[:, :-1], axis=1).astype(np.int16)
+        self._hotels_ids = rooms_hotels_ids[hotels_starts]
+        self._hotels_starts = hotels_starts
+        return f"{len(rooms_ids)} rooms x {self.days} days, {num_of_bookings} bookings"
+
+    def _clear_bookings(self) -> None:
+        self._occupancy[:] = 0
+
+    def _apply_change(self, change: OccupancyChange) -> bool:
+        row = self._rows.get(change.room_id)
+        if row is None:
+            return False
+        start = max(change.date_from.toordinal() - self._first_day, 0)
+        end = min(change.date_to.toordinal() - self._first_day, self.days)
+        if start < end:
+            self._occupancy[row, start:end] += change.delta
+        return True
+
+    def _window(self, date_from: date, date_to: date) -> tuple[int, int] | None:
+        start = date_from.toordinal() - self._first_day
+        end = date_to.toordinal() - self._first_day
+        if not self.is_fresh() or start < 0 or end > self.days or start >= end:
+            return None
+        return start, end
+
+    def _free_rooms(self, start: int, end: int, rows: slice = slice(None)) -> np.ndarray:
+        return self._quantity[rows] - self._occupancy[rows, start:end].max(axis=1)
+
+    def _hotel_rows(self, hotel_id: int) -> slice | None:
+        hotel = int(np.searchsorted(self._hotels_ids, hotel_id))
+        if hotel == len(self._hotels_ids) or self._hotels_ids[hotel] != hotel_id:
+            return None
+        if hotel + 1 < len(self._hotels_starts):
+            return slice(self._hotels_starts[hotel], self._hotels_starts[hotel + 1])
+        return slice(self._hotels_starts[hotel], len(self._rooms_ids))
+
+    def get_available_rooms_ids(
+        self, date_from: date, date_to: date, hotel_id: int | None = None
+    ) -> list[int] | None:
+        window = self._window(date_from, date_to)
+        if window is None:
+            return None
+        rows = slice(None)
+        if hotel_id is not None:
+            rows = self._hotel_rows(hotel_id)
+            if rows is None:
+                return []
+        return self._rooms_ids[rows][self._free_rooms(*window, rows=rows) > 0].tolist()
+
+    def get_available_hotels_ids(self, date_from: date, date_to: date) -> list[int] | None:
+        window = self._window(date_from, date_to)
+        if window is None:
+            return None
+        if not len(self._rooms_ids):
+            return []
+        max_free = np.maximum.reduceat(self._free_rooms(*window), self._hotels_starts)
+        return self._hotels_ids[max_free > 0].tolist()
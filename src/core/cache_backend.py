@@ -0,0 +1,29 @@
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.types import Backend
+
+from src.connectors.redis_connector import RedisConnector
+
+
+class RedisConnectorBackend(Backend):
+    """Бэкенд fastapi-cache поверх RedisConnector, чтобы ответы ручек тоже читались через L1"""
+
+    def __init__(self, connector: RedisConnector):
+        self.connector = connector
+
+    async def get_with_ttl(self, key: str) -> tuple[int, bytes | None]:
+        return await self.connector.get_with_ttl(key)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.connector.get(key)
+
+    async def set(self, key: str, value: bytes, expire: int | None = None) -> None:
+        await self.connector.set(key, value, expire)
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        if key:
+            await self.connector.delete(key)
+            return 1
+        # по namespace чистит штатный бэкенд (KEYS), L1 проще сбросить целиком
+        if self.connector.local_cache is not None:
+            self.connector.local_cache.clear()
+        return await RedisBackend(self.connector._redis).clear(namespace)
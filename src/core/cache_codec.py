@@ -0,0 +1,95 @@
+"""
+Кодеки значений кеша: сериализация через pydantic TypeAdapter и сжатие больших значений.
+
+Формат записи: 2 байта заголовка (сериализатор, сжатие) + тело. Заголовок делает запись
+самоописываемой, поэтому после смены настроек старые записи читаются как раньше.
+orjson, msgpack, zstandard и lz4 закреплены в requirements.txt, но импортируются только
+при выборе соответствующего кодека.
+"""
+
+import importlib
+from functools import lru_cache
+from typing import Any, Callable, Literal
+
+from pydantic import TypeAdapter
+
+Serializer = Literal["json", "orjson", "msgpack"]
+Compression = Literal["none", "zstd", "lz4"]
+
+SERIALIZER_HEADERS: dict[Serializer, bytes] = {"json": b"j", "orjson": b"o", "msgpack": b"m"}
+COMPRESSION_HEADERS: dict[Compression, bytes] = {"none": b"-", "zstd": b"z", "lz4": b"l"}
+SERIALIZERS_BY_HEADER = {header: name for name, header in SERIALIZER_HEADERS.items()}
+COMPRESSIONS_BY_HEADER = {header: name for name, header in COMPRESSION_HEADERS.items()}
+
+
+def import_optional(module: str, codec: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError as exc:
+        raise ImportError(f"Для кодека кеша {codec!r} установите пакет {module}") from exc
+
+
+@lru_cache
+def get_serializer(serializer: Serializer) -> tuple[Callable, Callable]:
+    """(dumps(value, adapter) -> bytes, loads(data, adapter) -> value)"""
+    if serializer == "orjson":
+        orjson = import_optional("orjson", serializer)
+        return (
+            lambda value, adapter: orjson.dumps(adapter.dump_python(value, mode="json")),
+            lambda data, adapter: adapter.validate_python(orjson.loads(data)),
+        )
+    if serializer == "msgpack":
+        msgpack = import_optional("msgpack", serializer)
+        return (
+            lambda value, adapter: msgpack.packb(adapter.dump_python(value, mode="json")),
+            lambda data, adapter: adapter.validate_python(msgpack.unpackb(data)),
+        )
+    # JSON из pydantic-core: без промежуточных dict и без лишних зависимостей
+    return (
+        lambda value, adapter: adapter.dump_json(value),
+        lambda data, adapter: adapter.validate_json(data),
+    )
+
+
+@lru_cache
+def get_compressor(compression: Compression) -> tuple[Callable, Callable]:
+    """(compress, decompress)"""
+    if compression == "zstd":
+        zstandard = import_optional("zstandard", compression)
+        return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+    if compression == "lz4":
+        lz4_frame = import_optional("lz4.frame", compression)
+        return lz4_frame.compress, lz4_frame.decompress
+    return bytes, bytes
+
+
+class CacheCodec:
+    def __init__(
+        self,
+        serializer: Serializer = "json",
+        compression: Compression = "none",
+        compress_min_size: int = 1024,
+    ):
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_min_size = compress_min_size
+        self._dumps, _ = get_serializer(serializer)
+        self._compress, _ = get_compressor(compression)
+
+    def encode(self, value: Any, adapter: TypeAdapter) -> bytes:
+        body = self._dumps(value, adapter)
+        compression = self.compression
+        if len(body) < self.compress_min_size:
+            compression = "none"
+        else:
+            body = self._compress(body)
+        return SERIALIZER_HEADERS[self.serializer] + COMPRESSION_HEADERS[compression] + body
+
+    def decode(self, data: bytes, adapter: TypeAdapter) -> Any:
+        serializer = SERIALIZERS_BY_HEADER.get(data[:1])
+        compression = COMPRESSIONS_BY_HEADER.get(data[1:2])
+        if serializer is None or compression is None:
+            raise ValueError(f"Неизвестный заголовок записи кеша: {data[:2]!r}")
+        _, loads = get_serializer(serializer)
+        _, decompress = get_compressor(compression)
+        return loads(decompress(data[2:]), adapter)
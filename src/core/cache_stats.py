@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from collections import Counter, defaultdict
+
+# ключи кеша включают параметры запроса, поэтому число отслеживаемых ключей ограничено
+MAX_TRACKED_KEYS = 10_000
+OTHER_KEYS = "__other__"
+
+CACHE_STATS_LOG_INTERVAL = 5 * 60
+CACHE_STATS_LOG_TOP = 20
+
+
+class CacheStats:
+    """Счётчики hit / miss / stale по ключам кеша в пределах процесса"""
+
+    def __init__(self, max_tracked_keys: int = MAX_TRACKED_KEYS):
+        self.max_tracked_keys = max_tracked_keys
+        self._counters: defaultdict[str, Counter[str]] = defaultdict(Counter)
+
+    def record(self, key: str, outcome: str) -> None:
+        if key not in self._counters and len(self._counters) >= self.max_tracked_keys:
+            key = OTHER_KEYS
+        self._counters[key][outcome] += 1
+
+    def hit(self, key: str) -> None:
+        self.record(key, "hit")
+
+    def miss(self, key: str) -> None:
+        self.record(key, "miss")
+
+    def stale(self, key: str) -> None:
+        self.record(key, "stale")
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        return {key: dict(counter) for key, counter in self._counters.items()}
+
+    def top(self, limit: int) -> dict[str, dict[str, int]]:
+        """limit самых запрашиваемых ключей"""
+        keys = sorted(self._counters, key=lambda key: -self._counters[key].total())[:limit]
+        return {key: dict(self._counters[key]) for key in keys}
+
+    def reset(self) -> None:
+        self._counters.clear()
+
+
+cache_stats = CacheStats()
+
+
+async def log_cache_stats(interval: float = CACHE_STATS_LOG_INTERVAL) -> None:
+    """Раз в interval секунд пишет в лог счётчики самых запрашиваемых ключей процесса"""
+    while True:
+        await asyncio.sleep(interval)
+        if stats := cache_stats.top(CACHE_STATS_LOG_TOP):
+            logging.info(f"Cache stats: {stats}")
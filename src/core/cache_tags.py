@@ -0,0 +1,130 @@
+"""
+Тегированная инвалидация кеша.
+
+У каждого тега есть счётчик версии в Redis (cache-tag:{tag}). Версии тегов входят в ключ
+закешированного ответа, поэтому INCR тега после commit делает все старые ключи недостижимыми,
+а сами записи дотухают по TTL. Не нужны ни KEYS/SCAN, ни список ключей по тегу.
+
+Шаблоны тегов подставляются из аргументов ручки: "hotel:{hotel_id}" -> "hotel:42".
+
+Кешируемые ручки читают с реплик. Промах кеша сразу после commit может прочитать
+отстающую реплику и сохранить старые данные уже под новой версией тега, поэтому
+при DB_REPLICA_HOSTS теги повторно инвалидируются через DB_REPLICA_MAX_LAG секунд.
+"""
+
+import asyncio
+import hashlib
+import logging
+import uuid
+from typing import Any, Callable, Sequence
+
+from src.config import settings
+from src.core.setup import redis_manager
+
+TAG_VERSION_PREFIX = "cache-tag"
+
+HOTELS_TAG = "hotels"
+HOTEL_TAG = "hotel:{hotel_id}"
+FACILITIES_TAG = "facilities"
+# свободные номера по всем отелям (поиск отелей) -- меняется при любой брони
+AVAILABILITY_TAG = "availability"
+# свободные номера одного отеля
+HOTEL_AVAILABILITY_TAG = "availability:{hotel_id}"
+# сброс availability:{hotel_id} сразу у всех отелей (массовые операции с bookings)
+ALL_HOTELS_AVAILABILITY_TAG = "availability:all"
+
+NOT_CACHED_KWARGS = ("db",)
+
+# отложенные повторные INCR, ссылки держим, чтобы задачи не собрал GC
+_delayed_invalidations: set[asyncio.Task] = set()
+
+
+def tag_version_key(tag: str) -> str:
+    return f"{TAG_VERSION_PREFIX}:{tag}"
+
+
+def resolve_tags(tags: Sequence[str], kwargs: dict[str, Any]) -> list[str]:
+    return [tag.format(**kwargs) for tag in tags]
+
+
+async def get_tags_version(tags: Sequence[str]) -> str:
+    """Одна строка из версий всех тегов, один MGET на запрос"""
+    if not tags:
+        return ""
+    try:
+        versions = await redis_manager.mget([tag_version_key(tag) for tag in tags])
+    except Exception:
+        logging.warning(f"Не удалось получить версии тегов {tags}", exc_info=True)
+        # ключ, который никогда не совпадёт: лучше промах, чем устаревший ответ
+        return uuid.uuid4().hex
+    return ".".join(version.decode() if version else "0" for version in versions)
+
+
+async def incr_tags(tags: Sequence[str]) -> None:
+    try:
+        await redis_manager.incr(*(tag_version_key(tag) for tag in tags))
+    except Exception:
+        logging.warning(f"Не удалось инвалидировать теги {tags}", exc_info=True)
+
+
+async def incr_tags_later(tags: Sequence[str], delay: float) -> None:
+    await asyncio.sleep(delay)
+    await incr_tags(tags)
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """
+    Вызывать после commit, иначе параллельный запрос закеширует ещё старые данные.
+    С репликами -- ещё раз через DB_REPLICA_MAX_LAG: к тому времени реплики догнали commit.
+    """
+    if not tags:
+        return
+    await incr_tags(tags)
+    if settings.DB_REPLICA_HOSTS and settings.DB_REPLICA_MAX_LAG:
+        task = asyncio.create_task(incr_tags_later(tags, settings.DB_REPLICA_MAX_LAG))
+        _delayed_invalidations.add(task)
+        task.add_done_callback(_delayed_invalidations.discard)
+
+
+async def wait_delayed_invalidations() -> None:
+    """Перед redis_manager.close(): дожидается отложенных INCR, чтобы они не потерялись"""
+    if _delayed_invalidations:
+        await asyncio.gather(*_delayed_invalidations, return_exceptions=True)
+
+
+async def invalidate_hotel_availability(hotel_id: int) -> None:
+    await invalidate_tags(AVAILABILITY_TAG, HOTEL_AVAILABILITY_TAG.format(hotel_id=hotel_id))
+
+
+async def invalidate_all_availability() -> None:
+    await invalidate_tags(AVAILABILITY_TAG, ALL_HOTELS_AVAILABILITY_TAG)
+
+
+def make_cache_key(func: Callable, namespace: str, kwargs: dict[str, Any], version: str) -> str:
+    params = {key: value for key, value in kwargs.items() if key not in NOT_CACHED_KWARGS}
+    cache_key = hashlib.md5(
+        f"{func.__module__}:{func.__name__}:{params}:{version}".encode()
+    ).hexdigest()
+    return f"{namespace}:{cache_key}"
+
+
+def tagged_key_builder(*tags: str):
+    """
+    key_builder для fastapi_cache.decorator.cache:
+
+        @cache(expire=3600, key_builder=tagged_key_builder(HOTEL_TAG))
+    """
+
+    async def key_builder(
+        func: Callable,
+        namespace: str = "",
+        *,
+        request=None,
+        response=None,
+        args: tuple = (),
+        kwargs: dict[str, Any],
+    ) -> str:
+        version = await get_tags_version(resolve_tags(tags, kwargs))
+        return make_cache_key(func, namespace, kwargs, version)
+
+    return key_builder
@@ -1,11 +1,86 @@
+import asyncio
 import functools
-import json
+import logging
+import struct
+import time
+import typing
+import uuid
+from typing import Any, Sequence
 
-from src.core.setup import redis_manager
+from pydantic import TypeAdapter
 
+from src.core.cache_stats import cache_stats
+from src.core.cache_tags import get_tags_version, resolve_tags
+from src.core.setup import cache_codec, redis_manager
+from src.core.single_flight import single_flight
+from src.database import async_session_maker
+from src.utils.db_manager import DBManager
+
+REFRESH_LOCK_PREFIX = "cache-refresh"
+REFRESH_LOCK_TTL_MS = 30_000
+
+# ключи, которые этот процесс сейчас обновляет в фоне, и сами задачи (чтобы их не собрал GC)
+_refreshing_keys: set[str] = set()
+_background_tasks: set[asyncio.Task] = set()
+
+
+# в режиме stale_ttl перед значением лежит время, до которого запись свежая
+FRESH_UNTIL = struct.Struct("!d")
+
+
+def get_result_adapter(func, type_: Any = None) -> TypeAdapter:
+    if type_ is None:
+        type_ = typing.get_type_hints(func).get("return", Any)
+    return TypeAdapter(type_)
+
+
+def read_entry(
+    key_for_redis: str, cached: bytes | None, adapter: TypeAdapter, stale_ttl: int | None
+) -> tuple[bool, Any] | None:
+    """
+    (свежая ли запись, значение). None -- промах: записи нет или она не читается
+    (обрезана, другой формат, тип результата поменялся) и будет перезаписана.
+    """
+    if not cached:
+        return None
+    try:
+        if stale_ttl is None:
+            return True, cache_codec.decode(cached, adapter)
+        (fresh_until,) = FRESH_UNTIL.unpack_from(cached)
+        return fresh_until > time.time(), cache_codec.decode(cached[FRESH_UNTIL.size :], adapter)
+    except Exception:
+        logging.warning(f"Не удалось прочитать запись кеша {key_for_redis}", exc_info=True)
+        return None
+
+
+def redis_cache(
+    exp: int, tags: Sequence[str] = (), stale_ttl: int | None = None, type_: Any = None
+):
+    """
+    exp -- сколько секунд запись считается свежей.
+    tags -- шаблоны тегов из src.core.cache_tags, например HOTEL_TAG.
+    stale_ttl -- ещё столько секунд после exp запись отдаётся сразу (stale-while-revalidate),
+    а одна фоновая задача на ключ пересчитывает её со своей сессией БД.
+    type_ -- тип результата, по умолчанию аннотация возврата функции. Из кеша возвращаются
+    те же типы, что и из функции (list[HotelInDB], а не list[dict]).
+    """
 
-def redis_cache(exp: int):
     def wrapper(func):
+        adapter = get_result_adapter(func, type_)
+        # без аннотации тип неизвестен: результат прогоняется через кодек и на промахе,
+        # чтобы hit и miss всё равно возвращали одно и то же
+        typed = adapter.core_schema["type"] != "any"
+
+        async def store(key_for_redis: str, *args, **kwargs):
+            results_from_db = await func(*args, **kwargs)
+            encoded = cache_codec.encode(results_from_db, adapter)
+            if stale_ttl is None:
+                await redis_manager.set(key=key_for_redis, value=encoded, exp=exp)
+            else:
+                entry = FRESH_UNTIL.pack(time.time() + exp) + encoded
+                await redis_manager.set(key=key_for_redis, value=entry, exp=exp + stale_ttl)
+            return results_from_db if typed else cache_codec.decode(encoded, adapter)
+
         @functools.wraps(func)
         async def inner(*args, **kwargs):
             kwargs_sep = ":"
@@ -13,21 +88,70 @@ def redis_cache(exp: int):
             for key, value in kwargs.items():
                 if key != "db":
                     kwargs_list.append(f"{key}_{value}")
+            if tags:
+                version = await get_tags_version(resolve_tags(tags, kwargs))
+                kwargs_list.append(f"v_{version}")
             key_for_redis = kwargs_sep.join(kwargs_list)
             cached_result = await redis_manager.get(key=key_for_redis)
-            if cached_result:
-                print("Getting res from cache")
-                return json.loads(cached_result)
-            else:
-                print(*args)
-                results_from_db = await func(*args, **kwargs)
-                if isinstance(results_from_db, list):
-                    dumped = json.dumps([res.model_dump() for res in results_from_db])
-                else:  # isinstance(results_from_db, BaseModel):
-                    dumped = json.dumps(results_from_db.model_dump())
-                await redis_manager.set(key=key_for_redis, value=dumped, exp=exp)
-                return results_from_db
+            entry = read_entry(key_for_redis, cached_result, adapter, stale_ttl)
+            if entry is not None:
+                fresh, value = entry
+                if fresh:
+                    cache_stats.hit(key_for_redis)
+                else:
+                    cache_stats.stale(key_for_redis)
+                    schedule_refresh(key_for_redis, store, *args, **kwargs)
+                return value
+
+            cache_stats.miss(key_for_redis)
+
+            async def compute():
+                return await store(key_for_redis, *args, **kwargs)
+
+            async def get_cached():
+                cached = await redis_manager.get(key=key_for_redis)
+                entry = read_entry(key_for_redis, cached, adapter, stale_ttl)
+                return entry[1] if entry is not None else None
+
+            # на промахе ключ считает один вызов, остальные ждут его результат
+            return await single_flight.do(key_for_redis, compute, get_cached)
 
         return inner
 
     return wrapper
+
+
+def schedule_refresh(key_for_redis: str, store, *args, **kwargs) -> None:
+    if key_for_redis in _refreshing_keys:
+        return
+    _refreshing_keys.add(key_for_redis)
+    task = asyncio.create_task(refresh(key_for_redis, store, *args, **kwargs))
+    _background_tasks.add(task)
+
+    def on_done(done_task: asyncio.Task) -> None:
+        _background_tasks.discard(done_task)
+        _refreshing_keys.discard(key_for_redis)
+
+    task.add_done_callback(on_done)
+
+
+async def refresh(key_for_redis: str, store, *args, **kwargs) -> None:
+    """
+    Фоновое обновление устаревшей записи. Блокировка в Redis оставляет одного обновляющего
+    на все воркеры. Сессия запроса к этому моменту уже закрыта, поэтому db подменяется своим.
+    """
+    lock_key = f"{REFRESH_LOCK_PREFIX}:{key_for_redis}"
+    token = uuid.uuid4().hex
+    try:
+        if not await redis_manager.set_nx(lock_key, token, REFRESH_LOCK_TTL_MS):
+            return
+        try:
+            if "db" in kwargs:
+                async with DBManager(session_factory=async_session_maker) as db:
+                    await store(key_for_redis, *args, **{**kwargs, "db": db})
+            else:
+                await store(key_for_redis, *args, **kwargs)
+        finally:
+            await redis_manager.delete_if_equals(lock_key, token)
+    except Exception:
+        logging.warning(f"Не удалось обновить запись кеша {key_for_redis}", exc_info=True)
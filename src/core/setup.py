@@ -1,8 +1,44 @@
+from src.connectors.local_cache import LocalCache
 from src.connectors.redis_connector import RedisConnector
 from src.config import settings
+from src.core.cache_codec import CacheCodec
+from src.core.availability.base import AvailabilityEngine
+from src.core.availability.interval_index import IntervalIndexEngine
 
 
 redis_manager = RedisConnector(
     host=settings.REDIS_HOST,
     port=settings.REDIS_PORT,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    pool_timeout=settings.REDIS_POOL_TIMEOUT,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    retries=settings.REDIS_RETRIES,
+    local_cache=LocalCache(max_size=settings.LOCAL_CACHE_MAX_SIZE, ttl=settings.LOCAL_CACHE_TTL)
+    if settings.LOCAL_CACHE_TTL
+    else None,
 )
+
+cache_codec = CacheCodec(
+    serializer=settings.CACHE_SERIALIZER,
+    compression=settings.CACHE_COMPRESSION,
+    compress_min_size=settings.CACHE_COMPRESS_MIN_SIZE,
+)
+
+
+def get_availability_engine() -> AvailabilityEngine:
+    if settings.AVAILABILITY_ENGINE == "interval_index":
+        return IntervalIndexEngine(max_age=settings.AVAILABILITY_INDEX_MAX_AGE)
+    if settings.AVAILABILITY_ENGINE == "occupancy_matrix":
+        # numpy нужен только этому движку
+        from src.core.availability.occupancy_matrix import OccupancyMatrixEngine
+
+        return OccupancyMatrixEngine(
+            max_age=settings.AVAILABILITY_INDEX_MAX_AGE,
+            days=settings.AVAILABILITY_MATRIX_DAYS,
+        )
+    return AvailabilityEngine()
+
+
+availability_engine = get_availability_engine()
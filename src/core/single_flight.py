@@ -0,0 +1,216 @@
+"""
+Single-flight для промахов кеша: на один ключ считается один результат, остальные ждут его.
+
+Внутри процесса конкурентные запросы ждут одну и ту же задачу. Между воркерами считает тот,
+кто взял блокировку в Redis (SET NX с коротким lease), остальные опрашивают кеш,
+пока результат не появится или блокировка не пропадёт.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import uuid
+from inspect import Parameter
+from typing import Any, Awaitable, Callable, TypeVar
+
+from fastapi.dependencies.utils import get_typed_return_annotation
+from fastapi_cache import FastAPICache
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.status import HTTP_304_NOT_MODIFIED
+
+from src.core.cache_stats import cache_stats
+from src.core.setup import redis_manager
+
+T = TypeVar("T")
+
+LOCK_PREFIX = "single-flight"
+LOCK_TTL_MS = 10_000
+POLL_INTERVAL = 0.05
+
+# параметры, которые coalesced_cache добавляет в сигнатуру ручки
+REQUEST_PARAM = "__single_flight_request"
+RESPONSE_PARAM = "__single_flight_response"
+
+
+class SingleFlight:
+    def __init__(self, lock_ttl_ms: int = LOCK_TTL_MS, poll_interval: float = POLL_INTERVAL):
+        self.lock_ttl_ms = lock_ttl_ms
+        self.poll_interval = poll_interval
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    async def do(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[T]],
+        get_cached: Callable[[], Awaitable[T | None]],
+    ) -> T:
+        """
+        compute должен сам положить результат в кеш: блокировка снимается после него,
+        и ожидающие в других воркерах сразу найдут значение через get_cached.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run(key, compute, get_cached))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            # задача работает на сессии этого запроса, поэтому отменяется вместе с ним
+            return await task
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            # отменили запрос, который считал значение, пробуем заново
+            return await self.do(key, compute, get_cached)
+
+    async def _run(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[T]],
+        get_cached: Callable[[], Awaitable[T | None]],
+    ) -> T:
+        lock_key = f"{LOCK_PREFIX}:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis_manager.set_nx(lock_key, token, self.lock_ttl_ms)
+        except Exception:
+            logging.warning(f"Не удалось взять блокировку {lock_key}", exc_info=True)
+            return await compute()
+
+        if acquired:
+            try:
+                return await compute()
+            finally:
+                try:
+                    await redis_manager.delete_if_equals(lock_key, token)
+                except Exception:
+                    logging.warning(f"Не удалось снять блокировку {lock_key}", exc_info=True)
+
+        try:
+            cached = await self._wait(lock_key, get_cached)
+        except Exception:
+            logging.warning(f"Ошибка при ожидании {lock_key}", exc_info=True)
+            cached = None
+        if cached is not None:
+            return cached
+        return await compute()
+
+    async def _wait(
+        self, lock_key: str, get_cached: Callable[[], Awaitable[T | None]]
+    ) -> T | None:
+        """Ждёт результат другого воркера не дольше lease его блокировки"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_ttl_ms / 1000
+        while loop.time() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            cached = await get_cached()
+            if cached is not None:
+                return cached
+            if not await redis_manager.exists(lock_key):
+                # блокировку сняли, а значения нет: воркер упал или не смог записать кеш
+                return None
+        return None
+
+
+single_flight = SingleFlight()
+
+
+def coalesced_cache(expire: int, key_builder):
+    """
+    Замена fastapi_cache.decorator.cache с single-flight на промахе:
+
+        @coalesced_cache(expire=3600, key_builder=tagged_key_builder(HOTELS_TAG))
+
+    Ключ строится один раз и пишется в кеш один раз -- тем, кто считал значение, поэтому
+    ожидающие читают ровно ту запись, которую он положил. Заголовки Cache-Control, ETag
+    и статуса кеша, а также 304 на If-None-Match -- как у cache.
+    """
+
+    def wrapper(func):
+        signature = inspect.signature(func)
+        return_type = get_typed_return_annotation(func)
+        # ключ кеша -- хеш параметров, счётчики ведутся по ручке
+        stats_key = f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        async def inner(*args, **kwargs):
+            request: Request | None = kwargs.pop(REQUEST_PARAM, None)
+            response: Response | None = kwargs.pop(RESPONSE_PARAM, None)
+            if (
+                not FastAPICache._init
+                or not FastAPICache.get_enable()
+                or (request is not None and request.method != "GET")
+                or (request is not None and request.headers.get("Cache-Control") == "no-store")
+            ):
+                return await func(*args, **kwargs)
+
+            backend = FastAPICache.get_backend()
+            coder = FastAPICache.get_coder()
+            status_header = FastAPICache.get_cache_status_header()
+            cache_key = await key_builder(
+                func,
+                f"{FastAPICache.get_prefix()}:",
+                request=request,
+                response=response,
+                args=args,
+                kwargs=kwargs,
+            )
+
+            ttl, cached = 0, None
+            if request is None or request.headers.get("Cache-Control") != "no-cache":
+                try:
+                    ttl, cached = await backend.get_with_ttl(cache_key)
+                except Exception:
+                    logging.warning(f"Не удалось прочитать {cache_key} из кеша", exc_info=True)
+
+            if cached is not None:
+                cache_stats.hit(stats_key)
+                if response is not None:
+                    etag = f"W/{hash(cached)}"
+                    response.headers.update(
+                        {"Cache-Control": f"max-age={ttl}", "ETag": etag, status_header: "HIT"}
+                    )
+                    if request is not None and request.headers.get("if-none-match") == etag:
+                        response.status_code = HTTP_304_NOT_MODIFIED
+                        return response
+                return coder.decode_as_type(cached, type_=return_type)
+
+            cache_stats.miss(stats_key)
+            encoded: bytes | None = None
+
+            async def compute() -> Any:
+                nonlocal encoded
+                result = await func(*args, **kwargs)
+                encoded = coder.encode(result)
+                try:
+                    await backend.set(cache_key, encoded, expire)
+                except Exception:
+                    logging.warning(f"Не удалось записать {cache_key} в кеш", exc_info=True)
+                return result
+
+            async def get_cached() -> Any:
+                cached = await backend.get(cache_key)
+                return coder.decode_as_type(cached, type_=return_type) if cached else None
+
+            result = await single_flight.do(cache_key, compute, get_cached)
+            if response is not None:
+                response.headers.update(
+                    {"Cache-Control": f"max-age={expire}", status_header: "MISS"}
+                )
+                if encoded is not None:
+                    response.headers["ETag"] = f"W/{hash(encoded)}"
+            return result
+
+        inner.__signature__ = signature.replace(  # type: ignore[attr-defined]
+            parameters=[
+                *signature.parameters.values(),
+                Parameter(REQUEST_PARAM, Parameter.KEYWORD_ONLY, annotation=Request),
+                Parameter(RESPONSE_PARAM, Parameter.KEYWORD_ONLY, annotation=Response),
+            ]
+        )
+        return inner
+
+    return wrapper
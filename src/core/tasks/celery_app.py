@@ -6,6 +6,8 @@ from src.config import settings
 celery_instance = Celery(
     "tasks",
     broker=settings.REDIS_URL,
+    # состояние и прогресс долгих задач (purge_bookings)
+    backend=settings.REDIS_URL,
     include=[
         "src.core.tasks.tasks",
     ],
@@ -15,5 +17,16 @@ celery_instance.conf.beat_schedule = {
     "send_emails_to_users_with_today_checkin": {
         "task": "booking_today_checkin",
         "schedule": crontab("0", "7"),
-    }
+    },
+    "maintain_booking_partitions": {
+        "task": "maintain_booking_partitions",
+        "schedule": crontab("30", "2"),
+    },
 }
+
+if settings.BOOKINGS_ARCHIVE_AFTER_DAYS:
+    celery_instance.conf.beat_schedule["archive_old_bookings"] = {
+        "task": "purge_bookings",
+        "schedule": crontab("0", "3"),
+        "kwargs": {"older_than_days": settings.BOOKINGS_ARCHIVE_AFTER_DAYS, "archive": True},
+    }
@@ -7,7 +7,15 @@ from src.core.tasks.celery_app import celery_instance
 from PIL import Image
 import os
 
+from src.config import settings
+from src.core.cache_tags import wait_delayed_invalidations
+from src.core.setup import redis_manager
 from src.database import async_session_maker_null_pool
+from src.services.bookings import (
+    BookingService,
+    get_ended_before,
+    maintain_booking_partitions as run_partition_maintenance,
+)
 from src.utils.db_manager import DBManager
 
 WIDTHS = [1000, 500, 200]
@@ -68,3 +76,43 @@ def send_email_notification_on_booking_creation(email: EmailStr):
     with open("log.txt", "a") as log:
         log.write(f"user with email={email} created booking \n")
         log.write(f"email of booking creation sent to {email} \n")
+
+
+async def purge_bookings_helper(
+    task, older_than_days: int | None, archive: bool, batch_size: int
+) -> int:
+    def report_progress(deleted: int):
+        task.update_state(state="PROGRESS", meta={"deleted": deleted})
+
+    # для инвалидации кеша свободных номеров
+    await redis_manager.connect()
+    try:
+        async with DBManager(session_factory=async_session_maker_null_pool) as db:
+            return await BookingService(db).purge_bookings(
+                ended_before=get_ended_before(older_than_days),
+                archive=archive,
+                batch_size=batch_size,
+                on_progress=report_progress,
+            )
+    finally:
+        await wait_delayed_invalidations()
+        await redis_manager.close()
+
+
+@celery_instance.task(bind=True, name="purge_bookings")
+def purge_bookings(
+    self,
+    older_than_days: int | None = None,
+    archive: bool = False,
+    batch_size: int = settings.BOOKINGS_DELETE_BATCH_SIZE,
+):
+    """
+    Удаляет пачками брони, закончившиеся больше older_than_days дней назад (None -- все).
+    Прогресс -- состояние PROGRESS с meta={"deleted": n}, результат -- число удалённых.
+    """
+    return asyncio.run(purge_bookings_helper(self, older_than_days, archive, batch_size))
+
+
+@celery_instance.task(name="maintain_booking_partitions")
+def maintain_booking_partitions():
+    return asyncio.run(run_partition_maintenance())
@@ -1,15 +1,103 @@
-from sqlalchemy import NullPool
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import asyncio
+import itertools
+from contextlib import AsyncExitStack
+from typing import Literal
+
+from sqlalchemy import NullPool, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+    async_sessionmaker,
+)
 from sqlalchemy.orm import DeclarativeBase
 from src.config import settings
 
 
-engine = create_async_engine(settings.DB_URL, echo=False)
-engine_null_pool = create_async_engine(settings.DB_URL, echo=False, poolclass=NullPool)
+connect_args = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+
+def create_pooled_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=False,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+engine = create_pooled_engine(settings.DB_URL)
+engine_null_pool = create_async_engine(
+    settings.DB_URL, echo=False, poolclass=NullPool, connect_args=connect_args
+)
+replica_engines = [
+    create_pooled_engine(settings.get_replica_db_url(host)) for host in settings.DB_REPLICA_HOSTS
+]
 
 async_session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
 async_session_maker_null_pool = async_sessionmaker(bind=engine_null_pool, expire_on_commit=False)
 
 
+class ReplicaSessionMaker:
+    """
+    session_factory для DBManager: каждая новая сессия открывается на одной из реплик.
+    round_robin -- по кругу, least_connections -- где меньше всего занятых соединений пула.
+    Без реплик сессии открываются на primary.
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        fallback: async_sessionmaker,
+        selection: Literal["round_robin", "least_connections"] = "round_robin",
+    ):
+        self.engines = engines
+        self.fallback = fallback
+        self.selection = selection
+        self._session_makers = [
+            async_sessionmaker(bind=replica_engine, expire_on_commit=False)
+            for replica_engine in engines
+        ]
+        self._next = itertools.cycle(range(len(engines)))
+
+    def pick(self) -> async_sessionmaker:
+        if not self._session_makers:
+            return self.fallback
+        if self.selection == "least_connections":
+            index = min(
+                range(len(self.engines)),
+                key=lambda i: self.engines[i].pool.checkedout(),  # type: ignore
+            )
+        else:
+            index = next(self._next)
+        return self._session_makers[index]
+
+    def __call__(self) -> AsyncSession:
+        return self.pick()()
+
+
+read_session_maker = ReplicaSessionMaker(
+    replica_engines, fallback=async_session_maker, selection=settings.DB_REPLICA_SELECTION
+)
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> None:
+    """
+    Открывает connections соединений одновременно и возвращает их в пул,
+    чтобы первые запросы после деплоя не платили за установку соединения.
+    Больше pool_size не открываем: лишние соединения пул закроет при возврате.
+    """
+    connections = min(connections, engine.pool.size())  # type: ignore
+    async with AsyncExitStack() as stack:
+        opened = await asyncio.gather(
+            *[stack.enter_async_context(engine.connect()) for _ in range(connections)]
+        )
+        await asyncio.gather(*[conn.execute(text("select 1")) for conn in opened])
+
+
 class Base(DeclarativeBase):
     pass
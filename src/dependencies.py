@@ -4,8 +4,10 @@ from fastapi import Depends, Query
 
 from pydantic import BaseModel
 
-from src.database import async_session_maker
+from src.config import settings
+from src.database import async_session_maker, read_session_maker
 from src.utils.db_manager import DBManager
+from src.utils.pagination import decode_cursor
 
 
 async def get_db():
@@ -16,12 +18,70 @@ async def get_db():
 DBDep = Annotated[DBManager, Depends(get_db)]
 
 
+async def get_read_db():
+    async with DBManager(
+        session_factory=read_session_maker,
+        read_only=True,
+        statement_timeout=settings.DB_READ_STATEMENT_TIMEOUT,
+    ) as db:
+        yield db
+
+
+async def get_search_db():
+    async with DBManager(
+        session_factory=read_session_maker,
+        read_only=True,
+        statement_timeout=settings.DB_SEARCH_STATEMENT_TIMEOUT,
+    ) as db:
+        yield db
+
+
+# только для чтения: read-only транзакция на реплике, данные могут отставать от primary.
+# Где нужно увидеть только что записанное (read-your-writes), используйте DBDep.
+# Кеш, заполненный с отстающей реплики, сбрасывается повторной инвалидацией тегов (cache_tags).
+ReadDBDep = Annotated[DBManager, Depends(get_read_db)]
+# то же для поиска свободных номеров по датам, с более длинным statement_timeout
+SearchDBDep = Annotated[DBManager, Depends(get_search_db)]
+
+
+def get_export_db() -> DBManager:
+    """
+    DBManager без входа в контекст: StreamingResponse отдаёт тело уже после выхода
+    из yield-зависимостей, поэтому сессию открывает и закрывает генератор ответа.
+    Без statement_timeout -- полная выгрузка идёт долго.
+    """
+    return DBManager(session_factory=read_session_maker, read_only=True)
+
+
+ExportDBDep = Annotated[DBManager, Depends(get_export_db)]
+
+
 class PaginatorParams(BaseModel):
     page: Annotated[int, Query(default=1, ge=1)]
     per_page: Annotated[int, Query(default=30, ge=1, le=100)]
+    after: Annotated[
+        str | None,
+        Query(
+            default=None,
+            description="Курсор из next_cursor предыдущей страницы. "
+            "Передайте пустое значение, чтобы получить первую страницу в режиме курсора.",
+        ),
+    ]
+
+    @property
+    def is_cursor_mode(self) -> bool:
+        return self.after is not None
+
+    @property
+    def after_id(self) -> int | None:
+        return decode_cursor(self.after or "")
+
+    @property
+    def offset(self) -> int:
+        return (self.page - 1) * self.per_page
 
     def __repr__(self):
-        return f"PaginatorParams(page={self.page}, per_page={self.per_page})"
+        return f"PaginatorParams(page={self.page}, per_page={self.per_page}, after={self.after})"
 
 
 PaginatorDep = Annotated[PaginatorParams, Depends()]
@@ -29,6 +29,10 @@ class ObjectAlreadyExistsException(BronirovshikException):
     detail = "Объект с таким идентификатором уже существует"
 
 
+class InvalidCursorException(BronirovshikException):
+    detail = "Неверный курсор пагинации"
+
+
 class DateRangeException(BronirovshikException):
     detail = "Неверный диапазон дат"
 
@@ -45,6 +49,15 @@ class FacilityNotFoundException(BronirovshikException):
     detail = "Такого удобства не существует"
 
 
+class CatalogImportException(BronirovshikException):
+    detail = "Ошибка в файле каталога"
+
+    def __init__(self, line_number: int, error: str):
+        super().__init__(line_number, error)
+        self.line_number = line_number
+        self.error = error
+
+
 class TokenHasExpiredException(BronirovshikException):
     detail = "Токен устарел"
 
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
-from src.dependencies import DBDep
+from src.core.cache_tags import FACILITIES_TAG, tagged_key_builder
+from src.dependencies import DBDep, ReadDBDep
 from src.exceptions import FacilityNotFoundException
 from src.facilities.schemas import FacilityIn
 
@@ -11,20 +12,20 @@ from src.services.facilities import FacilityService
 
 router = APIRouter(prefix="/facilities", tags=["Facilities"])
 
-FACILITY_CACHE_EXP = 60
+FACILITY_CACHE_EXP = 60 * 60
 
 
 @router.get("/")
-@cache(expire=10)
+@cache(expire=FACILITY_CACHE_EXP, key_builder=tagged_key_builder(FACILITIES_TAG))
 async def get_facilities(
-    db: DBDep,
+    db: ReadDBDep,
 ):
     return await FacilityService(db).get_facilities()
 
 
 @router.get("/{facility_id}")
-@cache(expire=FACILITY_CACHE_EXP)
-async def get_facility_by_id(facility_id: int, db: DBDep):
+@cache(expire=FACILITY_CACHE_EXP, key_builder=tagged_key_builder(FACILITIES_TAG))
+async def get_facility_by_id(facility_id: int, db: ReadDBDep):
     try:
         return await FacilityService(db).get_facility_by_id(facility_id)
     except FacilityNotFoundException:
@@ -1,7 +1,9 @@
 from src.database import Base
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import (
+    Index,
     String,
+    func,
 )
 
 
@@ -11,3 +13,18 @@ class Hotel(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(100))
     location: Mapped[str]
+
+
+# триграммные индексы под фильтры func.lower(...).contains(...) в поиске отелей
+Index(
+    "ix_hotels_title_trgm",
+    func.lower(Hotel.title).label("title_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"title_lower": "gin_trgm_ops"},
+)
+Index(
+    "ix_hotels_location_trgm",
+    func.lower(Hotel.location).label("location_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"location_lower": "gin_trgm_ops"},
+)
@@ -1,24 +1,50 @@
+import io
+import logging
 from datetime import date
-from fastapi import Query
+from fastapi import Query, UploadFile
 from fastapi_cache.decorator import cache
 
 from fastapi import APIRouter, Body
 
-from src.exceptions import DateRangeException
+from src.core.cache_tags import AVAILABILITY_TAG, HOTEL_TAG, HOTELS_TAG, tagged_key_builder
+from src.core.single_flight import coalesced_cache
+from src.exceptions import (
+    CatalogImportException,
+    DateRangeException,
+    FacilityNotFoundException,
+    InvalidCursorException,
+)
 from src.exceptions import ObjectNotFoundException
-from src.hotels.schemas import HotelCreateOrUpdate, HotelPATCH
-from src.dependencies import PaginatorDep, DBDep
-from src.httpexceptions import HotelNotFoundHTTPException, DateRangeHTTPException
+from src.hotels.schemas import CatalogImportReport, HotelCreateOrUpdate, HotelPATCH
+from src.dependencies import PaginatorDep, DBDep, ReadDBDep, SearchDBDep
+from src.httpexceptions import (
+    CatalogImportHTTPException,
+    FacilityNotFoundHTTPException,
+    HotelNotFoundHTTPException,
+    DateRangeHTTPException,
+    InvalidCursorHTTPException,
+)
+from src.services.catalog_import import (
+    CatalogFormat,
+    CatalogImportService,
+    guess_catalog_format,
+    read_catalog,
+)
 from src.services.hotels import HotelService
 
 router = APIRouter(prefix="/hotels", tags=["Hotels"])
 
+# кеш сбрасывается тегами при изменениях, TTL лишь страхует от потерянной инвалидации
+HOTELS_CACHE_EXP = 60 * 60
+
 
 @router.get("/", summary="Получить все отели")
-@cache(expire=60)
+@coalesced_cache(
+    expire=HOTELS_CACHE_EXP, key_builder=tagged_key_builder(HOTELS_TAG, AVAILABILITY_TAG)
+)
 async def get_hotels(
     paginator: PaginatorDep,
-    db: DBDep,
+    db: SearchDBDep,
     location: str | None = None,
     title: str | None = None,
     date_from: date = Query(examples=["2024-10-18"]),
@@ -29,6 +55,9 @@ async def get_hotels(
     с пагинацией и фильтрацией по полям `title` и `location`.
 
     Фильтрация не чувствительна к регистру.
+
+    Если передан параметр `after`, пагинация идёт по курсору:
+    ответ имеет вид `{"data": [...], "next_cursor": ...}`.
     """
     try:
         return await HotelService(db).get_hotels(
@@ -40,14 +69,17 @@ async def get_hotels(
         )
     except DateRangeException:
         raise DateRangeHTTPException
+    except InvalidCursorException:
+        raise InvalidCursorHTTPException
 
 
 @router.get(
     "/{hotel_id}", summary="Получить отель по id", description="Получение отеля по его id."
 )
+@cache(expire=HOTELS_CACHE_EXP, key_builder=tagged_key_builder(HOTEL_TAG))
 async def get_hotel_by_id(
     hotel_id: int,
-    db: DBDep,
+    db: ReadDBDep,
 ):
     try:
         return await HotelService(db).get_hotel_by_id(hotel_id)
@@ -85,6 +117,36 @@ async def create_hotel(
     return {"message": "Hotel added", "data": created_hotel}
 
 
+@router.post(
+    "/import",
+    summary="Импортировать каталог отелей",
+    description="Массовая загрузка отелей с номерами и удобствами номеров из NDJSON или CSV. \
+        Формат по умолчанию определяется по расширению файла.",
+)
+async def import_hotels(
+    db: DBDep,
+    file: UploadFile,
+    file_format: CatalogFormat | None = Query(default=None, alias="format"),
+) -> CatalogImportReport:
+    def log_progress(report: CatalogImportReport):
+        logging.info(
+            f"Catalog import {file.filename}: {report.hotels} hotels, {report.rooms} rooms, "
+            f"{report.rows_per_second:.0f} rows/s"
+        )
+
+    # читается и разбирается в threadpool внутри import_catalog
+    lines = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        return await CatalogImportService(db).import_catalog(
+            read_catalog(lines, file_format or guess_catalog_format(file.filename)),
+            on_progress=log_progress,
+        )
+    except CatalogImportException as exc:
+        raise CatalogImportHTTPException(exc.line_number, exc.error)
+    except FacilityNotFoundException:
+        raise FacilityNotFoundHTTPException
+
+
 @router.put(
     "/{hotel_id}",
     summary="Обновить отель",
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, ConfigDict, Field
 
+from src.rooms.schemas import RoomIn
+
 
 class HotelCreateOrUpdate(BaseModel):
     title: str
@@ -15,3 +17,19 @@ class HotelInDB(HotelCreateOrUpdate):
     id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class HotelImport(HotelCreateOrUpdate):
+    rooms: list[RoomIn] = Field(default_factory=list)
+
+
+class CatalogImportProgress(BaseModel):
+    hotels: int = 0
+    rooms: int = 0
+    room_facilities: int = 0
+    seconds: float = 0
+    rows_per_second: float = 0
+
+
+class CatalogImportReport(CatalogImportProgress):
+    progress: list[CatalogImportProgress] = Field(default_factory=list)  # после каждой пачки
@@ -14,6 +14,11 @@ class DateRangeHTTPException(BronirovshikHTTPException):
     detail = "Date range is invalid"
 
 
+class InvalidCursorHTTPException(BronirovshikHTTPException):
+    status_code = 400
+    detail = "Invalid pagination cursor"
+
+
 class HotelNotFoundHTTPException(BronirovshikHTTPException):
     status_code = 404
     detail = "Hotel not found"
@@ -49,6 +54,15 @@ class FacilityNotFoundHTTPException(BronirovshikHTTPException):
     detail = "Facility not found"
 
 
+class CatalogImportHTTPException(BronirovshikHTTPException):
+    status_code = 422
+    detail = "Invalid catalog file"
+
+    def __init__(self, line_number: int, error: str):
+        super().__init__()
+        self.detail = f"{self.detail}, line {line_number}: {error}"
+
+
 class TokenHasExpiredHTTPException(BronirovshikHTTPException):
     status_code = 401
     detail = "Token has been expired"
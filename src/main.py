@@ -1,5 +1,7 @@
 # ruff: noqa: E402
 
+import asyncio
+import contextlib
 import logging
 import sys
 from pathlib import Path
@@ -18,20 +20,35 @@ from src.rooms.router import router as router_rooms
 from src.bookings.router import router as router_bookings
 from src.facilities.router import router as router_facility
 from src.images.router import router as router_images
-from src.core.setup import redis_manager
+from src.core.cache_backend import RedisConnectorBackend
+from src.core.cache_stats import log_cache_stats
+from src.core.cache_tags import wait_delayed_invalidations
+from src.core.setup import availability_engine, redis_manager
+from src.config import settings
+from src.database import async_session_maker, engine, replica_engines, warm_up_pool
 
 from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    for db_engine in (engine, *replica_engines):
+        await warm_up_pool(db_engine, settings.DB_POOL_WARMUP)
     await redis_manager.connect()
     print("Connected to Redis")
-    FastAPICache.init(RedisBackend(redis_manager._redis), prefix="fastapi-cache")
+    FastAPICache.init(RedisConnectorBackend(redis_manager), prefix="fastapi-cache")
+    await availability_engine.start(async_session_maker)
+    cache_stats_task = asyncio.create_task(log_cache_stats())
     yield
+    cache_stats_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await cache_stats_task
+    await availability_engine.stop()
+    await wait_delayed_invalidations()
     await redis_manager.close()
     print("Redis connection closed")
+    for db_engine in (engine, *replica_engines):
+        await db_engine.dispose()
 
 
 app = FastAPI(title="Learning FastAPI", lifespan=lifespan)
@@ -1,4 +1,3 @@
-from sqlalchemy import select
 from sqlalchemy.exc import NoResultFound
 
 from src.exceptions import UserNotFoundException
@@ -15,7 +14,7 @@ class AuthRepository(BaseRepository):
     async def get_user_in_db(
         self, email: str | None = None, username: str | None = None
     ) -> UserInDB:
-        query = select(self.model)
+        query = self.select_entities()
         if email:
             query = query.filter_by(email=email)
         elif username:
@@ -23,7 +22,7 @@ class AuthRepository(BaseRepository):
 
         result = await self.session.execute(query)
         try:
-            user = result.scalars().one()
+            row = result.one()
         except NoResultFound:
             raise UserNotFoundException
-        return self.mapper.map_to_domain_entity(user)
+        return self.mapper.map_row_to_domain_entity(row)
@@ -1,5 +1,5 @@
 import logging
-from typing import Sequence, Generic, TypeVar, Any
+from typing import AsyncIterator, Iterable, Sequence, Generic, TypeVar, Any
 
 from asyncpg import UniqueViolationError
 from pydantic import BaseModel
@@ -7,16 +7,36 @@ from sqlalchemy.exc import NoResultFound, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import Base
-from sqlalchemy import delete, insert, select, update
+from sqlalchemy import (
+    ColumnElement,
+    Result,
+    Row,
+    RowMapping,
+    Select,
+    delete,
+    func,
+    insert,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from src.exceptions import ObjectNotFoundException, ObjectAlreadyExistsException
 from src.repositories.mappers.base import DataMapper
+from src.utils.utils import chunked
 
 
 ModelType = TypeVar("ModelType", bound=Base)
 DataMapperType = TypeVar("DataMapperType", bound=DataMapper)
 DomainEntityType = TypeVar("DomainEntityType", bound=BaseModel)
 
+# лимит параметров одного запроса в протоколе postgres (asyncpg)
+MAX_QUERY_PARAMS = 32767
+COPY_CHUNK_SIZE = 10_000
+STREAM_BATCH_SIZE = 5_000
+DELETE_BATCH_SIZE = 5_000
+
 
 class BaseRepository(Generic[ModelType, DataMapperType]):
     model: type[ModelType]
@@ -26,31 +46,113 @@ class BaseRepository(Generic[ModelType, DataMapperType]):
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
+    def select_entities(self) -> Select:
+        """
+        select только колонок схемы mapper'а, а не ORM-сущностей: строки не попадают
+        в identity map и собираются в схемы без повторной валидации (см. map_rows)
+        """
+        return select(*self.mapper.columns())
+
+    def map_rows(self, result: Result) -> list:
+        build = self.mapper.row_builder()
+        return [build(row) for row in result.all()]
+
     async def get_filtered(self, *filters, **filter_by):
-        query = select(self.model).filter(*filters).filter_by(**filter_by)
+        query = self.select_entities().filter(*filters).filter_by(**filter_by)
         result = await self.session.execute(query)
 
-        return [self.mapper.map_to_domain_entity(model) for model in result.scalars().all()]
+        return self.map_rows(result)
+
+    async def get_filtered_rows(
+        self,
+        *filters,
+        columns: Sequence[str | ColumnElement] | None = None,
+        as_mappings: bool = False,
+        **filter_by,
+    ) -> Sequence[Row] | Sequence[RowMapping]:
+        """
+        Core select без сборки схем: для мест, где нужны одна-две колонки.
+        columns -- имена колонок таблицы или выражения, по умолчанию колонки схемы.
+        Строки -- именованные кортежи (row.id), при as_mappings=True -- RowMapping (row["id"]).
+
+            rows = await repo.get_filtered_rows(columns=["facility_id"], room_id=room_id)
+        """
+        query = self.select_rows(columns).filter(*filters).filter_by(**filter_by)
+        result = await self.session.execute(query)
+
+        if as_mappings:
+            return result.mappings().all()
+        return result.all()
+
+    def select_rows(self, columns: Sequence[str | ColumnElement] | None = None) -> Select:
+        if columns is None:
+            return self.select_entities()
+        table = self.model.__table__
+        return select(
+            *(table.c[column] if isinstance(column, str) else column for column in columns)
+        )
+
+    async def stream_rows(
+        self,
+        *filters,
+        columns: Sequence[str | ColumnElement] | None = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+        **filter_by,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Пачки строк по batch_size через серверный курсор (session.stream), по возрастанию
+        первичного ключа. В памяти только одна пачка, сколько бы строк ни было в выборке.
+        Курсор живёт в транзакции сессии, поэтому сессия должна быть открыта до конца чтения.
+        """
+        query = (
+            self.select_rows(columns)
+            .filter(*filters)
+            .filter_by(**filter_by)
+            .order_by(*self.model.__table__.primary_key.columns)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(query)
+        async for rows in result.partitions():
+            yield rows
 
-    async def get_all(self, *args, **kwargs):
-        return await self.get_filtered()
+    async def exists(self, *filters, **filter_by) -> bool:
+        """select exists (select 1 from {table} where ...)"""
+        query = select(1).select_from(self.model).filter(*filters).filter_by(**filter_by)
+        result = await self.session.execute(select(query.exists()))
+        return bool(result.scalar())
+
+    async def get_all(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+    ):
+        """Все записи по возрастанию id: страница по limit/offset или по курсору after_id"""
+        id_column = self.model.__table__.c.id
+        query = self.select_entities().order_by(id_column)
+        if after_id is not None:
+            query = query.filter(id_column > after_id)
+        query = query.offset(offset).limit(limit)
+        result = await self.session.execute(query)
+
+        return self.map_rows(result)
 
     async def get_one_or_none(self, **filter_by):
-        query = select(self.model).filter_by(**filter_by)
+        query = self.select_entities().filter_by(**filter_by)
 
         result = await self.session.execute(query)
-        model = result.scalars().one_or_none()
+        row = result.one_or_none()
 
-        if model is None:
+        if row is None:
             return None
-        return self.mapper.map_to_domain_entity(model)
+        return self.mapper.map_row_to_domain_entity(row)
 
     async def get_one(self, **filter_by):
-        query = select(self.model).filter_by(**filter_by)
+        query = self.select_entities().filter_by(**filter_by)
         result = await self.session.execute(query)
         try:
-            model = result.scalar_one()
-            return self.mapper.map_to_domain_entity(model)
+            row = result.one()
+            return self.mapper.map_row_to_domain_entity(row)
         except NoResultFound:
             raise ObjectNotFoundException
 
@@ -79,9 +181,118 @@ class BaseRepository(Generic[ModelType, DataMapperType]):
                 )
                 raise exc
 
-    async def add_bulk(self, data: Sequence[BaseModel]) -> None:
-        stmt = insert(self.model).values([item.model_dump() for item in data])
-        await self.session.execute(stmt)
+    def max_rows_per_statement(self) -> int:
+        """Сколько строк insert ... values влезает в MAX_QUERY_PARAMS"""
+        return MAX_QUERY_PARAMS // len(self.model.__table__.columns)
+
+    async def add_bulk(
+        self, data: Sequence[BaseModel], return_ids: bool = False
+    ) -> list[int] | None:
+        ids: list[int] = []
+        for chunk in chunked(data, self.max_rows_per_statement()):
+            stmt = insert(self.model).values([item.model_dump() for item in chunk])
+            if return_ids:
+                result = await self.session.execute(stmt.returning(self.model.__table__.c.id))
+                ids.extend(result.scalars().all())
+            else:
+                await self.session.execute(stmt)
+        return ids if return_ids else None
+
+    async def get_driver_connection(self):
+        """asyncpg-соединение, на котором идёт транзакция сессии"""
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        return raw_connection.driver_connection
+
+    async def reserve_ids(self, count: int) -> list[int]:
+        """
+        select nextval(pg_get_serial_sequence('{table}', 'id')) from generate_series(1, {count});
+        """
+        sequence = func.pg_get_serial_sequence(self.model.__table__.name, "id")
+        query = select(func.nextval(sequence)).select_from(func.generate_series(1, count))
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def copy_bulk(
+        self,
+        data: Iterable[BaseModel],
+        return_ids: bool = False,
+        chunk_size: int = COPY_CHUNK_SIZE,
+    ) -> list[int] | int:
+        """
+        Загрузка больших объёмов через COPY {table} (...) FROM STDIN
+        (asyncpg copy_records_to_table) пачками по chunk_size строк в транзакции сессии.
+        data может быть генератором: в памяти держится только текущая пачка.
+        Колонки берутся из model_dump записей, python-значения по умолчанию не применяются.
+
+        Возвращает число строк, при return_ids=True -- id строк в порядке data.
+        COPY не умеет RETURNING, поэтому id заранее берутся из последовательности таблицы.
+        """
+        connection = await self.get_driver_connection()
+        table = self.model.__table__
+        ids: list[int] = []
+        count = 0
+        for chunk in chunked(data, chunk_size):
+            rows = [item.model_dump() for item in chunk]
+            if return_ids:
+                chunk_ids = await self.reserve_ids(len(rows))
+                for row, row_id in zip(rows, chunk_ids):
+                    row["id"] = row_id
+                ids.extend(chunk_ids)
+            columns = list(rows[0])
+            await connection.copy_records_to_table(
+                table.name,
+                schema_name=table.schema,
+                columns=columns,
+                records=[tuple(row[column] for column in columns) for row in rows],
+            )
+            count += len(rows)
+        return ids if return_ids else count
+
+    async def upsert_bulk(
+        self,
+        data: Iterable[BaseModel],
+        index_elements: Sequence[str] = ("id",),
+        update_columns: Sequence[str] | None = None,
+        return_ids: bool = False,
+        chunk_size: int | None = None,
+    ) -> list[int] | int:
+        """
+        Идемпотентная загрузка: повторный импорт тех же данных не создаёт дублей.
+
+        insert into {table} (...) values (...), ...
+        on conflict ({index_elements}) do update set {column} = excluded.{column}, ...
+        returning id;
+
+        update_columns по умолчанию -- все колонки записи кроме index_elements,
+        пустой список -- on conflict do nothing (тогда id существующих строк не возвращаются).
+        chunk_size по умолчанию -- сколько строк влезает в лимит параметров запроса.
+        Возвращает число вставленных/обновлённых строк, при return_ids=True -- их id.
+        """
+        ids: list[int] = []
+        count = 0
+        for chunk in chunked(data, chunk_size or self.max_rows_per_statement()):
+            rows = [item.model_dump() for item in chunk]
+            stmt = pg_insert(self.model).values(rows)
+            if update_columns is None:
+                columns = [column for column in rows[0] if column not in index_elements]
+            else:
+                columns = list(update_columns)
+            if columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=index_elements,
+                    set_={column: stmt.excluded[column] for column in columns},
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+            if return_ids:
+                result = await self.session.execute(stmt.returning(self.model.__table__.c.id))
+                ids.extend(result.scalars().all())
+            else:
+                result = await self.session.execute(stmt)
+                count += result.rowcount  # type: ignore
+        return ids if return_ids else count
 
     async def edit(self, data: BaseModel, exclude_unset: bool = False, **filter_by) -> Any:
         stmt = (
@@ -106,3 +317,19 @@ class BaseRepository(Generic[ModelType, DataMapperType]):
 
     async def delete_all_rows(self) -> None:
         await self.session.execute(delete(self.model))
+
+    async def delete_batch(self, *filters, batch_size: int = DELETE_BATCH_SIZE) -> int:
+        """
+        delete from {table} where {pk} in (
+            select {pk} from {table} where ... order by {pk} limit {batch_size}
+        );
+
+        Одна пачка для удаления больших объёмов по частям с commit между пачками:
+        блокировки и WAL ограничены пачкой, а не всей выборкой. Возвращает число удалённых.
+        """
+        primary_key = self.model.__table__.primary_key.columns
+        batch = select(*primary_key).filter(*filters).order_by(*primary_key).limit(batch_size)
+        result = await self.session.execute(
+            delete(self.model).filter(tuple_(*primary_key).in_(batch))
+        )
+        return result.rowcount  # type: ignore
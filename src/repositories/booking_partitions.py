@@ -0,0 +1,163 @@
+import re
+from datetime import date, timedelta
+
+from sqlalchemy import Date, column, delete, insert, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.bookings.models import BOOKINGS_DEFAULT_PARTITION, BookingArchive, RoomUnitBooking
+from src.core.availability.base import get_pending_changes
+from src.repositories.room_occupancy import release_nights
+
+PARTITION_NAME = re.compile(r"^bookings_y(\d{4})m(\d{2})$")
+BOOKINGS_COLUMNS = ("id", "room_id", "user_id", "date_from", "date_to", "price")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"bookings_y{month.year}m{month.month:02d}"
+
+
+def last_check_out(month: date) -> date:
+    """Самый поздний возможный выезд для заездов месяца month"""
+    return add_months(month, 1) + timedelta(days=settings.BOOKING_MAX_NIGHTS - 1)
+
+
+def month_unit_bookings(month: date):
+    """Units броней с заездом в месяце month (ссылаются на строки его партиции)"""
+    return (RoomUnitBooking.booking_date_from >= month) & (
+        RoomUnitBooking.booking_date_from < add_months(month, 1)
+    )
+
+
+def partition_table(name: str):
+    return table(
+        name, *(column(c, Date) if c.startswith("date") else column(c) for c in BOOKINGS_COLUMNS)
+    )
+
+
+class BookingPartitionRepository:
+    """
+    Помесячные партиции bookings: bookings_y2024m10 -- заезды с 2024-10-01 по 2024-10-31.
+    Запросы с условием на date_from (заезды сегодня, загрузка движков доступности)
+    читают только нужные партиции.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get_partitions_months(self) -> list[date]:
+        """
+        select c.relname from pg_inherits i join pg_class c on c.oid = i.inhrelid
+        where i.inhparent = 'bookings'::regclass;
+        """
+        result = await self.session.execute(
+            text(
+                "select c.relname from pg_inherits i join pg_class c on c.oid = i.inhrelid "
+                "where i.inhparent = 'bookings'::regclass"
+            )
+        )
+        months = []
+        for (name,) in result.all():
+            match = PARTITION_NAME.match(name)
+            if match:
+                months.append(date(int(match[1]), int(match[2]), 1))
+        return sorted(months)
+
+    async def create_partition(self, month: date) -> str:
+        """
+        create table bookings_y2024m10 (like bookings including defaults including constraints);
+        with moved as (
+            delete from bookings_default
+            where date_from >= '2024-10-01' and date_from < '2024-11-01' returning *
+        )
+        insert into bookings_y2024m10 select * from moved;
+        alter table bookings attach partition bookings_y2024m10
+        for values from ('2024-10-01') to ('2024-11-01');
+
+        Брони этого месяца, уже попавшие в default-партицию, переносятся в новую,
+        иначе attach не пройдёт проверку default-партиции. Их units на время переноса
+        снимаются (delete из default каскадно удалил бы их) и возвращаются после attach.
+        """
+        name = partition_name(month)
+        date_from, date_to = month.isoformat(), add_months(month, 1).isoformat()
+        result = await self.session.execute(
+            delete(RoomUnitBooking)
+            .filter(month_unit_bookings(month))
+            .returning(*RoomUnitBooking.__table__.c)
+        )
+        unit_bookings = [dict(row) for row in result.mappings()]
+        await self.session.execute(
+            text(f"create table {name} (like bookings including defaults including constraints)")
+        )
+        await self.session.execute(
+            text(
+                f"with moved as (delete from {BOOKINGS_DEFAULT_PARTITION} "
+                "where date_from >= :date_from and date_from < :date_to returning *) "
+                f"insert into {name} select * from moved"
+            ),
+            {"date_from": month, "date_to": add_months(month, 1)},
+        )
+        await self.session.execute(
+            text(
+                f"alter table bookings attach partition {name} "
+                f"for values from ('{date_from}') to ('{date_to}')"
+            )
+        )
+        if unit_bookings:
+            await self.session.execute(insert(RoomUnitBooking), unit_bookings)
+        return name
+
+    async def ensure_partitions(self, first_month: date, last_month: date) -> list[str]:
+        """Создаёт недостающие партиции с first_month по last_month включительно"""
+        existing = set(await self.get_partitions_months())
+        created = []
+        month = first_month.replace(day=1)
+        while month <= last_month:
+            if month not in existing:
+                created.append(await self.create_partition(month))
+            month = add_months(month, 1)
+        return created
+
+    async def detach_partitions_before(
+        self, month: date, archive: bool = False, today: date | None = None
+    ) -> list[str]:
+        """
+        Отсоединяет партиции с заездами раньше month и снимает их ночи с room_occupancy.
+        Партиция, в которой ещё может идти проживание (last_check_out позже today),
+        не отсоединяется, даже если раньше month: её брони ещё держат номера.
+        Отсоединённая партиция остаётся отдельной таблицей, archive=True -- её строки
+        переносятся в bookings_archive, а таблица удаляется. Units этих броней удаляются:
+        иначе detach не пройдёт проверку внешнего ключа room_unit_bookings. Поэтому
+        проверка last_check_out защищает и исключающее ограничение: units ещё идущих
+        проживаний не снимаются.
+
+        alter table bookings detach partition bookings_y2024m10;
+        """
+        today = today or date.today()
+        detached = []
+        for partition_month in await self.get_partitions_months():
+            if add_months(partition_month, 1) > month or last_check_out(partition_month) > today:
+                break
+            name = partition_name(partition_month)
+            partition = partition_table(name)
+            await self.session.execute(release_nights(partition))
+            await self.session.execute(
+                delete(RoomUnitBooking).filter(month_unit_bookings(partition_month))
+            )
+            await self.session.execute(text(f"alter table bookings detach partition {name}"))
+            if archive:
+                await self.session.execute(
+                    insert(BookingArchive).from_select(
+                        BOOKINGS_COLUMNS, select(*(partition.c[c] for c in BOOKINGS_COLUMNS))
+                    )
+                )
+                await self.session.execute(text(f"drop table {name}"))
+            detached.append(name)
+        if detached:
+            get_pending_changes(self.session).invalidate()
+        return detached
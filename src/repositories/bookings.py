@@ -1,37 +1,301 @@
 from datetime import date
+from typing import Any, Iterable, Iterator, Sequence
 
-from sqlalchemy import select
+from pydantic import BaseModel
+from sqlalchemy import Date, delete, func, insert, literal, select, true, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.bookings.schemas import BookingCreate
-from src.exceptions import NoRoomsAvailableException
-from src.repositories.baserepo import BaseRepository
-from src.bookings.models import Booking
+from src.bookings.schemas import BookingIn, BookingInDB
+from src.core.availability.base import get_pending_changes
+from src.exceptions import NoRoomsAvailableException, RoomNotFoundException
+from src.repositories.baserepo import DELETE_BATCH_SIZE, BaseRepository
+from src.bookings.models import Booking, BookingArchive, RoomUnitBooking
 from src.repositories.mappers.mappers import BookingDataMapper
-from src.repositories.utils import get_available_rooms_ids
+from src.repositories.room_occupancy import RoomOccupancyRepository, release_nights
+from src.repositories.room_units import (
+    RoomUnitBookingRepository,
+    is_unit_taken,
+    pick_free_unit,
+    stay_range,
+)
 from src.rooms.models import Room
+from src.users.models import User
+from src.utils.utils import check_booking_nights_or_raise, chunked
+
+
+def checked_stays(data: Iterable[BaseModel]) -> Iterator[BaseModel]:
+    """Брони не длиннее BOOKING_MAX_NIGHTS: на этом держится отсоединение партиций"""
+    for booking in data:
+        check_booking_nights_or_raise(booking.date_from, booking.date_to)  # type: ignore
+        yield booking
 
 
 class BookingRepository(BaseRepository):
+    """
+    Все изменения bookings сразу отражаются в room_occupancy в той же транзакции.
+    Каждая бронь занимает unit номера в room_unit_bookings: перебронирование не даёт
+    исключающее ограничение, а не проверка доступности перед вставкой.
+    """
+
     model = Booking
     mapper = BookingDataMapper
 
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(session)
+        self.occupancy = RoomOccupancyRepository(session=session)
+        self.units = RoomUnitBookingRepository(session=session)
+
     async def get_bookings_with_today_checkin(self):
-        query = select(self.model).filter(self.model.date_from == date.today())
+        query = self.select_entities().filter(self.model.date_from == date.today())
         res = await self.session.execute(query)
-        return [self.mapper.map_to_domain_entity(booking) for booking in res.scalars().all()]
-
-    async def add_booking(self, booking_data: BookingCreate):
-        hotel_id_query = select(Room.hotel_id).filter(Room.id == booking_data.room_id)
-        result = await self.session.execute(hotel_id_query)
-        hotel_id = result.scalars().one()
-        available_rooms_ids = get_available_rooms_ids(
-            date_from=booking_data.date_from,
-            date_to=booking_data.date_to,
-            hotel_id=hotel_id,
-        )
-        available_rooms_ids = await self.session.execute(available_rooms_ids)
-        available_rooms_ids = available_rooms_ids.scalars().all()
-        if booking_data.room_id in available_rooms_ids:
-            return await self.add(booking_data)
-        else:
+        return self.map_rows(res)
+
+    async def create_booking(
+        self, booking_in: BookingIn, user_id: int
+    ) -> tuple[BookingInDB, str | None, int]:
+        """
+        Создаёт бронь одним запросом: цена, выбор свободного unit, вставка и email пользователя.
+        Возвращает бронь, email и hotel_id номера (для инвалидации кеша).
+
+        with room as (select id, hotel_id, price, quantity from rooms where id = {room_id}),
+        free_unit as (...),  -- см. pick_free_unit
+        new_booking as (
+            insert into bookings (room_id, user_id, date_from, date_to, price)
+            select id, {user_id}, {date_from}, {date_to}, price * {nights} from room, free_unit
+            returning *
+        ),
+        unit_booking as (
+            insert into room_unit_bookings (booking_id, booking_date_from, room_id, unit, stay)
+            select new_booking.id, new_booking.date_from, new_booking.room_id, free_unit.unit,
+                   daterange(new_booking.date_from, new_booking.date_to)
+            from new_booking, free_unit
+        )
+        select (select count(*) from room), (select hotel_id from room),
+               new_booking.*, users.email
+        from (select 1) one_row
+        left join new_booking on true
+        left join users on users.id = new_booking.user_id;
+
+        Если параллельная бронь успела занять тот же unit, запрос падает на
+        room_unit_bookings_no_overlap и повторяется в savepoint: следующая попытка
+        уже видит закоммиченную бронь и выбирает другой unit либо не находит свободных.
+        """
+        check_booking_nights_or_raise(booking_in.date_from, booking_in.date_to)
+        nights = (booking_in.date_to - booking_in.date_from).days
+        date_from = literal(booking_in.date_from, Date)
+        date_to = literal(booking_in.date_to, Date)
+
+        room = (
+            select(Room.id, Room.hotel_id, Room.price, Room.quantity)
+            .filter(Room.id == booking_in.room_id)
+            .cte("room")
+        )
+        quantity = select(room.c.quantity).scalar_subquery()
+        free_unit = pick_free_unit(booking_in.room_id, quantity, date_from, date_to).cte(
+            "free_unit"
+        )
+        new_booking = (
+            insert(self.model)
+            .from_select(
+                ["room_id", "user_id", "date_from", "date_to", "price"],
+                select(
+                    room.c.id, literal(user_id), date_from, date_to, room.c.price * nights
+                ).join_from(room, free_unit, true()),
+            )
+            .returning(*self.model.__table__.c)
+            .cte("new_booking")
+        )
+        unit_booking = (
+            insert(RoomUnitBooking)
+            .from_select(
+                ["booking_id", "booking_date_from", "room_id", "unit", "stay"],
+                select(
+                    new_booking.c.id,
+                    new_booking.c.date_from,
+                    new_booking.c.room_id,
+                    free_unit.c.unit,
+                    stay_range(new_booking.c.date_from, new_booking.c.date_to),
+                ).join_from(new_booking, free_unit, true()),
+            )
+            .cte("unit_booking")
+        )
+        one_row = select(literal(1).label("one")).subquery("one_row")
+        stmt = (
+            select(
+                select(func.count()).select_from(room).scalar_subquery().label("room_found"),
+                select(room.c.hotel_id).scalar_subquery().label("hotel_id"),
+                new_booking,
+                User.email,
+            )
+            .select_from(one_row)
+            .outerjoin(new_booking, true())
+            .outerjoin(User, User.id == new_booking.c.user_id)
+            .add_cte(unit_booking)
+        )
+        while True:
+            try:
+                async with self.session.begin_nested():
+                    row = (await self.session.execute(stmt)).mappings().one()
+                break
+            except IntegrityError as exc:
+                if not is_unit_taken(exc):
+                    raise
+
+        if not row["room_found"]:
+            raise RoomNotFoundException
+        if row["id"] is None:
             raise NoRoomsAvailableException
+
+        await self.occupancy.increment(
+            booking_in.room_id, booking_in.date_from, booking_in.date_to
+        )
+        return self.mapper.map_to_domain_entity(row), row["email"], row["hotel_id"]
+
+    async def add(self, data: BaseModel, exclude_unset: bool = False) -> BookingInDB:
+        """Вставка и выбор unit в одном savepoint: без свободного unit вставка откатывается"""
+        async with self.session.begin_nested():
+            booking: BookingInDB = await super().add(data, exclude_unset=exclude_unset)
+            if not await self.units.assign(
+                booking.id, booking.room_id, booking.date_from, booking.date_to
+            ):
+                raise NoRoomsAvailableException
+        await self.occupancy.increment(booking.room_id, booking.date_from, booking.date_to)
+        return booking
+
+    async def add_bulk(
+        self, data: Sequence[BaseModel], return_ids: bool = False
+    ) -> list[int] | None:
+        ids = await super().add_bulk(list(checked_stays(data)), return_ids=True)
+        await self.units.assign_bulk(ids)
+        await self.occupancy.increment_bookings(ids)
+        return ids if return_ids else None
+
+    async def copy_bulk(
+        self, data: Iterable[BaseModel], return_ids: bool = False, **kwargs
+    ) -> list[int] | int:
+        """Units и ночи загруженных броней добавляются после загрузки, а не по броне"""
+        ids = await super().copy_bulk(checked_stays(data), return_ids=True, **kwargs)
+        await self.units.assign_bulk(ids)
+        await self.occupancy.increment_bookings(ids)
+        return ids if return_ids else len(ids)
+
+    async def upsert_bulk(
+        self,
+        data: Iterable[BaseModel],
+        index_elements: Sequence[str] = ("id", "date_from"),
+        update_columns: Sequence[str] | None = None,
+        return_ids: bool = False,
+        chunk_size: int | None = None,
+    ) -> list[int] | int:
+        """
+        index_elements по умолчанию -- первичный ключ партиционированной таблицы.
+        По пачкам: прежние ночи обновлённых броней снимаются, ночи вставленных
+        и обновлённых добавляются.
+        """
+        ids: list[int] = []
+        for chunk in chunked(checked_stays(data), chunk_size or self.max_rows_per_statement()):
+            previous = await self.get_stays_by_keys(chunk, index_elements)
+            chunk_ids = await super().upsert_bulk(
+                chunk,
+                index_elements=index_elements,
+                update_columns=update_columns,
+                return_ids=True,
+            )
+            # on conflict do nothing не возвращает существующие строки, их ночи не трогаем
+            upserted = set(chunk_ids)
+            await self.occupancy.decrement_stays(
+                [tuple(stay) for booking_id, *stay in previous if booking_id in upserted]
+            )
+            await self.units.assign_bulk(chunk_ids)
+            await self.occupancy.increment_bookings(chunk_ids)
+            ids.extend(chunk_ids)
+        return ids if return_ids else len(ids)
+
+    async def get_stays_by_keys(
+        self, data: Sequence[BaseModel], index_elements: Sequence[str]
+    ) -> list[tuple[int, int, date, date]]:
+        """
+        select id, room_id, date_from, date_to from bookings
+        where ({index_elements}) in (...);
+        """
+        rows = [item.model_dump() for item in data]
+        keys = [
+            tuple(row[element] for element in index_elements)
+            for row in rows
+            if all(row.get(element) is not None for element in index_elements)
+        ]
+        if not keys:
+            return []
+        table = self.model.__table__
+        result = await self.session.execute(
+            select(table.c.id, table.c.room_id, table.c.date_from, table.c.date_to).filter(
+                tuple_(*(table.c[element] for element in index_elements)).in_(keys)
+            )
+        )
+        return [tuple(row) for row in result.all()]
+
+    async def edit(self, data: BaseModel, exclude_unset: bool = False, **filter_by) -> Any:
+        old_booking: BookingInDB = await self.get_one(**filter_by)
+        async with self.session.begin_nested():
+            await self.units.release(old_booking.id)
+            booking = await super().edit(data, exclude_unset=exclude_unset, **filter_by)
+            if not await self.units.assign(
+                booking.id, booking.room_id, booking.date_from, booking.date_to
+            ):
+                raise NoRoomsAvailableException
+        await self.occupancy.decrement(
+            old_booking.room_id, old_booking.date_from, old_booking.date_to
+        )
+        await self.occupancy.increment(booking.room_id, booking.date_from, booking.date_to)
+        return booking
+
+    async def delete(self, **filter_by) -> Any:
+        booking = await super().delete(**filter_by)
+        await self.occupancy.decrement(booking.room_id, booking.date_from, booking.date_to)
+        return booking
+
+    async def delete_all_rows(self) -> None:
+        await super().delete_all_rows()
+        await self.occupancy.delete_all_rows()
+
+    async def delete_batch(
+        self, *filters, batch_size: int = DELETE_BATCH_SIZE, archive: bool = False
+    ) -> int:
+        """
+        Удаляет пачку броней (archive=True -- переносит в bookings_archive) и тем же запросом
+        снимает их ночи с room_occupancy.
+
+        with deleted as (
+            delete from bookings where id in (
+                select id from bookings where ... order by id limit {batch_size}
+            ) returning *
+        ),
+        archived as (insert into bookings_archive (...) select ... from deleted),
+        released as (update room_occupancy ...)  -- см. release_nights(deleted)
+        select room_id, date_from, date_to from deleted;
+        """
+        batch = select(self.model.id).filter(*filters).order_by(self.model.id).limit(batch_size)
+        deleted = (
+            delete(self.model)
+            .filter(self.model.id.in_(batch))
+            .returning(*self.model.__table__.c)
+            .cte("deleted")
+        )
+        released = release_nights(deleted).cte("released")
+        # CTE с изменениями не упоминаются в основном select, поэтому добавляются явно
+        stmt = select(deleted.c.room_id, deleted.c.date_from, deleted.c.date_to).add_cte(released)
+        if archive:
+            columns = [column.name for column in self.model.__table__.c]
+            archived = (
+                insert(BookingArchive)
+                .from_select(columns, select(*(deleted.c[column] for column in columns)))
+                .cte("archived")
+            )
+            stmt = stmt.add_cte(archived)
+
+        rows = (await self.session.execute(stmt)).all()
+        pending_changes = get_pending_changes(self.session)
+        for room_id, date_from, date_to in rows:
+            pending_changes.booking_removed(room_id, date_from, date_to)
+        return len(rows)
@@ -17,8 +17,10 @@ class RoomFacilityRepository(BaseRepository[RoomFacility, RoomFacilityDataMapper
     mapper = RoomFacilityDataMapper
 
     async def update(self, room_data: RoomIn | RoomPatchIn | RoomUpdateIn, room_id: int):
-        existing_facilities = await self.get_filtered(room_id=room_id)
-        existing_facilities_ids = [f.facility_id for f in existing_facilities]
+        existing_facilities = await self.get_filtered_rows(
+            columns=["facility_id"], room_id=room_id
+        )
+        existing_facilities_ids = [row.facility_id for row in existing_facilities]
 
         if not room_data.facilities_ids:
             return
@@ -2,6 +2,7 @@ from datetime import date
 
 from sqlalchemy import func, select, Select
 
+from src.core.setup import availability_engine
 from src.hotels.models import Hotel
 from src.hotels.schemas import HotelInDB
 from src.repositories.baserepo import BaseRepository
@@ -23,20 +24,25 @@ class HotelRepository(BaseRepository):
         title: str | None = None,
         limit: int = 5,
         offset: int = 0,
+        after_id: int | None = None,
     ) -> list[HotelInDB]:
         check_date_range_or_raise(date_from, date_to)
 
-        available_rooms_ids: Select = get_available_rooms_ids(
-            date_from=date_from,
-            date_to=date_to,
+        available_hotels_ids: Select | list[int] | None = (
+            availability_engine.get_available_hotels_ids(date_from=date_from, date_to=date_to)
         )
-        available_hotels_ids: Select = (
-            select(Room.hotel_id)
-            .distinct()
-            .select_from(Room)
-            .filter(Room.id.in_(available_rooms_ids))
-        )
-        query: Select = select(Hotel).filter(Hotel.id.in_(available_hotels_ids))
+        if available_hotels_ids is None:
+            available_rooms_ids: Select = get_available_rooms_ids(
+                date_from=date_from,
+                date_to=date_to,
+            )
+            available_hotels_ids = (
+                select(Room.hotel_id)
+                .distinct()
+                .select_from(Room)
+                .filter(Room.id.in_(available_rooms_ids))
+            )
+        query: Select = self.select_entities().filter(Hotel.id.in_(available_hotels_ids))
 
         if location:
             location = location.strip().lower()
@@ -44,7 +50,9 @@ class HotelRepository(BaseRepository):
         if title:
             title = title.strip().lower()
             query = query.filter(func.lower(Hotel.title).contains(title))
-        query = query.offset(offset).limit(limit)
+        if after_id is not None:
+            query = query.filter(Hotel.id > after_id)
+        query = query.order_by(Hotel.id).offset(offset).limit(limit)
 
         result = await self.session.execute(query)
-        return [self.mapper.map_to_domain_entity(model) for model in result.scalars().all()]
+        return self.map_rows(result)
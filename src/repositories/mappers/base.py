@@ -1,7 +1,8 @@
-from typing import TypeVar, Protocol
+from functools import cache
+from typing import Callable, Sequence, TypeVar, Protocol
 
 from pydantic import BaseModel
-from sqlalchemy import Row, RowMapping
+from sqlalchemy import Column, Row, RowMapping
 
 from src.database import Base
 
@@ -9,6 +10,31 @@ from src.database import Base
 ModelType = TypeVar("ModelType", bound=Base)
 DomainEntityType = TypeVar("DomainEntityType", bound=BaseModel)
 
+_object_setattr = object.__setattr__
+
+
+@cache
+def get_schema_fields(schema: type[BaseModel]) -> tuple[str, ...]:
+    return tuple(schema.model_fields)
+
+
+@cache
+def get_row_builder(schema: type[DomainEntityType]) -> Callable[[Sequence], DomainEntityType]:
+    """Функция строка -> schema для значений в порядке полей схемы, без валидации"""
+    fields = get_schema_fields(schema)
+    fields_set = set(fields)
+    new = schema.__new__
+
+    def build(row: Sequence) -> DomainEntityType:
+        entity = new(schema)
+        _object_setattr(entity, "__dict__", dict(zip(fields, row)))
+        _object_setattr(entity, "__pydantic_fields_set__", fields_set.copy())
+        _object_setattr(entity, "__pydantic_extra__", None)
+        _object_setattr(entity, "__pydantic_private__", None)
+        return entity
+
+    return build
+
 
 class DataMapper(Protocol[ModelType, DomainEntityType]):
     db_model: type[ModelType]
@@ -21,3 +47,21 @@ class DataMapper(Protocol[ModelType, DomainEntityType]):
     @classmethod
     def map_to_persistence_entity(cls, data: DomainEntityType) -> ModelType:
         return cls.db_model(**data.model_dump())
+
+    @classmethod
+    def columns(cls) -> list[Column]:
+        """Колонки таблицы для полей schema, в порядке полей: select(*mapper.columns())"""
+        table = cls.db_model.__table__  # type: ignore
+        return [table.c[field] for field in get_schema_fields(cls.schema)]
+
+    @classmethod
+    def row_builder(cls) -> Callable[[Row | Sequence], DomainEntityType]:
+        """
+        Быстрый путь без валидации pydantic для строк из select(*cls.columns()).
+        Только для строк из нашей БД: типы колонок уже совпадают со схемой.
+        """
+        return get_row_builder(cls.schema)
+
+    @classmethod
+    def map_row_to_domain_entity(cls, row: Row | Sequence) -> DomainEntityType:
+        return get_row_builder(cls.schema)(row)
@@ -1,5 +1,5 @@
-from src.bookings.models import Booking
-from src.bookings.schemas import BookingInDB
+from src.bookings.models import Booking, RoomOccupancy
+from src.bookings.schemas import BookingInDB, RoomOccupancyInDB
 from src.facilities.models import Facility, RoomFacility
 from src.facilities.schemas import FacilityInDB, RoomFacilityInDB
 from src.repositories.mappers.base import DataMapper
@@ -26,6 +26,11 @@ class BookingDataMapper(DataMapper):
     schema = BookingInDB
 
 
+class RoomOccupancyDataMapper(DataMapper):
+    db_model = RoomOccupancy
+    schema = RoomOccupancyInDB
+
+
 class FacilityDataMapper(DataMapper):
     db_model = Facility
     schema = FacilityInDB
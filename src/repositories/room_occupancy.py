@@ -0,0 +1,195 @@
+from datetime import date
+from typing import Sequence
+
+from sqlalchemy import (
+    Date,
+    Integer,
+    any_,
+    cast,
+    column,
+    delete,
+    func,
+    literal,
+    select,
+    text,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.sql.dml import Insert, Update
+
+from src.bookings.models import Booking, RoomOccupancy
+from src.core.availability.base import get_pending_changes
+from src.repositories.baserepo import BaseRepository
+from src.repositories.mappers.mappers import RoomOccupancyDataMapper
+
+
+def nights_series(date_from, date_to):
+    """generate_series по ночам бронирования: date_from .. date_to - 1"""
+    return cast(
+        func.generate_series(date_from, date_to - 1, text("interval '1 day'")),
+        Date,
+    )
+
+
+def booked_nights_count(bookings):
+    """
+    select room_id, day, count(*) as booked_count
+    from (
+        select room_id, generate_series(date_from, date_to - 1, interval '1 day')::date as day
+        from {bookings}
+    ) booked_nights
+    group by room_id, day
+    """
+    booked_nights = select(
+        bookings.c.room_id,
+        nights_series(bookings.c.date_from, bookings.c.date_to).label("day"),
+    ).subquery("booked_nights")
+    return select(
+        booked_nights.c.room_id,
+        booked_nights.c.day,
+        func.count().label("booked_count"),
+    ).group_by(booked_nights.c.room_id, booked_nights.c.day)
+
+
+def occupy_nights(bookings) -> Insert:
+    """
+    Добавляет в room_occupancy ночи броней из bookings, зеркально release_nights:
+
+    insert into room_occupancy (room_id, day, booked_count)
+    select ... -- см. booked_nights_count
+    order by room_id, day
+    on conflict (room_id, day) do update
+    set booked_count = room_occupancy.booked_count + excluded.booked_count;
+
+    Строки берутся в порядке ключа, чтобы параллельные загрузки не ловили deadlock.
+    """
+    nights = booked_nights_count(bookings).order_by("room_id", "day")
+    stmt = insert(RoomOccupancy).from_select(["room_id", "day", "booked_count"], nights)
+    return stmt.on_conflict_do_update(
+        index_elements=[RoomOccupancy.room_id, RoomOccupancy.day],
+        set_={"booked_count": RoomOccupancy.booked_count + stmt.excluded.booked_count},
+    )
+
+
+def stays_values(stays: Sequence[tuple[int, date, date]]):
+    """(values (room_id, date_from, date_to), ...) stays -- для release_nights/occupy_nights"""
+    return values(
+        column("room_id", Integer),
+        column("date_from", Date),
+        column("date_to", Date),
+        name="stays",
+    ).data(list(stays))
+
+
+def release_nights(bookings) -> Update:
+    """
+    Снимает с room_occupancy ночи броней из bookings (таблица, партиция или CTE
+    с колонками room_id, date_from, date_to):
+
+    update room_occupancy set booked_count = room_occupancy.booked_count - nights.booked_count
+    from (
+        select room_id, day, count(*) as booked_count
+        from (
+            select room_id, generate_series(date_from, date_to - 1, interval '1 day')::date as day
+            from {bookings}
+        ) booked_nights
+        group by room_id, day
+    ) nights
+    where room_occupancy.room_id = nights.room_id and room_occupancy.day = nights.day;
+    """
+    nights = booked_nights_count(bookings).subquery("nights")
+    return (
+        update(RoomOccupancy)
+        .filter(RoomOccupancy.room_id == nights.c.room_id, RoomOccupancy.day == nights.c.day)
+        .values(booked_count=RoomOccupancy.booked_count - nights.c.booked_count)
+    )
+
+
+class RoomOccupancyRepository(BaseRepository[RoomOccupancy, RoomOccupancyDataMapper]):
+    model = RoomOccupancy
+    mapper = RoomOccupancyDataMapper
+
+    async def increment(self, room_id: int, date_from: date, date_to: date) -> None:
+        """
+        insert into room_occupancy (room_id, day, booked_count)
+        select {room_id}, generate_series({date_from}, {date_to} - 1, interval '1 day')::date, 1
+        on conflict (room_id, day) do update
+        set booked_count = room_occupancy.booked_count + excluded.booked_count;
+        """
+        nights = select(
+            literal(room_id).label("room_id"),
+            nights_series(literal(date_from, Date), literal(date_to, Date)).label("day"),
+            literal(1).label("booked_count"),
+        )
+        stmt = insert(self.model).from_select(["room_id", "day", "booked_count"], nights)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.room_id, self.model.day],
+            set_={"booked_count": self.model.booked_count + stmt.excluded.booked_count},
+        )
+        await self.session.execute(stmt)
+        get_pending_changes(self.session).booking_added(room_id, date_from, date_to)
+
+    async def increment_bookings(self, booking_ids: Sequence[int]) -> None:
+        """Ночи броней booking_ids одним запросом (после массовой загрузки)"""
+        if not booking_ids:
+            return
+        loaded = (
+            select(Booking.room_id, Booking.date_from, Booking.date_to)
+            .filter(Booking.id == any_(literal(list(booking_ids), ARRAY(Integer))))
+            .subquery("loaded")
+        )
+        await self.session.execute(occupy_nights(loaded))
+        get_pending_changes(self.session).invalidate()
+
+    async def decrement_stays(self, stays: Sequence[tuple[int, date, date]]) -> None:
+        """Снимает ночи (room_id, date_from, date_to) одним запросом"""
+        if not stays:
+            return
+        await self.session.execute(release_nights(stays_values(stays)))
+        get_pending_changes(self.session).invalidate()
+
+    async def decrement(self, room_id: int, date_from: date, date_to: date) -> None:
+        stmt = (
+            update(self.model)
+            .filter(
+                self.model.room_id == room_id,
+                self.model.day >= date_from,
+                self.model.day < date_to,
+            )
+            .values(booked_count=self.model.booked_count - 1)
+        )
+        await self.session.execute(stmt)
+        get_pending_changes(self.session).booking_removed(room_id, date_from, date_to)
+
+    async def delete_all_rows(self) -> None:
+        await super().delete_all_rows()
+        get_pending_changes(self.session).all_bookings_removed()
+
+    async def rebuild(self) -> None:
+        """
+        Пересчитывает room_occupancy с нуля по таблице bookings (backfill).
+
+        insert into room_occupancy (room_id, day, booked_count)
+        select room_id, day, count(*)
+        from (
+            select room_id, generate_series(date_from, date_to - 1, interval '1 day')::date as day
+            from bookings
+        ) booked_nights
+        group by room_id, day;
+        """
+        booked_nights = select(
+            Booking.room_id,
+            nights_series(Booking.date_from, Booking.date_to).label("day"),
+        ).subquery("booked_nights")
+        occupancy = select(
+            booked_nights.c.room_id,
+            booked_nights.c.day,
+            func.count().label("booked_count"),
+        ).group_by(booked_nights.c.room_id, booked_nights.c.day)
+
+        await self.session.execute(delete(self.model))
+        await self.session.execute(
+            insert(self.model).from_select(["room_id", "day", "booked_count"], occupancy)
+        )
+        get_pending_changes(self.session).invalidate()
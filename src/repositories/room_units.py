@@ -0,0 +1,204 @@
+import bisect
+from datetime import date
+from typing import Sequence
+
+from asyncpg import ExclusionViolationError
+from sqlalchemy import Integer, Select, any_, delete, func, insert, literal, not_, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, Range
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.bookings.models import Booking, RoomUnitBooking
+from src.exceptions import NoRoomsAvailableException
+from src.rooms.models import Room
+
+
+def stay_range(date_from, date_to):
+    """daterange({date_from}, {date_to}) -- полуинтервал [date_from, date_to)"""
+    return func.daterange(date_from, date_to)
+
+
+def pick_free_unit(room_id, quantity, date_from, date_to) -> Select:
+    """
+    select units.unit from generate_series(1, {quantity}) units(unit)
+    where not exists (
+        select 1 from room_unit_bookings
+        where room_id = {room_id} and unit = units.unit
+          and stay && daterange({date_from}, {date_to})
+    )
+    order by random() limit 1;
+
+    Случайный свободный unit, а не первый: параллельные брони реже выбирают один и тот же.
+    Аргументы -- значения или колонки CTE.
+    """
+    units = func.generate_series(1, quantity).table_valued("unit").render_derived("units")
+    occupied = (
+        select(1)
+        .select_from(RoomUnitBooking)
+        .filter(
+            RoomUnitBooking.room_id == room_id,
+            RoomUnitBooking.unit == units.c.unit,
+            RoomUnitBooking.stay.op("&&")(stay_range(date_from, date_to)),
+        )
+    )
+    return select(units.c.unit).filter(not_(occupied.exists())).order_by(func.random()).limit(1)
+
+
+def is_unit_taken(exc: IntegrityError) -> bool:
+    """Параллельная транзакция заняла тот же unit: нарушено room_unit_bookings_no_overlap"""
+    return isinstance(exc.orig.__cause__, ExclusionViolationError)  # type: ignore
+
+
+class RoomUnitBookingRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def assign(self, booking_id: int, room_id: int, date_from: date, date_to: date) -> bool:
+        """
+        Закрепляет за бронью свободный unit номера, False -- свободных нет.
+
+        insert into room_unit_bookings (booking_id, booking_date_from, room_id, unit, stay)
+        select {booking_id}, {date_from}, {room_id}, unit, daterange({date_from}, {date_to})
+        from (...) free_unit  -- см. pick_free_unit
+        returning unit;
+        """
+        quantity = select(Room.quantity).filter(Room.id == room_id).scalar_subquery()
+        free_unit = pick_free_unit(room_id, quantity, date_from, date_to).subquery("free_unit")
+        stmt = (
+            insert(RoomUnitBooking)
+            .from_select(
+                ["booking_id", "booking_date_from", "room_id", "unit", "stay"],
+                select(
+                    literal(booking_id),
+                    literal(date_from),
+                    literal(room_id),
+                    free_unit.c.unit,
+                    stay_range(literal(date_from), literal(date_to)),
+                ),
+            )
+            .returning(RoomUnitBooking.unit)
+        )
+        while True:
+            try:
+                # savepoint: после нарушения ограничения транзакция остаётся рабочей
+                async with self.session.begin_nested():
+                    result = await self.session.execute(stmt)
+                    return result.scalar_one_or_none() is not None
+            except IntegrityError as exc:
+                # unit заняли между выбором и вставкой -- выбираем другой;
+                # каждая такая ошибка значит, что другая бронь уже закоммичена
+                if not is_unit_taken(exc):
+                    raise
+
+    async def release(self, booking_id: int) -> None:
+        await self.session.execute(
+            delete(RoomUnitBooking).filter(RoomUnitBooking.booking_id == booking_id)
+        )
+
+    async def assign_bulk(self, booking_ids: Sequence[int]) -> None:
+        """
+        Назначает units броням booking_ids после массовой загрузки: снимает units
+        с изменившихся броней, читает брони без units и занятые units тех же номеров,
+        раскладывает брони жадно в python и вставляет все units одним executemany.
+        Число запросов не зависит от числа броней.
+        NoRoomsAvailableException, если какой-то брони не хватило номера.
+
+        delete from room_unit_bookings using bookings
+        where booking_id = any({booking_ids})
+          and bookings.id = booking_id and bookings.date_from = booking_date_from
+          and (bookings.room_id <> room_unit_bookings.room_id
+               or daterange(bookings.date_from, bookings.date_to) <> stay);
+        """
+        if not booking_ids:
+            return
+        ids = any_(literal(list(booking_ids), ARRAY(Integer)))
+        await self.session.execute(
+            delete(RoomUnitBooking)
+            .filter(
+                RoomUnitBooking.booking_id == ids,
+                Booking.id == RoomUnitBooking.booking_id,
+                Booking.date_from == RoomUnitBooking.booking_date_from,
+                (Booking.room_id != RoomUnitBooking.room_id)
+                | (stay_range(Booking.date_from, Booking.date_to) != RoomUnitBooking.stay),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        while True:
+            try:
+                async with self.session.begin_nested():
+                    await self._assign_missing(ids)
+                return
+            except IntegrityError as exc:
+                # параллельная бронь заняла выбранный unit -- раскладываем заново
+                if not is_unit_taken(exc):
+                    raise
+
+    async def _assign_missing(self, ids) -> None:
+        """
+        select bookings.id, room_id, date_from, date_to, rooms.quantity
+        from bookings join rooms on rooms.id = bookings.room_id
+        where bookings.id = any({booking_ids}) and not exists (...)
+        order by room_id, date_from, id;
+        select room_id, unit, lower(stay), upper(stay) from room_unit_bookings
+        where room_id = any({rooms_ids}) and stay && daterange({first_day}, {last_day});
+        """
+        has_unit = (
+            select(true())
+            .filter(
+                RoomUnitBooking.booking_id == Booking.id,
+                RoomUnitBooking.booking_date_from == Booking.date_from,
+            )
+            .exists()
+        )
+        result = await self.session.execute(
+            select(Booking.id, Booking.room_id, Booking.date_from, Booking.date_to, Room.quantity)
+            .join(Room, Room.id == Booking.room_id)
+            .filter(Booking.id == ids, not_(has_unit))
+            .order_by(Booking.room_id, Booking.date_from, Booking.id)
+        )
+        bookings = result.all()
+        if not bookings:
+            return
+
+        rooms_ids = sorted({booking.room_id for booking in bookings})
+        first_day = min(booking.date_from for booking in bookings)
+        last_day = max(booking.date_to for booking in bookings)
+        result = await self.session.execute(
+            select(
+                RoomUnitBooking.room_id,
+                RoomUnitBooking.unit,
+                func.lower(RoomUnitBooking.stay),
+                func.upper(RoomUnitBooking.stay),
+            ).filter(
+                RoomUnitBooking.room_id == any_(literal(rooms_ids, ARRAY(Integer))),
+                RoomUnitBooking.stay.op("&&")(stay_range(first_day, last_day)),
+            )
+        )
+        # (room_id, unit) -> отсортированные непересекающиеся [date_from, date_to)
+        stays: dict[tuple[int, int], list[tuple[date, date]]] = {}
+        for room_id, unit, date_from, date_to in result.all():
+            bisect.insort(stays.setdefault((room_id, unit), []), (date_from, date_to))
+
+        unit_bookings = []
+        for booking_id, room_id, date_from, date_to, quantity in bookings:
+            for unit in range(1, quantity + 1):
+                unit_stays = stays.setdefault((room_id, unit), [])
+                index = bisect.bisect_left(unit_stays, (date_from, date_to))
+                if index > 0 and unit_stays[index - 1][1] > date_from:
+                    continue
+                if index < len(unit_stays) and unit_stays[index][0] < date_to:
+                    continue
+                unit_stays.insert(index, (date_from, date_to))
+                break
+            else:
+                raise NoRoomsAvailableException
+            unit_bookings.append(
+                {
+                    "booking_id": booking_id,
+                    "booking_date_from": date_from,
+                    "room_id": room_id,
+                    "unit": unit,
+                    "stay": Range(date_from, date_to),
+                }
+            )
+        await self.session.execute(insert(RoomUnitBooking), unit_bookings)
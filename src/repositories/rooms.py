@@ -1,8 +1,12 @@
 from datetime import date
+from typing import Any, Iterable, Sequence
 
+from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
+from src.core.availability.base import get_pending_changes
+from src.core.setup import availability_engine
 from src.repositories.mappers.mappers import RoomDataMapper
 from src.rooms.schemas import RoomWithFacilities
 from src.rooms.models import Room
@@ -15,10 +19,39 @@ class RoomRepository(BaseRepository[Room, RoomDataMapper]):
     model = Room
     mapper = RoomDataMapper
 
+    async def add(self, data: BaseModel, exclude_unset: bool = False):
+        room = await super().add(data, exclude_unset=exclude_unset)
+        get_pending_changes(self.session).invalidate()
+        return room
+
+    async def edit(self, data: BaseModel, exclude_unset: bool = False, **filter_by) -> Any:
+        room = await super().edit(data, exclude_unset=exclude_unset, **filter_by)
+        get_pending_changes(self.session).invalidate()
+        return room
+
+    async def delete(self, **filter_by) -> Any:
+        room = await super().delete(**filter_by)
+        get_pending_changes(self.session).invalidate()
+        return room
+
+    async def add_bulk(self, data: Sequence[BaseModel]) -> None:
+        await super().add_bulk(data)
+        get_pending_changes(self.session).invalidate()
+
+    async def copy_bulk(self, data: Iterable[BaseModel], *args, **kwargs) -> list[int] | int:
+        result = await super().copy_bulk(data, *args, **kwargs)
+        get_pending_changes(self.session).invalidate()
+        return result
+
+    async def upsert_bulk(self, data: Iterable[BaseModel], *args, **kwargs) -> list[int] | int:
+        result = await super().upsert_bulk(data, *args, **kwargs)
+        get_pending_changes(self.session).invalidate()
+        return result
+
     async def get_all_by_hotel(self, hotel_id: int):
-        query = select(Room).filter_by(hotel_id=hotel_id)
+        query = self.select_entities().filter_by(hotel_id=hotel_id)
         result = await self.session.execute(query)
-        return [self.mapper.map_to_domain_entity(model) for model in result.scalars().all()]
+        return self.map_rows(result)
 
     async def get_one_or_none_with_facilities(self, **filter_by):
         query = (
@@ -36,11 +69,17 @@ class RoomRepository(BaseRepository[Room, RoomDataMapper]):
         """
         check_date_range_or_raise(date_from, date_to)
 
-        available_rooms_ids = get_available_rooms_ids(
+        available_rooms_ids = availability_engine.get_available_rooms_ids(
             date_from=date_from,
             date_to=date_to,
             hotel_id=hotel_id,
         )
+        if available_rooms_ids is None:
+            available_rooms_ids = get_available_rooms_ids(
+                date_from=date_from,
+                date_to=date_to,
+                hotel_id=hotel_id,
+            )
 
         stmt = (
             select(self.model)
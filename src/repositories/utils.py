@@ -2,7 +2,7 @@ from datetime import date
 
 from sqlalchemy import func, select, Select
 
-from src.bookings.models import Booking
+from src.bookings.models import RoomOccupancy
 from src.rooms.models import Room
 
 
@@ -12,59 +12,46 @@ def get_available_rooms_ids(
     hotel_id: int | None = None,
 ) -> Select:
     """
-    with FIND_OCCUPIED_ROOMS as (
-            select room_id, count( *) as num_of_occupied_rooms
-    from bookings
-    where date_from <= '2024-10-22' and date_to >= '2024-10-15'
-    group by room_id
-    ),
-    COUNT_FREE_ROOMS as (
-        select r.id as room_id, quantity - coalesce(num_of_occupied_rooms, 0) as num_of_free_rooms
-    from rooms r
-    left
-    join
-    FIND_OCCUPIED_ROOMS
-    on
-    r.id = FIND_OCCUPIED_ROOMS.room_id
+    with MAX_BOOKED_PER_ROOM as (
+        select room_id, max(booked_count) as max_booked
+        from room_occupancy
+        where day >= '2024-10-15' and day < '2024-10-22'
+        and room_id in (select id from rooms where hotel_id = {hotel_id})
+        group by room_id
     )
-    select *
-    from COUNT_FREE_ROOMS
-    where
-    num_of_free_rooms > 0 and room_id in
-    (select id from rooms where hotel_id = {hotel_id});
-    """
+    select r.id
+    from rooms r
+    left join MAX_BOOKED_PER_ROOM on r.id = MAX_BOOKED_PER_ROOM.room_id
+    where r.quantity - coalesce(max_booked, 0) > 0 and r.hotel_id = {hotel_id};
 
-    find_occupied_rooms = (
-        select(Booking.room_id, func.count("*").label("num_of_occupied_rooms"))
-        .select_from(Booking)
-        .filter(Booking.date_from <= date_to, Booking.date_to >= date_from)
-        .group_by(Booking.room_id)
-        .cte("find_occupied_rooms")
-    )
+    Занятость берётся из room_occupancy (range lookup по (room_id, day)),
+    а не пересчитывается по всей истории bookings.
+    """
 
-    num_of_occupied_rooms = func.coalesce(find_occupied_rooms.c.num_of_occupied_rooms, 0)
-    count_free_rooms = (
+    max_booked_per_room = (
         select(
-            Room.id.label("room_id"),
-            (Room.quantity - num_of_occupied_rooms).label("num_of_free_rooms"),
-        )
-        .join_from(
-            Room, find_occupied_rooms, Room.id == find_occupied_rooms.c.room_id, isouter=True
+            RoomOccupancy.room_id,
+            func.max(RoomOccupancy.booked_count).label("max_booked"),
         )
-        .cte("count_free_rooms")
+        .select_from(RoomOccupancy)
+        .filter(RoomOccupancy.day >= date_from, RoomOccupancy.day < date_to)
+        .group_by(RoomOccupancy.room_id)
     )
-
-    room_ids_of_hotel = select(Room.id).select_from(Room)
     if hotel_id is not None:
-        room_ids_of_hotel = room_ids_of_hotel.filter_by(hotel_id=hotel_id)
-    room_ids_of_hotel = room_ids_of_hotel.subquery()
+        max_booked_per_room = max_booked_per_room.filter(
+            RoomOccupancy.room_id.in_(select(Room.id).filter_by(hotel_id=hotel_id))
+        )
+    max_booked_per_room = max_booked_per_room.cte("max_booked_per_room")
+
+    max_booked = func.coalesce(max_booked_per_room.c.max_booked, 0)
     available_rooms_ids = (
-        select(count_free_rooms.c.room_id)
-        .select_from(count_free_rooms)
-        .filter(
-            count_free_rooms.c.num_of_free_rooms > 0,
-            count_free_rooms.c.room_id.in_(room_ids_of_hotel.element),
+        select(Room.id)
+        .join_from(
+            Room, max_booked_per_room, Room.id == max_booked_per_room.c.room_id, isouter=True
         )
+        .filter(Room.quantity - max_booked > 0)
     )
+    if hotel_id is not None:
+        available_rooms_ids = available_rooms_ids.filter(Room.hotel_id == hotel_id)
 
     return available_rooms_ids
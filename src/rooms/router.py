@@ -2,7 +2,14 @@ from datetime import date
 
 from fastapi import APIRouter, Body
 
-from src.dependencies import DBDep
+from src.core.cache_tags import (
+    ALL_HOTELS_AVAILABILITY_TAG,
+    FACILITIES_TAG,
+    HOTEL_AVAILABILITY_TAG,
+    tagged_key_builder,
+)
+from src.core.single_flight import coalesced_cache
+from src.dependencies import DBDep, ReadDBDep, SearchDBDep
 from src.exceptions import DateRangeException, HotelNotFoundException, RoomNotFoundException
 from src.httpexceptions import (
     DateRangeHTTPException,
@@ -14,12 +21,20 @@ from src.services.rooms import RoomService
 
 router = APIRouter(prefix="/hotels", tags=["Rooms"])
 
+ROOMS_CACHE_EXP = 60 * 60
+
 
 @router.get(
     "/{hotel_id}/rooms",
     summary="Получить все свободные номера для конкретного отеля для переданных дат",
 )
-async def get_rooms(hotel_id: int, db: DBDep, date_from: date, date_to: date):
+@coalesced_cache(
+    expire=ROOMS_CACHE_EXP,
+    key_builder=tagged_key_builder(
+        HOTEL_AVAILABILITY_TAG, ALL_HOTELS_AVAILABILITY_TAG, FACILITIES_TAG
+    ),
+)
+async def get_rooms(hotel_id: int, db: SearchDBDep, date_from: date, date_to: date):
     # try:
     #     return await db.rooms.get_filtered_by_date(
     #         hotel_id=hotel_id, date_from=date_from, date_to=date_to
@@ -36,7 +51,7 @@ async def get_rooms(hotel_id: int, db: DBDep, date_from: date, date_to: date):
 
 
 @router.get("/{hotel_id}/rooms/{room_id}", summary="Получить конкретный номер конкретного отеля")
-async def get_single_room(hotel_id: int, room_id: int, db: DBDep):
+async def get_single_room(hotel_id: int, room_id: int, db: ReadDBDep):
     try:
         return await RoomService(db).get_room_by_room_id(hotel_id, room_id)
     except RoomNotFoundException:
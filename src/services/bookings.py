@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+from typing import Callable
+
+from src.config import settings
+from src.core.cache_tags import invalidate_all_availability, wait_delayed_invalidations
+from src.core.setup import redis_manager
+from src.database import async_session_maker_null_pool
+from src.repositories.baserepo import DELETE_BATCH_SIZE
+from src.repositories.booking_partitions import add_months
+from src.services.base import BaseService
+from src.utils.db_manager import DBManager
+
+
+def get_ended_before(older_than_days: int | None) -> date | None:
+    """Граница для purge_bookings: брони, закончившиеся больше older_than_days дней назад"""
+    if older_than_days is None:
+        return None
+    return date.today() - timedelta(days=older_than_days)
+
+
+class BookingService(BaseService):
+    async def purge_bookings(
+        self,
+        ended_before: date | None = None,
+        archive: bool = False,
+        batch_size: int = DELETE_BATCH_SIZE,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> int:
+        """
+        Удаляет (archive=True -- переносит в архив) брони с date_to < ended_before, без него все,
+        пачками по batch_size с commit после каждой: блокировки держатся на одну пачку,
+        WAL и автовакуум успевают за удалением. on_progress получает число удалённых.
+        """
+        filters = []
+        if ended_before is not None:
+            filters.append(self.db.bookings.model.date_to < ended_before)
+
+        deleted = 0
+        try:
+            while True:
+                count = await self.db.bookings.delete_batch(
+                    *filters, batch_size=batch_size, archive=archive
+                )
+                await self.db.commit()
+                deleted += count
+                if on_progress is not None:
+                    on_progress(deleted)
+                if count < batch_size:
+                    return deleted
+        finally:
+            if deleted:
+                await invalidate_all_availability()
+
+    async def maintain_partitions(
+        self,
+        months_ahead: int,
+        retention_months: int = 0,
+        archive: bool = False,
+        today: date | None = None,
+    ) -> tuple[list[str], list[str]]:
+        """
+        Создаёт партиции bookings на months_ahead месяцев вперёд и отсоединяет
+        партиции старше retention_months месяцев (0 -- не отсоединять). Партиции, брони
+        которых ещё могут длиться (до BOOKING_MAX_NIGHTS ночей), остаются на месте.
+        Возвращает имена созданных и отсоединённых партиций.
+        """
+        today = today or date.today()
+        current_month = today.replace(day=1)
+        created = await self.db.booking_partitions.ensure_partitions(
+            current_month, add_months(current_month, months_ahead)
+        )
+        detached = []
+        if retention_months:
+            detached = await self.db.booking_partitions.detach_partitions_before(
+                add_months(current_month, -retention_months), archive=archive, today=today
+            )
+        await self.db.commit()
+        if detached:
+            await invalidate_all_availability()
+        return created, detached
+
+
+async def maintain_booking_partitions() -> dict[str, list[str]]:
+    """Обслуживание партиций по настройкам, вне приложения: для Celery beat и src.cli"""
+    # для инвалидации кеша свободных номеров после отсоединения партиций
+    await redis_manager.connect()
+    try:
+        async with DBManager(session_factory=async_session_maker_null_pool) as db:
+            created, detached = await BookingService(db).maintain_partitions(
+                months_ahead=settings.BOOKINGS_PARTITION_MONTHS_AHEAD,
+                retention_months=settings.BOOKINGS_PARTITION_RETENTION_MONTHS,
+                archive=settings.BOOKINGS_PARTITION_ARCHIVE,
+            )
+    finally:
+        await wait_delayed_invalidations()
+        await redis_manager.close()
+    return {"created": created, "detached": detached}
@@ -0,0 +1,155 @@
+"""
+Массовый импорт каталога: отели с номерами и id удобств номеров.
+
+NDJSON -- по отелю на строку:
+
+    {"title": "Skala", "location": "Алтай", "rooms": [{"title": "Люкс", "price": 24500,
+     "quantity": 2, "facilities_ids": [1, 2]}]}
+
+CSV -- по номеру на строку, номера одного отеля идут подряд, facilities_ids через ";".
+Отель без номеров -- строка с пустыми колонками номера:
+
+    hotel_title,hotel_location,room_title,room_description,price,quantity,facilities_ids
+    Skala,Алтай,Люкс,,24500,2,1;2
+
+Файл читается потоком и грузится через COPY пачками по chunk_size отелей,
+каждая пачка -- отдельная транзакция: при ошибке уже загруженные пачки остаются.
+Чтение и разбор пачки идут в threadpool, чтобы не блокировать event loop.
+"""
+
+import csv
+import time
+from typing import Callable, Iterable, Iterator, Literal
+
+from starlette.concurrency import iterate_in_threadpool
+
+from src.core.cache_tags import HOTELS_TAG, invalidate_all_availability, invalidate_tags
+from src.exceptions import CatalogImportException, FacilityNotFoundException
+from src.facilities.schemas import RoomFacilityCreate
+from src.hotels.schemas import (
+    CatalogImportProgress,
+    CatalogImportReport,
+    HotelCreateOrUpdate,
+    HotelImport,
+)
+from src.rooms.schemas import RoomCreate, RoomIn
+from src.services.base import BaseService
+from src.utils.utils import chunked
+
+CatalogFormat = Literal["ndjson", "csv"]
+
+IMPORT_CHUNK_SIZE = 1000  # отелей в одной транзакции
+
+
+def guess_catalog_format(filename: str | None) -> CatalogFormat:
+    return "csv" if filename and filename.lower().endswith(".csv") else "ndjson"
+
+
+def parse_ndjson(lines: Iterable[str]) -> Iterator[HotelImport]:
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield HotelImport.model_validate_json(line)
+        except ValueError as exc:
+            raise CatalogImportException(line_number, str(exc)) from exc
+
+
+def parse_csv_room(row: dict[str, str]) -> RoomIn:
+    facilities_ids = [int(f_id) for f_id in (row.get("facilities_ids") or "").split(";") if f_id]
+    return RoomIn(
+        title=row["room_title"],
+        description=row.get("room_description") or None,
+        price=row["price"],  # type: ignore
+        quantity=row["quantity"],  # type: ignore
+        facilities_ids=facilities_ids or None,
+    )
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[HotelImport]:
+    reader = csv.DictReader(lines)
+    hotel: HotelImport | None = None
+    for row in reader:
+        try:
+            if hotel is None or (hotel.title, hotel.location) != (
+                row["hotel_title"],
+                row["hotel_location"],
+            ):
+                if hotel is not None:
+                    yield hotel
+                hotel = HotelImport(title=row["hotel_title"], location=row["hotel_location"])
+            if row.get("room_title"):
+                hotel.rooms.append(parse_csv_room(row))
+        except (KeyError, ValueError) as exc:
+            raise CatalogImportException(reader.line_num, str(exc)) from exc
+    if hotel is not None:
+        yield hotel
+
+
+def read_catalog(lines: Iterable[str], file_format: CatalogFormat) -> Iterator[HotelImport]:
+    return parse_csv(lines) if file_format == "csv" else parse_ndjson(lines)
+
+
+class CatalogImportService(BaseService):
+    async def import_catalog(
+        self,
+        hotels: Iterable[HotelImport],
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        on_progress: Callable[[CatalogImportReport], None] | None = None,
+    ) -> CatalogImportReport:
+        """on_progress вызывается после commit каждой пачки"""
+        report = CatalogImportReport()
+        started = time.perf_counter()
+        known_facilities = {
+            row.id for row in await self.db.facilities.get_filtered_rows(columns=["id"])
+        }
+        try:
+            async for chunk in iterate_in_threadpool(chunked(hotels, chunk_size)):
+                await self._import_chunk(chunk, known_facilities, report)
+                await self.db.commit()
+
+                report.seconds = time.perf_counter() - started
+                report.rows_per_second = (
+                    report.hotels + report.rooms + report.room_facilities
+                ) / report.seconds
+                report.progress.append(
+                    CatalogImportProgress(**report.model_dump(exclude={"progress"}))
+                )
+                if on_progress is not None:
+                    on_progress(report)
+        finally:
+            if report.hotels:
+                await invalidate_tags(HOTELS_TAG)
+                await invalidate_all_availability()
+        return report
+
+    async def _import_chunk(
+        self, hotels: list[HotelImport], known_facilities: set[int], report: CatalogImportReport
+    ) -> None:
+        hotels_ids = await self.db.hotels.copy_bulk(
+            [
+                HotelCreateOrUpdate.model_construct(title=hotel.title, location=hotel.location)
+                for hotel in hotels
+            ],
+            return_ids=True,
+        )
+        rooms = [
+            (room, RoomCreate(hotel_id=hotel_id, **room.model_dump(exclude={"facilities_ids"})))
+            for hotel, hotel_id in zip(hotels, hotels_ids)  # type: ignore
+            for room in hotel.rooms
+        ]
+        rooms_ids = await self.db.rooms.copy_bulk(
+            [room_create for _, room_create in rooms], return_ids=True
+        )
+        room_facilities = [
+            RoomFacilityCreate(room_id=room_id, facility_id=facility_id)
+            for (room, _), room_id in zip(rooms, rooms_ids)  # type: ignore
+            for facility_id in room.facilities_ids or []
+        ]
+        if not known_facilities.issuperset(rf.facility_id for rf in room_facilities):
+            raise FacilityNotFoundException
+        await self.db.rooms_facilities.copy_bulk(room_facilities)
+
+        report.hotels += len(hotels)
+        report.rooms += len(rooms)
+        report.room_facilities += len(room_facilities)
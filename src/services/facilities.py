@@ -1,3 +1,4 @@
+from src.core.cache_tags import FACILITIES_TAG, invalidate_tags
 from src.exceptions import ObjectNotFoundException, FacilityNotFoundException
 from src.facilities.schemas import FacilityIn
 from src.services.base import BaseService
@@ -16,12 +17,14 @@ class FacilityService(BaseService):
     async def create_facility(self, facility_data: FacilityIn):
         created_facility = await self.db.facilities.add(facility_data)
         await self.db.commit()
+        await invalidate_tags(FACILITIES_TAG)
         return created_facility
 
     async def update_facility(self, facility_id: int, facility_data: FacilityIn):
         try:
             updated_facility = await self.db.facilities.edit(facility_data, id=facility_id)
             await self.db.commit()
+            await invalidate_tags(FACILITIES_TAG)
             return updated_facility
         except ObjectNotFoundException:
             raise FacilityNotFoundException
@@ -30,6 +33,7 @@ class FacilityService(BaseService):
         try:
             deleted_facility = await self.db.facilities.delete(id=facility_id)
             await self.db.commit()
+            await invalidate_tags(FACILITIES_TAG)
             return deleted_facility
         except ObjectNotFoundException:
             raise FacilityNotFoundException
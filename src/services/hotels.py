@@ -1,7 +1,9 @@
 from datetime import date
 
+from src.core.cache_tags import HOTEL_AVAILABILITY_TAG, HOTEL_TAG, HOTELS_TAG, invalidate_tags
 from src.hotels.schemas import HotelInDB, HotelCreateOrUpdate, HotelPATCH
 from src.services.base import BaseService
+from src.utils.pagination import CursorPage, make_cursor_page
 from src.utils.utils import check_date_range_or_raise
 
 
@@ -13,40 +15,59 @@ class HotelService(BaseService):
         title: str | None,
         date_from: date,
         date_to: date,
-    ) -> list[HotelInDB]:
+    ) -> list[HotelInDB] | CursorPage[HotelInDB]:
         check_date_range_or_raise(date_from, date_to)
 
-        offset = (paginator.page - 1) * paginator.per_page
-        limit = paginator.per_page
+        if paginator.is_cursor_mode:
+            hotels = await self.db.hotels.get_filtered_by_date(
+                date_from=date_from,
+                date_to=date_to,
+                location=location,
+                title=title,
+                limit=paginator.per_page + 1,
+                after_id=paginator.after_id,
+            )
+            return make_cursor_page(hotels, paginator.per_page)
 
         return await self.db.hotels.get_filtered_by_date(
             date_from=date_from,
             date_to=date_to,
             location=location,
             title=title,
-            limit=limit,
-            offset=offset,
+            limit=paginator.per_page,
+            offset=paginator.offset,
         )
 
     async def get_hotel_by_id(self, hotel_id: int):
         return await self.db.hotels.get_one(id=hotel_id)
 
+    async def hotel_exists(self, hotel_id: int) -> bool:
+        return await self.db.hotels.exists(id=hotel_id)
+
     async def create_hotel(self, hotel_data: HotelCreateOrUpdate):
         hotel: HotelInDB = await self.db.hotels.add(hotel_data)
         await self.db.commit()
+        await invalidate_tags(HOTELS_TAG)
         return hotel
 
     async def update_hotel(self, hotel_id: int, data: HotelCreateOrUpdate):
         hotel: HotelInDB = await self.db.hotels.edit(data, id=hotel_id)
         await self.db.commit()
+        await invalidate_tags(HOTELS_TAG, HOTEL_TAG.format(hotel_id=hotel_id))
         return hotel
 
     async def patch_hotel(self, hotel_id: int, data: HotelPATCH):
         hotel: HotelInDB = await self.db.hotels.edit(data, exclude_unset=True, id=hotel_id)
         await self.db.commit()
+        await invalidate_tags(HOTELS_TAG, HOTEL_TAG.format(hotel_id=hotel_id))
         return hotel
 
     async def delete_hotel(self, hotel_id: int):
         hotel: HotelInDB = await self.db.hotels.delete(id=hotel_id)
         await self.db.commit()
+        await invalidate_tags(
+            HOTELS_TAG,
+            HOTEL_TAG.format(hotel_id=hotel_id),
+            HOTEL_AVAILABILITY_TAG.format(hotel_id=hotel_id),
+        )
         return hotel
@@ -1,5 +1,6 @@
 from datetime import date
 
+from src.core.cache_tags import invalidate_hotel_availability
 from src.exceptions import ObjectNotFoundException, HotelNotFoundException, RoomNotFoundException
 from src.facilities.schemas import RoomFacilityCreate
 from src.rooms.schemas import (
@@ -20,18 +21,14 @@ class RoomService(BaseService):
     async def get_rooms(self, hotel_id: int, date_from: date, date_to: date):
         check_date_range_or_raise(date_from, date_to)
 
-        try:
-            _ = await HotelService(self.db).get_hotel_by_id(hotel_id)
-        except ObjectNotFoundException:
+        if not await HotelService(self.db).hotel_exists(hotel_id):
             raise HotelNotFoundException
         return await self.db.rooms.get_filtered_by_date(
             hotel_id=hotel_id, date_from=date_from, date_to=date_to
         )
 
     async def get_room_by_room_id(self, hotel_id: int, room_id: int):
-        try:
-            _ = await HotelService(self.db).get_hotel_by_id(hotel_id)
-        except ObjectNotFoundException:
+        if not await HotelService(self.db).hotel_exists(hotel_id):
             raise HotelNotFoundException
         try:
             return await self.db.rooms.get_one(id=room_id, hotel_id=hotel_id)
@@ -39,9 +36,7 @@ class RoomService(BaseService):
             raise RoomNotFoundException
 
     async def create_room(self, hotel_id: int, room_data: RoomIn):
-        try:
-            _ = await HotelService(self.db).get_hotel_by_id(hotel_id)
-        except ObjectNotFoundException:
+        if not await HotelService(self.db).hotel_exists(hotel_id):
             raise HotelNotFoundException
         # TODO: add checking if facilities exist
         _room_data = RoomCreate(hotel_id=hotel_id, **room_data.model_dump())
@@ -53,6 +48,7 @@ class RoomService(BaseService):
             ]
             await self.db.rooms_facilities.add_bulk(room_facilities)
         await self.db.commit()
+        await invalidate_hotel_availability(hotel_id)
         return created_room
 
     async def patch_room(self, hotel_id: int, room_id: int, room_data: RoomPatchIn):
@@ -66,6 +62,7 @@ class RoomService(BaseService):
 
         await self.db.rooms_facilities.update(room_data, room_id)
         await self.db.commit()
+        await invalidate_hotel_availability(hotel_id)
 
         return patched_room
 
@@ -77,10 +74,12 @@ class RoomService(BaseService):
         )
         await self.db.rooms_facilities.update(room_data, room_id)
         await self.db.commit()
+        await invalidate_hotel_availability(hotel_id)
         return updated_room
 
     async def delete_room(self, hotel_id: int, room_id: int):
         _: RoomInDB = await self.get_room_by_room_id(hotel_id, room_id)
         await self.db.rooms.delete(id=room_id, hotel_id=hotel_id)
         await self.db.commit()
+        await invalidate_hotel_availability(hotel_id)
         return {"message": "Room deleted"}
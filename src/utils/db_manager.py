@@ -1,29 +1,97 @@
+from functools import cached_property
+
+from sqlalchemy import event, func, select
+
+from src.core.availability.base import pop_pending_changes
+from src.core.setup import availability_engine
 from src.repositories.auth import AuthRepository
+from src.repositories.booking_partitions import BookingPartitionRepository
 from src.repositories.bookings import BookingRepository
 from src.repositories.facilities import FacilityRepository, RoomFacilityRepository
 from src.repositories.hotels import HotelRepository
+from src.repositories.room_occupancy import RoomOccupancyRepository
 from src.repositories.rooms import RoomRepository
 
 
 class DBManager:
-    def __init__(self, session_factory):
+    """
+    Репозитории создаются при первом обращении: запрос, которому нужны только отели,
+    не собирает остальные.
+
+    read_only -- каждая транзакция сессии только на чтение.
+    statement_timeout -- ограничение в мс на запрос внутри транзакций этой сессии.
+    """
+
+    def __init__(
+        self, session_factory, read_only: bool = False, statement_timeout: int | None = None
+    ):
         self.session_factory = session_factory
+        self.read_only = read_only
+        self.statement_timeout = statement_timeout
 
     async def __aenter__(self):
         self.session = self.session_factory()
+        if self.read_only or self.statement_timeout:
+            event.listen(self.session.sync_session, "after_begin", self._configure_transaction)
+        return self
 
-        self.hotels = HotelRepository(session=self.session)
-        self.rooms = RoomRepository(session=self.session)
-        self.auth = AuthRepository(session=self.session)
-        self.bookings = BookingRepository(session=self.session)
-        self.facilities = FacilityRepository(session=self.session)
-        self.rooms_facilities = RoomFacilityRepository(session=self.session)
+    def _configure_transaction(self, session, transaction, connection):
+        """
+        select set_config('transaction_read_only', 'on', true),
+               set_config('statement_timeout', '{statement_timeout}', true);
 
-        return self
+        Эквивалент SET TRANSACTION READ ONLY и SET LOCAL statement_timeout за один round trip.
+        Настройки локальны для транзакции и не утекают в пул вместе с соединением.
+        """
+        settings = []
+        if self.read_only:
+            settings.append(func.set_config("transaction_read_only", "on", True))
+        if self.statement_timeout:
+            settings.append(
+                func.set_config("statement_timeout", str(self.statement_timeout), True)
+            )
+        connection.execute(select(*settings))
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.session.rollback()
+        pop_pending_changes(self.session)
+        # close() откатывает незавершённую транзакцию, возвращая соединение в пул;
+        # если транзакция не начиналась, к базе не ходим вовсе
         await self.session.close()
 
+    @cached_property
+    def hotels(self) -> HotelRepository:
+        return HotelRepository(session=self.session)
+
+    @cached_property
+    def rooms(self) -> RoomRepository:
+        return RoomRepository(session=self.session)
+
+    @cached_property
+    def auth(self) -> AuthRepository:
+        return AuthRepository(session=self.session)
+
+    @cached_property
+    def bookings(self) -> BookingRepository:
+        return BookingRepository(session=self.session)
+
+    @cached_property
+    def booking_partitions(self) -> BookingPartitionRepository:
+        return BookingPartitionRepository(session=self.session)
+
+    @cached_property
+    def facilities(self) -> FacilityRepository:
+        return FacilityRepository(session=self.session)
+
+    @cached_property
+    def rooms_facilities(self) -> RoomFacilityRepository:
+        return RoomFacilityRepository(session=self.session)
+
+    @cached_property
+    def room_occupancy(self) -> RoomOccupancyRepository:
+        return RoomOccupancyRepository(session=self.session)
+
     async def commit(self):
         await self.session.commit()
+        changes = pop_pending_changes(self.session)
+        if changes:
+            availability_engine.apply(changes)
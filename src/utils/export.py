@@ -0,0 +1,38 @@
+"""
+Кодирование пачек строк для потоковой выгрузки через StreamingResponse.
+В памяти держится только текущая пачка, размер выгрузки не ограничен.
+"""
+
+import csv
+import io
+import json
+from typing import AsyncIterable, AsyncIterator, Literal, Sequence
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES: dict[ExportFormat, str] = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def encode_ndjson(rows: Sequence[Sequence], columns: Sequence[str]) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n" for row in rows
+    )
+
+
+def encode_csv(rows: Sequence[Sequence]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def encode_rows(
+    batches: AsyncIterable[Sequence[Sequence]], columns: Sequence[str], file_format: ExportFormat
+) -> AsyncIterator[str]:
+    """Одна пачка строк -> один chunk ответа; у CSV первой строкой идёт заголовок"""
+    if file_format == "csv":
+        yield encode_csv([columns])
+        async for rows in batches:
+            yield encode_csv(rows)
+    else:
+        async for rows in batches:
+            yield encode_ndjson(rows, columns)
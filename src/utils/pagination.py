@@ -0,0 +1,41 @@
+import base64
+import binascii
+import json
+from typing import Generic, Sequence, TypeVar
+
+from pydantic import BaseModel
+
+from src.exceptions import InvalidCursorException
+
+ItemType = TypeVar("ItemType", bound=BaseModel)
+
+
+class CursorPage(BaseModel, Generic[ItemType]):
+    data: list[ItemType]
+    next_cursor: str | None = None
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int | None:
+    """Пустой курсор - первая страница"""
+    if not cursor:
+        return None
+    try:
+        last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursorException
+    if not isinstance(last_id, int):
+        raise InvalidCursorException
+    return last_id
+
+
+def make_cursor_page(items: Sequence[ItemType], per_page: int) -> CursorPage[ItemType]:
+    """items выбраны с limit=per_page + 1: лишний элемент означает, что есть следующая страница"""
+    page = list(items[:per_page])
+    next_cursor = None
+    if len(items) > per_page:
+        next_cursor = encode_cursor(page[-1].id)  # type: ignore[attr-defined]
+    return CursorPage[ItemType](data=page, next_cursor=next_cursor)
@@ -1,9 +1,28 @@
 from datetime import date
+from itertools import islice
+from typing import Iterable, Iterator, TypeVar
 
+from src.config import settings
 from src.exceptions import DateRangeException
 
+T = TypeVar("T")
+
 
 def check_date_range_or_raise(date_from: date, date_to: date) -> None:
     """raises DateRangeException if date_from >= date_to"""
     if date_from >= date_to:
         raise DateRangeException
+
+
+def check_booking_nights_or_raise(date_from: date, date_to: date) -> None:
+    """как check_date_range_or_raise, плюс бронь не длиннее settings.BOOKING_MAX_NIGHTS"""
+    check_date_range_or_raise(date_from, date_to)
+    if (date_to - date_from).days > settings.BOOKING_MAX_NIGHTS:
+        raise DateRangeException
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Пачки по size элементов, последняя может быть короче (itertools.batched из python 3.12)"""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
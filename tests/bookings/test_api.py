@@ -1,3 +1,5 @@
+import json
+import uuid
 from datetime import date
 
 import pytest
@@ -12,6 +14,8 @@ from tests.conftest import get_db_null_pool
         (1, "2024-10-18", "2024-10-25", 24500, 200),
         (1, "2024-10-18", "2024-10-25", 24500, 409),
         (1, "2024-11-18", "2024-11-25", 24500, 200),
+        (1, "2024-11-25", "2024-11-18", 24500, 409),
+        (100, "2024-11-18", "2024-11-25", 24500, 404),
     ],
 )
 async def test_create_booking(
@@ -91,3 +95,34 @@ async def test_add_and_get_my_bookings(
     my_bookings = await authenticated_ac.get("/bookings/me")
     assert my_bookings.status_code == 200
     assert len(my_bookings.json()) == num_of_bookings
+
+
+async def test_export_bookings(authenticated_ac):
+    my_bookings = (await authenticated_ac.get("/bookings/me")).json()
+
+    response = await authenticated_ac.get("/bookings/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert exported == sorted(my_bookings, key=lambda booking: booking["id"])
+
+    response = await authenticated_ac.get("/bookings/export", params={"format": "csv"})
+    assert response.status_code == 200
+    header, *rows = response.text.splitlines()
+    assert header == "room_id,date_from,date_to,price,user_id,id"
+    assert len(rows) == len(exported)
+
+
+async def test_delete_old_bookings(authenticated_ac):
+    response = await authenticated_ac.delete(
+        "/bookings/delete_all", params={"older_than_days": 36500}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"message": "Bookings deleted", "deleted": 0}
+
+
+async def test_get_purge_status(authenticated_ac):
+    response = await authenticated_ac.get(f"/bookings/purge/{uuid.uuid4()}")
+    assert response.status_code == 200
+    # неизвестная Celery задача считается ещё не начатой
+    assert response.json() == {"state": "PENDING", "deleted": 0}
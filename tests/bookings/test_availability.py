@@ -0,0 +1,66 @@
+from datetime import date, timedelta
+
+import pytest
+
+from src.bookings.schemas import BookingCreate
+from src.config import settings
+from src.core.availability.base import get_pending_changes
+from src.core.availability.interval_index import IntervalIndexEngine
+from src.core.availability.occupancy_matrix import OccupancyMatrixEngine
+from src.database import async_session_maker_null_pool
+from src.repositories.utils import get_available_rooms_ids
+from src.rooms.schemas import RoomInDB
+from src.users.schemas import UserInDB
+
+
+@pytest.mark.parametrize(
+    "make_engine",
+    [
+        lambda: IntervalIndexEngine(max_age=settings.AVAILABILITY_INDEX_MAX_AGE),
+        lambda: OccupancyMatrixEngine(
+            max_age=settings.AVAILABILITY_INDEX_MAX_AGE, days=settings.AVAILABILITY_MATRIX_DAYS
+        ),
+    ],
+    ids=["interval_index", "occupancy_matrix"],
+)
+async def test_in_memory_engine_matches_sql(make_engine, db):
+    engine = make_engine()
+    await engine.load(async_session_maker_null_pool)
+
+    users: list[UserInDB] = await db.auth.get_all()
+    rooms: list[RoomInDB] = await db.rooms.get_all()
+    room = min(rooms, key=lambda r: r.quantity)
+    # внутри горизонта матрицы, который отсчитывается от сегодняшнего дня
+    day = date.today() + timedelta(days=100)
+    for _ in range(room.quantity):
+        await db.bookings.add(
+            BookingCreate(
+                room_id=room.id,
+                user_id=users[0].id,
+                date_from=day + timedelta(days=9),
+                date_to=day + timedelta(days=14),
+                price=1000,
+            )
+        )
+    engine.apply(get_pending_changes(db.session))
+
+    windows = [
+        (day, day + timedelta(days=9)),
+        (day + timedelta(days=4), day + timedelta(days=10)),
+        (day + timedelta(days=13), day + timedelta(days=19)),
+        (day + timedelta(days=14), day + timedelta(days=19)),
+    ]
+    for date_from, date_to in windows:
+        from_index = engine.get_available_rooms_ids(date_from, date_to)
+        assert from_index is not None, "Fresh index must answer without SQL"
+        result = await db.session.execute(get_available_rooms_ids(date_from, date_to))
+        assert sorted(from_index) == sorted(result.scalars().all()), (date_from, date_to)
+
+        hotels_ids = engine.get_available_hotels_ids(date_from, date_to)
+        assert hotels_ids is not None
+        rooms = await db.rooms.get_filtered(db.rooms.model.id.in_(from_index))
+        assert sorted(hotels_ids) == sorted({r.hotel_id for r in rooms})
+
+    assert (
+        engine.get_available_rooms_ids(date(2000, 1, 1), date(2000, 1, 2)) is None
+    ), "Dates before the loaded horizon must fall back to SQL"
@@ -0,0 +1,37 @@
+import asyncio
+
+NUM_OF_REQUESTS = 200
+MAX_IN_FLIGHT = 50  # каждый запрос держит своё соединение (NullPool)
+
+
+async def test_no_overbooking_under_concurrent_requests(authenticated_ac, db):
+    response = await authenticated_ac.post(
+        "/hotels/", json={"title": "Concurrency hotel", "location": "Concurrency st. 1"}
+    )
+    hotel_id = response.json()["data"]["id"]
+    quantity = 5
+    response = await authenticated_ac.post(
+        f"/hotels/{hotel_id}/rooms",
+        json={"title": "Last free room", "price": 1000, "quantity": quantity},
+    )
+    room_id = response.json()["data"]["id"]
+
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+
+    async def book():
+        async with in_flight:
+            return await authenticated_ac.post(
+                "/bookings/",
+                json={"room_id": room_id, "date_from": "2030-06-01", "date_to": "2030-06-08"},
+            )
+
+    responses = await asyncio.gather(*[book() for _ in range(NUM_OF_REQUESTS)])
+    status_codes = [r.status_code for r in responses]
+
+    assert status_codes.count(200) == quantity, status_codes
+    assert status_codes.count(409) == NUM_OF_REQUESTS - quantity, status_codes
+
+    bookings = await db.bookings.get_filtered(room_id=room_id)
+    assert len(bookings) == quantity
+    occupancy = await db.room_occupancy.get_filtered(room_id=room_id)
+    assert all(o.booked_count == quantity for o in occupancy)
@@ -1,7 +1,17 @@
-from datetime import date
+from datetime import date, timedelta
 
+import pytest
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.postgresql import Range
+from sqlalchemy.exc import IntegrityError
+
+from src.bookings.models import Booking, BookingArchive, RoomUnitBooking
 from src.bookings.schemas import BookingCreate
+from src.exceptions import DateRangeException, NoRoomsAvailableException
+from src.repositories.booking_partitions import add_months
+from src.repositories.room_units import is_unit_taken
 from src.rooms.schemas import RoomInDB
+from src.services.bookings import BookingService
 from src.users.schemas import UserInDB
 
 
@@ -13,8 +23,8 @@ async def test_booking_crud(db):
     booking_data = BookingCreate(
         room_id=room_id,
         user_id=user_id,
-        date_from=date(2024, 10, 18),
-        date_to=date(2024, 10, 25),
+        date_from=date(2024, 9, 18),
+        date_to=date(2024, 9, 25),
         price=1000,
     )
     ret_booking = await db.bookings.add(booking_data)
@@ -23,8 +33,8 @@ async def test_booking_crud(db):
     read_booking = await db.bookings.get_one_or_none(id=ret_booking.id)
     assert read_booking, "Booking wasn't added to db"
     assert read_booking.price == 1000, "Price isn't equal to provided"
-    assert read_booking.date_from == date(2024, 10, 18), "date_from isn't equal to provided"
-    assert read_booking.date_to == date(2024, 10, 25), "date_to isn't equal to provided"
+    assert read_booking.date_from == date(2024, 9, 18), "date_from isn't equal to provided"
+    assert read_booking.date_to == date(2024, 9, 25), "date_to isn't equal to provided"
 
     update_booking = BookingCreate(
         room_id=room_id,
@@ -44,3 +54,230 @@ async def test_booking_crud(db):
 
     ret_booking_after_delete = await db.bookings.get_one_or_none(id=ret_booking.id)
     assert ret_booking_after_delete is None, "Booking wasn't deleted"
+
+
+async def test_room_occupancy_follows_bookings(db):
+    users: list[UserInDB] = await db.auth.get_all()
+    rooms: list[RoomInDB] = await db.rooms.get_all()
+    room_id = rooms[-1].id
+    booking_data = BookingCreate(
+        room_id=room_id,
+        user_id=users[0].id,
+        date_from=date(2030, 1, 10),
+        date_to=date(2030, 1, 13),
+        price=1000,
+    )
+    booking = await db.bookings.add(booking_data)
+    occupancy = await db.room_occupancy.get_filtered(room_id=room_id)
+    nights = {o.day: o.booked_count for o in occupancy if o.day.year == 2030}
+    assert nights == {
+        date(2030, 1, 10): 1,
+        date(2030, 1, 11): 1,
+        date(2030, 1, 12): 1,
+    }, "Check-out day must not be occupied"
+
+    await db.room_occupancy.rebuild()
+    rebuilt = await db.room_occupancy.get_filtered(room_id=room_id)
+    assert {o.day: o.booked_count for o in rebuilt if o.day.year == 2030} == nights
+
+    await db.bookings.delete(id=booking.id)
+    occupancy = await db.room_occupancy.get_filtered(room_id=room_id)
+    assert all(o.booked_count == 0 for o in occupancy if o.day.year == 2030)
+
+
+async def test_room_units_prevent_overbooking(db):
+    users: list[UserInDB] = await db.auth.get_all()
+    rooms: list[RoomInDB] = await db.rooms.get_all()
+    room = rooms[-1]
+    booking_data = BookingCreate(
+        room_id=room.id,
+        user_id=users[0].id,
+        date_from=date(2032, 5, 1),
+        date_to=date(2032, 5, 4),
+        price=1000,
+    )
+    bookings = [await db.bookings.add(booking_data) for _ in range(room.quantity)]
+    units = await db.session.execute(
+        select(RoomUnitBooking.unit).filter(
+            RoomUnitBooking.booking_id.in_([booking.id for booking in bookings])
+        )
+    )
+    assert sorted(units.scalars().all()) == list(range(1, room.quantity + 1))
+
+    with pytest.raises(NoRoomsAvailableException):
+        await db.bookings.add(booking_data)
+    booked = await db.bookings.get_filtered(Booking.date_from == date(2032, 5, 1), room_id=room.id)
+    assert len(booked) == room.quantity
+
+    # тот же unit на пересекающиеся даты запрещён самой базой
+    with pytest.raises(IntegrityError) as exc_info:
+        async with db.session.begin_nested():
+            await db.session.execute(
+                insert(RoomUnitBooking).values(
+                    booking_id=bookings[0].id,
+                    booking_date_from=date(2032, 5, 3),
+                    room_id=room.id,
+                    unit=1,
+                    stay=Range(date(2032, 5, 3), date(2032, 5, 6)),
+                )
+            )
+    assert is_unit_taken(exc_info.value)
+
+
+async def test_bulk_load_assigns_units(db):
+    users: list[UserInDB] = await db.auth.get_all()
+    rooms: list[RoomInDB] = await db.rooms.get_all()
+    room = rooms[-1]
+    booking_data = BookingCreate(
+        room_id=room.id,
+        user_id=users[0].id,
+        date_from=date(2033, 2, 1),
+        date_to=date(2033, 2, 5),
+        price=1000,
+    )
+    ids = await db.bookings.copy_bulk([booking_data] * room.quantity, return_ids=True)
+    units = await db.session.execute(
+        select(RoomUnitBooking.unit).filter(RoomUnitBooking.booking_id.in_(ids))
+    )
+    assert sorted(units.scalars().all()) == list(range(1, room.quantity + 1))
+
+    with pytest.raises(NoRoomsAvailableException):
+        await db.bookings.copy_bulk([booking_data])
+
+
+async def test_bulk_load_rejects_long_stays(db):
+    users: list[UserInDB] = await db.auth.get_all()
+    rooms: list[RoomInDB] = await db.rooms.get_all()
+    booking_data = BookingCreate(
+        room_id=rooms[-1].id,
+        user_id=users[0].id,
+        date_from=date(2034, 1, 1),
+        date_to=date(2035, 6, 1),
+        price=1000,
+    )
+    with pytest.raises(DateRangeException):
+        await db.bookings.copy_bulk([booking_data])
+    with pytest.raises(DateRangeException):
+        await db.bookings.upsert_bulk([booking_data])
+
+
+async def test_delete_batch_archives_and_releases_occupancy(db):
+    users: list[UserInDB] = await db.auth.get_all()
+    rooms: list[RoomInDB] = await db.rooms.get_all()
+    room_id = rooms[-1].id
+    bookings = [
+        BookingCreate(
+            room_id=room_id,
+            user_id=users[0].id,
+            date_from=date(1999, 1, day),
+            date_to=date(1999, 1, day + 2),
+            price=1000,
+        )
+        for day in range(1, 6)
+    ]
+    await db.bookings.add_bulk(bookings)
+    old_bookings = Booking.date_to < date(2000, 1, 1)
+
+    assert await db.bookings.delete_batch(old_bookings, batch_size=3, archive=True) == 3
+    assert await db.bookings.delete_batch(old_bookings, batch_size=3, archive=True) == 2
+    assert await db.bookings.delete_batch(old_bookings, batch_size=3, archive=True) == 0
+
+    archived = await db.session.execute(
+        select(BookingArchive.id).filter(BookingArchive.date_to < date(2000, 1, 1))
+    )
+    assert len(archived.all()) == 5
+    occupancy = await db.room_occupancy.get_filtered(room_id=room_id)
+    assert all(o.booked_count == 0 for o in occupancy if o.day.year == 1999)
+
+
+async def test_purge_bookings_commits_batches(db):
+    users: list[UserInDB] = await db.auth.get_all()
+    rooms: list[RoomInDB] = await db.rooms.get_all()
+    await db.bookings.add_bulk(
+        [
+            BookingCreate(
+                room_id=rooms[-1].id,
+                user_id=users[0].id,
+                date_from=date(1997, 1, day),
+                date_to=date(1997, 1, day + 2),
+                price=1000,
+            )
+            for day in range(1, 6)
+        ]
+    )
+    await db.commit()
+
+    progress = []
+    deleted = await BookingService(db).purge_bookings(
+        ended_before=date(1998, 1, 1), archive=True, batch_size=2, on_progress=progress.append
+    )
+    assert deleted == 5
+    assert progress == [2, 4, 5]
+    assert await db.bookings.get_filtered(Booking.date_to < date(1998, 1, 1)) == []
+    archived = await db.session.execute(
+        select(BookingArchive.date_from).filter(BookingArchive.date_to < date(1998, 1, 1))
+    )
+    assert sorted(archived.scalars().all()) == [date(1997, 1, day) for day in range(1, 6)]
+
+    # purge_bookings коммитит, поэтому архив убираем за собой
+    await db.session.execute(
+        delete(BookingArchive).filter(BookingArchive.date_to < date(1998, 1, 1))
+    )
+    await db.commit()
+
+
+async def test_booking_partitions(db):
+    users: list[UserInDB] = await db.auth.get_all()
+    rooms: list[RoomInDB] = await db.rooms.get_all()
+    booking = await db.bookings.add(
+        BookingCreate(
+            room_id=rooms[-1].id,
+            user_id=users[0].id,
+            date_from=date(2020, 3, 30),
+            date_to=date(2020, 4, 2),
+            price=1000,
+        )
+    )
+
+    created = await db.booking_partitions.ensure_partitions(date(2020, 3, 1), date(2020, 4, 1))
+    assert created == ["bookings_y2020m03", "bookings_y2020m04"]
+    assert await db.booking_partitions.ensure_partitions(date(2020, 3, 1), date(2020, 4, 1)) == []
+    assert await db.bookings.get_one(id=booking.id) == booking
+
+    detached = await db.booking_partitions.detach_partitions_before(date(2020, 4, 1), archive=True)
+    assert detached == ["bookings_y2020m03"]
+    assert await db.bookings.get_one_or_none(id=booking.id) is None
+    archived = await db.session.execute(
+        select(BookingArchive.id).filter(BookingArchive.id == booking.id)
+    )
+    assert archived.scalar() == booking.id
+    occupancy = await db.room_occupancy.get_filtered(room_id=rooms[-1].id)
+    assert all(o.booked_count == 0 for o in occupancy if o.day.year == 2020)
+
+
+async def test_detach_keeps_partitions_with_ongoing_stays(db):
+    users: list[UserInDB] = await db.auth.get_all()
+    rooms: list[RoomInDB] = await db.rooms.get_all()
+    today = date.today()
+    current_month = today.replace(day=1)
+    check_in_month = add_months(current_month, -2)
+    # заезд до границы отсоединения, выезд уже после сегодняшнего дня
+    booking = await db.bookings.add(
+        BookingCreate(
+            room_id=rooms[-1].id,
+            user_id=users[0].id,
+            date_from=check_in_month + timedelta(days=4),
+            date_to=today + timedelta(days=30),
+            price=1000,
+        )
+    )
+    await db.booking_partitions.ensure_partitions(check_in_month, check_in_month)
+
+    assert await db.booking_partitions.detach_partitions_before(current_month) == []
+    assert await db.bookings.get_one(id=booking.id) == booking
+    occupancy = await db.room_occupancy.get_filtered(room_id=rooms[-1].id, day=today)
+    assert occupancy[0].booked_count >= 1
+    unit = await db.session.execute(
+        select(RoomUnitBooking.unit).filter(RoomUnitBooking.booking_id == booking.id)
+    )
+    assert unit.scalar() is not None, "Ongoing stay must keep its unit"
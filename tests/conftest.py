@@ -6,12 +6,14 @@ mock.patch("fastapi_cache.decorator.cache", lambda *args, **kwargs: lambda f: f)
 
 import pytest
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
 
 from src.config import settings
+from src.core.setup import redis_manager
 from src.database import Base, engine_null_pool, async_session_maker_null_pool
 import json
 
-from src.dependencies import get_db
+from src.dependencies import get_db, get_export_db, get_read_db, get_search_db
 from src.main import app
 from src.utils.db_manager import DBManager
 
@@ -29,7 +31,23 @@ async def get_db_null_pool() -> AsyncGenerator[DBManager, None]:
         yield db
 
 
+async def get_read_db_null_pool() -> AsyncGenerator[DBManager, None]:
+    async with DBManager(
+        session_factory=async_session_maker_null_pool,
+        read_only=True,
+        statement_timeout=settings.DB_SEARCH_STATEMENT_TIMEOUT,
+    ) as db:
+        yield db
+
+
+def get_export_db_null_pool() -> DBManager:
+    return DBManager(session_factory=async_session_maker_null_pool, read_only=True)
+
+
 app.dependency_overrides[get_db] = get_db_null_pool
+app.dependency_overrides[get_read_db] = get_read_db_null_pool
+app.dependency_overrides[get_search_db] = get_read_db_null_pool
+app.dependency_overrides[get_export_db] = get_export_db_null_pool
 
 
 @pytest.fixture(scope="session")
@@ -48,10 +66,20 @@ async def setup_database():
     assert settings.MODE == "TEST"
 
     async with engine_null_pool.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
 
 
+@pytest.fixture(scope="session", autouse=True)
+async def redis():
+    # lifespan приложения в тестах не запускается, а теги кеша инвалидируются через Redis
+    await redis_manager.connect()
+    yield redis_manager
+    await redis_manager.close()
+
+
 @pytest.fixture(scope="session", autouse=True)
 async def insert_hotels_and_rooms(setup_database, ac):
     with (
@@ -60,21 +88,19 @@ async def insert_hotels_and_rooms(setup_database, ac):
     ):
         hotels = json.load(hotels_file)
         rooms = json.load(rooms_file)
-    for hotel in hotels:
-        response = await ac.post("/hotels/", json=hotel)
-        assert response.status_code == 200, (
-            "Failed to add hotels in db",
-            response.status_code,
-            response.text,
-        )
+    hotels = [{**hotel, "rooms": []} for hotel in hotels]
     for room in rooms:
-        hotel_id = room["hotel_id"]
-        response = await ac.post(f"/hotels/{hotel_id}/rooms", json=room)
-        assert response.status_code == 200, (
-            "Failed to add rooms in db",
-            response.status_code,
-            response.text,
-        )
+        hotels[room.pop("hotel_id") - 1]["rooms"].append(room)
+    catalog = "".join(json.dumps(hotel) + "\n" for hotel in hotels)
+
+    response = await ac.post(
+        "/hotels/import", files={"file": ("catalog.ndjson", catalog.encode())}
+    )
+    assert response.status_code == 200, (
+        "Failed to add hotels and rooms in db",
+        response.status_code,
+        response.text,
+    )
 
 
 @pytest.fixture(scope="session", autouse=True)
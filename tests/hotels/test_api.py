@@ -83,3 +83,45 @@ async def test_update_and_patch_hotel(ac):
     assert response.json()["data"]["id"] == 1
     assert response.json()["data"]["title"] == "patched_test_hotel"
     assert response.json()["data"]["location"] == "patched_test_location"
+
+
+async def test_get_hotels_by_cursor(ac):
+    params = {"date_from": "2024-10-18", "date_to": "2024-10-25", "per_page": 1}
+    response = await ac.get("/hotels/", params={**params, "per_page": 100})
+    assert response.status_code == 200
+    all_ids = [hotel["id"] for hotel in response.json()]
+
+    ids = []
+    cursor = ""
+    while cursor is not None:
+        response = await ac.get("/hotels/", params={**params, "after": cursor})
+        assert response.status_code == 200
+        ids += [hotel["id"] for hotel in response.json()["data"]]
+        cursor = response.json()["next_cursor"]
+    assert ids == all_ids
+
+    response = await ac.get("/hotels/", params={**params, "after": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+async def test_import_hotels_csv(ac):
+    catalog = (
+        "hotel_title,hotel_location,room_title,room_description,price,quantity,facilities_ids\n"
+        "Imported hotel,Imported location,Imported room,,1000,2,\n"
+        "Imported hotel,Imported location,Another room,Cozy,2000,1,\n"
+        "Empty hotel,Empty location,,,,,\n"
+    )
+    response = await ac.post("/hotels/import", files={"file": ("catalog.csv", catalog.encode())})
+    assert response.status_code == 200
+    assert response.json()["hotels"] == 2
+    assert response.json()["rooms"] == 2
+    assert response.json()["progress"][-1]["hotels"] == 2
+    assert response.json()["rows_per_second"] > 0
+
+    response = await ac.post(
+        "/hotels/import",
+        params={"format": "csv"},
+        files={"file": ("catalog.txt", catalog.replace("1000", "cheap").encode())},
+    )
+    assert response.status_code == 422
+    assert "line 2" in response.json()["detail"]
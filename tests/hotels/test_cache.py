@@ -0,0 +1,243 @@
+import asyncio
+import time
+
+import pytest
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from pydantic import TypeAdapter
+
+from src.core.cache_tags import (
+    HOTEL_TAG,
+    HOTELS_TAG,
+    invalidate_tags,
+    tagged_key_builder,
+    wait_delayed_invalidations,
+)
+from src.config import settings
+from src.connectors.local_cache import LocalCache
+from src.connectors.redis_connector import RedisConnector
+from src.core.cache_codec import COMPRESSION_HEADERS, SERIALIZER_HEADERS, CacheCodec
+from src.core.cache_stats import CacheStats, cache_stats
+from src.core.redis_cache_decorator import redis_cache
+from src.core.single_flight import SingleFlight, coalesced_cache
+from src.hotels.schemas import HotelInDB
+from src.hotels.router import get_hotel_by_id
+
+
+async def build_key(key_builder, hotel_id: int) -> str:
+    return await key_builder(
+        get_hotel_by_id, "test", kwargs={"hotel_id": hotel_id, "db": object()}
+    )
+
+
+async def test_tagged_key_changes_after_invalidation(redis):
+    key_builder = tagged_key_builder(HOTEL_TAG, HOTELS_TAG)
+
+    key = await build_key(key_builder, hotel_id=1)
+    other_hotel_key = await build_key(key_builder, hotel_id=2)
+    # db у каждого запроса свой и в ключ не входит
+    assert await build_key(key_builder, hotel_id=1) == key
+
+    await invalidate_tags(HOTEL_TAG.format(hotel_id=1))
+    assert await build_key(key_builder, hotel_id=1) != key
+    assert await build_key(key_builder, hotel_id=2) == other_hotel_key
+
+    await invalidate_tags(HOTELS_TAG)
+    assert await build_key(key_builder, hotel_id=2) != other_hotel_key
+
+
+async def test_tags_invalidated_again_after_replica_lag(redis, monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_HOSTS", ["replica"])
+    monkeypatch.setattr(settings, "DB_REPLICA_MAX_LAG", 0.05)
+    key_builder = tagged_key_builder(HOTEL_TAG)
+
+    await invalidate_tags(HOTEL_TAG.format(hotel_id=3))
+    # ключ, закешированный по ещё отстающей реплике
+    key = await build_key(key_builder, hotel_id=3)
+    await wait_delayed_invalidations()
+    assert await build_key(key_builder, hotel_id=3) != key
+
+
+async def test_single_flight_computes_once(redis):
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return "result"
+
+    async def get_cached():
+        return None
+
+    single_flight = SingleFlight()
+    results = await asyncio.gather(
+        *[single_flight.do("test-single-flight", compute, get_cached) for _ in range(20)]
+    )
+    assert results == ["result"] * 20
+    assert calls == 1
+
+
+@pytest.fixture
+def in_memory_fastapi_cache():
+    backend = InMemoryBackend()
+    FastAPICache.init(backend, prefix="test")
+    yield backend
+    FastAPICache.reset()
+
+
+async def test_coalesced_cache_builds_key_and_writes_once(
+    redis, in_memory_fastapi_cache, monkeypatch
+):
+    backend = in_memory_fastapi_cache
+    key_builder = tagged_key_builder(HOTEL_TAG)
+    key_builds = 0
+    writes = 0
+
+    async def counting_key_builder(*args, **kwargs):
+        nonlocal key_builds
+        key_builds += 1
+        return await key_builder(*args, **kwargs)
+
+    async def counting_set(*args, **kwargs):
+        nonlocal writes
+        writes += 1
+        return await InMemoryBackend.set(backend, *args, **kwargs)
+
+    monkeypatch.setattr(backend, "set", counting_set)
+
+    @coalesced_cache(expire=60, key_builder=counting_key_builder)
+    async def get_hotel(hotel_id: int) -> dict:
+        await asyncio.sleep(0.1)
+        return {"id": hotel_id}
+
+    results = await asyncio.gather(*[get_hotel(hotel_id=5) for _ in range(5)])
+    assert results == [{"id": 5}] * 5
+    assert await get_hotel(hotel_id=5) == {"id": 5}
+    assert key_builds == 6
+    assert writes == 1
+    assert cache_stats.snapshot()[f"{__name__}.get_hotel"] == {"miss": 5, "hit": 1}
+
+
+def test_cache_stats_top():
+    stats = CacheStats()
+    for _ in range(3):
+        stats.hit("popular")
+    stats.miss("popular")
+    stats.stale("rare")
+    stats.miss("other")
+    stats.miss("other")
+    assert stats.top(2) == {"popular": {"hit": 3, "miss": 1}, "other": {"miss": 2}}
+
+
+async def test_redis_cache_serves_stale_while_revalidating(redis):
+    calls = 0
+
+    @redis_cache(exp=1, stale_ttl=60)
+    async def get_hotel(hotel_id: int) -> HotelInDB:
+        nonlocal calls
+        calls += 1
+        return HotelInDB(id=hotel_id, title=f"Hotel v{calls}", location="Stale st. 1")
+
+    hotel_id = 1000 + int(time.time())
+    assert (await get_hotel(hotel_id=hotel_id)).title == "Hotel v1"
+    # из кеша возвращается та же модель, а не dict
+    assert await get_hotel(hotel_id=hotel_id) == HotelInDB(
+        id=hotel_id, title="Hotel v1", location="Stale st. 1"
+    )
+
+    await asyncio.sleep(1.1)
+    # устаревшая запись отдаётся сразу, а обновляется в фоне
+    assert (await get_hotel(hotel_id=hotel_id)).title == "Hotel v1"
+    await asyncio.sleep(0.2)
+    assert (await get_hotel(hotel_id=hotel_id)).title == "Hotel v2"
+    assert calls == 2
+
+    stats = cache_stats.snapshot()[f"get_hotel:hotel_id_{hotel_id}"]
+    assert stats == {"miss": 1, "hit": 2, "stale": 1}
+
+
+async def test_redis_cache_treats_unreadable_entry_as_miss(redis):
+    @redis_cache(exp=60)
+    async def get_hotel(hotel_id: int) -> HotelInDB:
+        return HotelInDB(id=hotel_id, title="Fresh hotel", location="Corrupt st. 1")
+
+    hotel_id = 2000 + int(time.time())
+    await redis.set(f"get_hotel:hotel_id_{hotel_id}", b"j-not json", 60)
+    assert (await get_hotel(hotel_id=hotel_id)).title == "Fresh hotel"
+    # запись перезаписана и дальше читается из кеша
+    assert (await get_hotel(hotel_id=hotel_id)).title == "Fresh hotel"
+    assert cache_stats.snapshot()[f"get_hotel:hotel_id_{hotel_id}"] == {"miss": 1, "hit": 1}
+
+
+async def test_local_cache_invalidated_across_workers(redis):
+    workers = [
+        RedisConnector(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            local_cache=LocalCache(max_size=100, ttl=60),
+        )
+        for _ in range(2)
+    ]
+    for worker in workers:
+        await worker.connect()
+    await asyncio.sleep(0.1)  # подписка на канал инвалидации
+    first, second = workers
+
+    await first.set("test-local-cache", "v1")
+    assert await second.get("test-local-cache") == b"v1"
+    assert second.local_cache.get("test-local-cache") == b"v1"
+
+    await first.set("test-local-cache", "v2")
+    await asyncio.sleep(0.1)
+    assert await second.get("test-local-cache") == b"v2"
+
+    for worker in workers:
+        await worker.close()
+
+
+def test_cache_codec_round_trip():
+    adapter = TypeAdapter(list[HotelInDB])
+    hotels = [
+        HotelInDB(id=hotel_id, title=f"Hotel {hotel_id}", location="Codec st. 1")
+        for hotel_id in range(100)
+    ]
+    codec = CacheCodec(compress_min_size=1024)
+    encoded = codec.encode(hotels, adapter)
+    assert codec.decode(encoded, adapter) == hotels
+    # запись самоописываемая: читается кодеком с другими настройками
+    assert CacheCodec(compress_min_size=10**9).decode(encoded, adapter) == hotels
+
+
+@pytest.mark.parametrize(
+    "serializer, compression",
+    [("msgpack", "none"), ("msgpack", "zstd"), ("orjson", "lz4"), ("json", "zstd")],
+)
+def test_cache_codec_optional_codecs_round_trip(serializer, compression):
+    adapter = TypeAdapter(list[HotelInDB])
+    hotels = [
+        HotelInDB(id=hotel_id, title=f"Hotel {hotel_id}", location="Codec st. 1")
+        for hotel_id in range(100)
+    ]
+    codec = CacheCodec(serializer, compression, compress_min_size=0)
+    encoded = codec.encode(hotels, adapter)
+    assert encoded[:2] == SERIALIZER_HEADERS[serializer] + COMPRESSION_HEADERS[compression]
+    assert codec.decode(encoded, adapter) == hotels
+    # декодер выбирается по заголовку, а не по настройкам кодека
+    assert CacheCodec().decode(encoded, adapter) == hotels
+
+
+def test_cache_codec_rejects_unknown_header():
+    with pytest.raises(ValueError):
+        CacheCodec().decode(b"x-{}", TypeAdapter(dict))
+
+
+async def test_redis_mset_mget_pipeline(redis):
+    await redis.mset({"test-mset-a": "1", "test-mset-b": "2"}, exp={"test-mset-a": 60})
+    assert await redis.mget(["test-mset-a", "test-mset-b", "test-mset-c"]) == [b"1", b"2", None]
+
+    async with redis.pipeline() as pipe:
+        pipe.ttl("test-mset-a").ttl("test-mset-b")
+        ttl_a, ttl_b = await pipe.execute()
+    assert 0 < ttl_a <= 60
+    assert ttl_b == -1
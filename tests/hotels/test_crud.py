@@ -1,7 +1,10 @@
 import pytest
+from sqlalchemy.exc import DBAPIError
 
+from src.database import async_session_maker_null_pool
 from src.exceptions import ObjectNotFoundException
-from src.hotels.schemas import HotelCreateOrUpdate, HotelPATCH
+from src.hotels.schemas import HotelCreateOrUpdate, HotelInDB, HotelPATCH
+from src.utils.db_manager import DBManager
 
 
 async def test_hotels_crud(db):
@@ -48,3 +51,42 @@ async def test_hotels_crud(db):
 
     with pytest.raises(ObjectNotFoundException):
         await db.hotels.get_one(id=created_hotel.id)
+
+
+async def test_read_only_db_rejects_writes():
+    async with DBManager(session_factory=async_session_maker_null_pool, read_only=True) as db:
+        assert await db.hotels.get_all()
+        with pytest.raises(DBAPIError, match="read-only transaction"):
+            await db.hotels.add(HotelCreateOrUpdate(title="Read only", location="Nowhere"))
+
+
+async def test_get_filtered_rows(db):
+    hotel = (await db.hotels.get_all(limit=1))[0]
+
+    rows = await db.hotels.get_filtered_rows(columns=["id", "title"], id=hotel.id)
+    assert [tuple(row) for row in rows] == [(hotel.id, hotel.title)]
+
+    rows = await db.hotels.get_filtered_rows(as_mappings=True, id=hotel.id)
+    assert [dict(row) for row in rows] == [hotel.model_dump()]
+
+    assert await db.hotels.exists(id=hotel.id)
+    assert not await db.hotels.exists(id=-1)
+
+
+async def test_copy_and_upsert_bulk(db):
+    hotels = [
+        HotelCreateOrUpdate(title=f"Bulk hotel {i}", location="Bulk location") for i in range(5)
+    ]
+    ids = await db.hotels.copy_bulk(hotels, return_ids=True, chunk_size=2)
+    assert len(set(ids)) == 5
+    assert await db.hotels.copy_bulk(hotels[:3]) == 3
+
+    reloaded = [
+        HotelInDB(id=hotel_id, title=f"Reloaded hotel {i}", location="Bulk location")
+        for i, hotel_id in enumerate(ids)
+    ]
+    assert await db.hotels.upsert_bulk(reloaded, return_ids=True) == ids
+    assert await db.hotels.upsert_bulk(reloaded, update_columns=[]) == 0
+
+    rows = await db.hotels.get_filtered_rows(db.hotels.model.id.in_(ids), columns=["title"])
+    assert sorted(row.title for row in rows) == [f"Reloaded hotel {i}" for i in range(5)]